@@ -3,12 +3,83 @@ Creates a backup of the Rehab geodatabase for a given fire number and year.
 
 Determines the appropriate district based on the fire number, constructs the input
 and output paths, and copies the backup geodatabase to the Outgoing folder.
+
+Incremental mode hashes the files of the GDB folder and copies only the ones that
+changed since the last snapshot into a new snapshot folder next to the backup
+(Outgoing\{fire_number}_Rehab_Backup_Snapshots\<timestamp>). Each snapshot's
+manifest.json lists every file with its hash and the snapshot that holds its bytes.
 """
 
 import arcpy
-
-
-def backup_gdb(fire_year, fire_number):
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# incremental_backup() is a standalone copy of Wildfire_Rehab_Tool_v3/gdb_backup.delta_backup
+# (this suite does not import the v3 modules); keep the two in sync.
+def incremental_backup(input_gdb, snapshots_dir):
+    """Copy only changed GDB files into a new snapshot folder. Returns (snapshot_id, copied, total)."""
+    snapshots = sorted(d for d in os.listdir(snapshots_dir)
+                       if os.path.isfile(os.path.join(snapshots_dir, d, "manifest.json"))) \
+        if os.path.isdir(snapshots_dir) else []
+    last_files = {}
+    if snapshots:
+        with open(os.path.join(snapshots_dir, snapshots[-1], "manifest.json"), encoding="utf-8") as f:
+            last_files = json.load(f)["files"]
+
+    base = datetime.now().strftime("%Y%m%dT%H%M%S")
+    snapshot_id, i = base, 1
+    while os.path.exists(os.path.join(snapshots_dir, snapshot_id)):
+        snapshot_id = f"{base}_{i}"
+        i += 1
+    snap_dir = os.path.join(snapshots_dir, snapshot_id)
+    os.makedirs(snap_dir)
+
+    files = {}
+    copied = 0
+    for root, _dirs, names in os.walk(input_gdb):
+        for name in sorted(names):
+            if name.lower().endswith(".lock"):
+                continue  # open ArcGIS sessions
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, input_gdb).replace(os.sep, "/")
+            st = os.stat(path)
+            prev = last_files.get(rel)
+            if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+                digest = prev["sha256"]
+            else:
+                digest = _file_sha256(path)
+
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+            if prev and prev["sha256"] == digest:
+                entry["stored_in"] = prev["stored_in"]
+            else:
+                dst = os.path.join(snap_dir, *rel.split("/"))
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(path, dst)
+                entry["stored_in"] = snapshot_id
+                copied += 1
+            files[rel] = entry
+
+    with open(os.path.join(snap_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"snapshot_id": snapshot_id, "source": input_gdb,
+                   "parent": snapshots[-1] if snapshots else None, "files": files}, f, indent=1)
+
+    return snapshot_id, copied, len(files)
+
+
+def backup_gdb(fire_year, fire_number, incremental=False):
     # Check if GDB has a fire_number
     if "FIRENUMBER" in fire_number.upper():
         msg = "Step 1. Please update the geodatabase name, as it is currently set to FIRENUMBER_Rehab.gdb and the fire number has not been specified."
@@ -47,6 +118,14 @@ def backup_gdb(fire_year, fire_number):
     #output_gdb = fr"\\spatialfiles.bcgov\work\srm\wml\Workarea\ofedyshy\Scripts\Rehab\Wildfire_Rehab_GitHub\Wildfire_Rehab_ProcessSuite\FireSeasonWork_Test\{fire_year}\{fire_district}\{fire_code}\{fire_number}\Data\Outgoing\{fire_number}_Rehab_Backup.gdb"
 
 
+    if incremental:
+        snapshots_dir = os.path.splitext(output_gdb)[0] + "_Snapshots"
+        snapshot_id, copied, total = incremental_backup(input_gdb, snapshots_dir)
+        msg = f"Step 1. Incremental backup {snapshot_id}: copied {copied} of {total} file(s) -> {snapshots_dir}"
+        arcpy.AddMessage(msg)
+        print(msg)
+        return
+
     # Perform the copy operation
     arcpy.Copy_management(input_gdb, output_gdb)
 
@@ -55,9 +134,11 @@ def backup_gdb(fire_year, fire_number):
 if __name__ == "__main__":
     fire_year = arcpy.GetParameterAsText(0)
     fire_number = arcpy.GetParameterAsText(1)
+    # Optional: incremental snapshot instead of a full copy
+    incremental = arcpy.GetArgumentCount() > 2 and bool(arcpy.GetParameter(2))
     
     # Call the backup function
-    backup_gdb(fire_year, fire_number)
+    backup_gdb(fire_year, fire_number, incremental=incremental)
 
 
 
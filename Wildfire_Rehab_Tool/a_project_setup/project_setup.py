@@ -7,7 +7,7 @@ used by both point and line processing steps:
 - Reprojecting collected input shapefiles to BC Albers
 """
 
-# Wildfire_Rehab_Tool/a_utils/project_setup.py
+# Wildfire_Rehab_Tool/a_project_setup/project_setup.py
 
 import arcpy
 import os
@@ -11,7 +11,7 @@ This script defines the PointProcessor class, which is responsible for:
 
 import arcpy
 import os
-from a_utils.domain_mappings import POINT_DOMAIN_MAPPING, normalize_label
+from a_project_setup.domain_mappings import POINT_DOMAIN_MAPPING, normalize_label
 
 class PointProcessor:
     def __init__(self, fire_name, fire_number, status):
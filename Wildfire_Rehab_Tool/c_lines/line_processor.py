@@ -11,7 +11,7 @@ This script defines the LineProcessor class, which performs the following:
 
 import arcpy
 import os
-from a_utils.domain_mappings import LINE_DOMAIN_MAPPING, normalize_label
+from a_project_setup.domain_mappings import LINE_DOMAIN_MAPPING, normalize_label
 
 class LineProcessor:
     def __init__(self, fire_name, fire_number, status):
@@ -40,15 +40,17 @@ def locate_and_retrieve(fire_number):
         arcpy.AddError(f"Group layer '{group_input_layer_name}' (Input) not found.")
         return None
 
+    # Describe each matching input layer once; the points and lines loops share the result
+    input_layers = [(lyr, arcpy.Describe(lyr.dataSource).shapeType)
+                    for lyr in input_group_lyr.listLayers() if re.match(pattern, lyr.name)]
+
     # --- POINTS to COPY ---
     matched_layers_pts = []
-    for lyr in input_group_lyr.listLayers():
-        if re.match(pattern, lyr.name):
-            desc = arcpy.Describe(lyr.dataSource)
-            if desc.shapeType == "Point":
-                matched_layers_pts.append(lyr)
-            else:
-                arcpy.AddMessage(f"Skipping '{lyr.name}' (shapeType = {desc.shapeType}).")
+    for lyr, shape_type in input_layers:
+        if shape_type == "Point":
+            matched_layers_pts.append(lyr)
+        else:
+            arcpy.AddMessage(f"Skipping '{lyr.name}' (shapeType = {shape_type}).")
 
     if not matched_layers_pts:
         arcpy.AddError(f"No point sublayers in '{group_input_layer_name}' match pattern '{pattern}'.")
@@ -83,13 +85,11 @@ def locate_and_retrieve(fire_number):
 
     # --- LINES to COPY ---
     matched_layers_lines = []
-    for lyr in input_group_lyr.listLayers():
-        if re.match(pattern, lyr.name):
-            desc = arcpy.Describe(lyr.dataSource)
-            if desc.shapeType == "Polyline":
-                matched_layers_lines.append(lyr)
-            else:
-                arcpy.AddMessage(f"Skipping '{lyr.name}' (shapeType = {desc.shapeType}).")
+    for lyr, shape_type in input_layers:
+        if shape_type == "Polyline":
+            matched_layers_lines.append(lyr)
+        else:
+            arcpy.AddMessage(f"Skipping '{lyr.name}' (shapeType = {shape_type}).")
 
     if not matched_layers_lines:
         arcpy.AddError(f"No line sublayers in '{group_input_layer_name}' match pattern '{pattern}'.")
@@ -1,41 +1,106 @@
 # Step 2
 """
 This script defines the RehabJob class, which acts as the controller for the entire workflow.
-It first performs the shared setup (e.g., backup, layer imports, reprojection),
-then delegates to the PointProcessor and LineProcessor classes to process point and line features.
+The workflow is a small task graph (see task_graph.py):
+- backup -> import rehab layers / collected shapefiles -> reproject (shared setup, in order)
+- the point branch (copy, attributes, domains for each layer in turn, then static
+  fields) and the line branch
+  (copy, static fields, attributes, domains) both depend only on the setup
+- every task opens arcpy edit sessions on the same {fire}_Rehab.gdb, and arcpy is not
+  thread-safe, so all tasks run one at a time on the calling thread (main_thread=True)
+- reports (feature counts and task timings) once both branches are done
+Finished tasks are written to a run journal; running the same job again after a failure
+resumes from the task that failed.
 """
 
 # Wildfire_Rehab_Tool/d_runner/rehab_job.py
 
-from a_utils.project_setup import ProjectSetup
+import arcpy
+import os
+
+from a_project_setup.project_setup import ProjectSetup
 from b_points.point_processor import PointProcessor
 from c_lines.line_processor import LineProcessor
+from d_runner.task_graph import TaskGraph, RunJournal
+
 
 class RehabJob:
-    def __init__(self, fire_year, fire_number, backup_folder, data_folder, fire_name, status):
+    def __init__(self, fire_year, fire_number, backup_folder, data_folder, fire_name, status,
+                 journal_path=None, resume=True):
         self.setup = ProjectSetup(fire_year, fire_number, backup_folder, data_folder)
+        self.fire_year = fire_year
         self.fire_name = fire_name
         self.fire_number = fire_number
         self.status = status
+        self.journal_path = journal_path or os.path.join(backup_folder, f"{fire_number}_RehabJob_journal.json")
+        self.resume = resume
+        self.graph = self._build_graph()
+
+    def _build_graph(self):
+        point_proc = PointProcessor(self.fire_name, self.fire_number, self.status)
+        line_proc = LineProcessor(self.fire_name, self.fire_number, self.status)
+        graph = TaskGraph()
+
+        # Every task runs arcpy (project, GP tools, edit sessions on one file GDB):
+        # all of them stay on the calling thread, one at a time
 
-    def run(self):
         # Step 1: Shared setup
-        self.setup.backup_geodatabase()
-        fc_points, fc_lines = self.setup.import_output_layers()
-        self.setup.import_input_shapefiles()
-        point_layers = self.setup.reproject_inputs()
+        graph.add("backup", lambda r: self.setup.backup_geodatabase(), main_thread=True)
+        graph.add("import_output_layers", lambda r: list(self.setup.import_output_layers()),
+                  deps=["backup"], main_thread=True)
+        graph.add("import_input_shapefiles", lambda r: self.setup.import_input_shapefiles(),
+                  deps=["import_output_layers"], main_thread=True)
+        graph.add("reproject", lambda r: self.setup.reproject_inputs(),
+                  deps=["import_input_shapefiles"], main_thread=True)
+
+        def fc_points(r):
+            return r["import_output_layers"][0]
+
+        def fc_lines(r):
+            return r["import_output_layers"][1]
+
+        def point_layers(r):
+            # One layer at a time: copy, attributes, domains, then the next layer
+            # (attributes / domains match against the points copied so far)
+            for pt_layer in r["reproject"]:
+                point_proc.copy_points(pt_layer, fc_points(r))
+                point_proc.copy_attributes(pt_layer, fc_points(r))
+                point_proc.copy_domains(pt_layer, fc_points(r))
 
         # Step 2: Point Processing
-        point_proc = PointProcessor(self.fire_name, self.fire_number, self.status)
-        for pt_layer in point_layers:
-            point_proc.copy_points(pt_layer, fc_points)
-            point_proc.copy_attributes(pt_layer, fc_points)
-            point_proc.copy_domains(pt_layer, fc_points)
-        point_proc.update_static_fields(fc_points)
+        graph.add("points_layers", point_layers, deps=["reproject"], main_thread=True)
+        graph.add("points_static_fields", lambda r: point_proc.update_static_fields(fc_points(r)),
+                  deps=["points_layers"], main_thread=True)
 
         # Step 3: Line Processing
-        line_proc = LineProcessor(self.fire_name, self.fire_number, self.status)
-        line_proc.copy_lines()
-        line_proc.update_static_fields(fc_lines)
-        line_proc.copy_attributes(fc_lines)
-        line_proc.copy_domains(fc_lines)
\ No newline at end of file
+        graph.add("lines_copy", lambda r: line_proc.copy_lines(), deps=["reproject"], main_thread=True)
+        graph.add("lines_static_fields", lambda r: line_proc.update_static_fields(fc_lines(r)), deps=["lines_copy"],
+                  main_thread=True)
+        graph.add("lines_attributes", lambda r: line_proc.copy_attributes(fc_lines(r)), deps=["lines_static_fields"],
+                  main_thread=True)
+        graph.add("lines_domains", lambda r: line_proc.copy_domains(fc_lines(r)), deps=["lines_attributes"],
+                  main_thread=True)
+
+        # Step 4: Reports
+        graph.add("reports", self._report, deps=["points_static_fields", "lines_domains"], main_thread=True)
+        return graph
+
+    def _report(self, r):
+        counts = {}
+        for kind, fc in zip(("points", "lines"), r["import_output_layers"]):
+            counts[kind] = int(arcpy.management.GetCount(fc)[0])
+            arcpy.AddMessage(f"Report: {os.path.basename(fc)} has {counts[kind]} {kind}.")
+        return counts
+
+    def run(self):
+        key = f"{self.fire_year}|{self.fire_number}|{os.path.normcase(os.path.abspath(self.setup.data_folder))}"
+        journal = RunJournal(self.journal_path, key)
+        if not self.resume and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        try:
+            return self.graph.run(workers=1, journal=journal)
+        finally:
+            arcpy.AddMessage("Task timings:")
+            for line in self.graph.timing_lines():
+                arcpy.AddMessage("  " + line)
@@ -0,0 +1,178 @@
+# module
+"""
+This script defines TaskGraph, a small dependency scheduler used by RehabJob:
+- Each task names the tasks it depends on; a task starts as soon as all of them are done
+- Independent tasks run at the same time in a thread pool, except main_thread tasks, which
+  run one at a time on the calling thread. arcpy is not thread-safe: every task that calls
+  arcpy (GP tools, cursors, edit sessions) must be a main_thread task
+- Every task is timed
+- A JSON run journal records finished tasks and their results, so a failed run can be
+  resumed from the task that failed instead of from the start
+"""
+
+# Wildfire_Rehab_Tool/d_runner/task_graph.py
+
+import arcpy
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class TaskFailed(Exception):
+    def __init__(self, task_name, error):
+        super().__init__(f"Task '{task_name}' failed: {error}")
+        self.task_name = task_name
+        self.error = error
+
+
+class Task:
+    def __init__(self, name, func, deps=(), main_thread=False):
+        self.name = name
+        self.func = func                  # func(results) -> JSON-serializable result
+        self.deps = tuple(deps)
+        self.main_thread = main_thread    # arcpy calls stay on the calling thread, one task at a time
+
+
+class RunJournal:
+    """JSON file: {"key": ..., "complete": bool, "tasks": {name: {"status", "seconds", "result"}}}"""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.tasks = {}
+        self.complete = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Keep finished tasks of an unfinished run with the same key. Returns the names resumed."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if data.get("key") != self.key or data.get("complete"):
+            return []
+        self.tasks = {name: t for name, t in data.get("tasks", {}).items() if t.get("status") == "done"}
+        return list(self.tasks)
+
+    def record(self, name, status, seconds, result=None, error=None):
+        with self._lock:
+            self.tasks[name] = {"status": status, "seconds": round(seconds, 2), "result": result, "error": error}
+            self._save()
+
+    def finish(self):
+        with self._lock:
+            self.complete = True
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "complete": self.complete, "tasks": self.tasks}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+class TaskGraph:
+    def __init__(self):
+        self.tasks = {}
+        self.timings = {}    # task name -> seconds (this run)
+
+    def add(self, name, func, deps=(), main_thread=False):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'.")
+        self.tasks[name] = Task(name, func, deps, main_thread)
+        return self.tasks[name]
+
+    def run(self, workers=2, journal=None):
+        """
+        Run every task once its dependencies are done. Tasks already finished in the
+        journal are skipped (their stored results are reused). Returns {task name: result}.
+        Raises TaskFailed for the first failing task after the running tasks have finished.
+        """
+        results = {}
+        resumed = journal.load() if journal else []
+        for name in resumed:
+            if name in self.tasks:
+                results[name] = journal.tasks[name]["result"]
+                arcpy.AddMessage(f"Resume: '{name}' already done in a previous run.")
+
+        pending = [name for name in self.tasks if name not in results]
+        running = {}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while True:
+                # Start everything whose dependencies are done (rescan after an inline task)
+                started = True
+                while started and failure is None:
+                    started = False
+                    for name in list(pending):
+                        task = self.tasks[name]
+                        if not all(dep in results for dep in task.deps):
+                            continue
+                        if task.main_thread:
+                            if running:
+                                continue    # wait until the pool is idle
+                            pending.remove(name)
+                            failure = self._run_inline(task, results, journal)
+                            started = True
+                            break
+                        pending.remove(name)
+                        running[pool.submit(self._timed, task, dict(results))] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    seconds, result, error = fut.result()
+                    failure = self._finish(name, seconds, result, error, results, journal) or failure
+
+        if failure is None and pending:
+            raise ValueError(f"Tasks with unmet dependencies: {', '.join(pending)}")
+        if failure is not None:
+            raise failure
+        if journal:
+            journal.finish()
+        return results
+
+    def _timed(self, task, results):
+        t0 = time.perf_counter()
+        try:
+            result = task.func(results)
+            return time.perf_counter() - t0, result, None
+        except Exception as e:
+            return time.perf_counter() - t0, None, e
+
+    def _run_inline(self, task, results, journal):
+        seconds, result, error = self._timed(task, results)
+        return self._finish(task.name, seconds, result, error, results, journal)
+
+    def _finish(self, name, seconds, result, error, results, journal):
+        self.timings[name] = seconds
+        if error is not None:
+            arcpy.AddError(f"Task '{name}' failed after {seconds:.1f}s: {error}")
+            if journal:
+                journal.record(name, "failed", seconds, error=str(error))
+            return TaskFailed(name, error)
+        results[name] = result
+        arcpy.AddMessage(f"Task '{name}' done in {seconds:.1f}s.")
+        if journal:
+            journal.record(name, "done", seconds, result)
+        return None
+
+    def timing_lines(self):
+        """Text lines: one row per task run in this run, in graph order."""
+        lines = [f"{'Task':<28} {'Time':>9}"]
+        for name in self.tasks:
+            if name in self.timings:
+                lines.append(f"{name:<28} {self.timings[name]:8.1f}s")
+        return lines
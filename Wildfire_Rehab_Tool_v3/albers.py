@@ -0,0 +1,252 @@
+import math
+import os
+
+import numpy as np
+
+from backends import arcpy   # only project_features() needs it; the math runs without ArcGIS
+
+"""
+NAD83 / BC Environment Albers (EPSG:3005) in pure NumPy
+
+forward() / inverse() run the Albers Equal Area Conic formulas (EPSG Guidance Note 7-2)
+over whole coordinate arrays at once, so collected WGS84 data can be projected in memory
+without a Project / BatchProject call.
+
+Like the GP path used by 1.3 / 4.1 (no geographic transformation given), WGS84 and NAD83
+lat/long are treated as the same datum.
+
+project_features() is the arcpy adapter: it reads a feature class once, projects every
+vertex in one array call, and writes the result to out_fc (e.g. 'memory\\name' or a GDB).
+"""
+
+#############################################################################################
+# PARAMETERS (EPSG:3005)
+#############################################################################################
+
+_A = 6378137.0                       # GRS80 semi-major axis
+_F = 1 / 298.257222101               # GRS80 flattening
+_E2 = 2 * _F - _F ** 2
+_E = math.sqrt(_E2)
+
+_LAT0 = math.radians(45.0)           # latitude of origin
+_LON0 = math.radians(-126.0)         # central meridian
+_LAT1 = math.radians(50.0)           # standard parallel 1
+_LAT2 = math.radians(58.5)           # standard parallel 2
+_FALSE_EASTING = 1000000.0
+_FALSE_NORTHING = 0.0
+
+BC_ALBERS_WKID = 3005
+WGS84_WKID = 4326
+NAD83_WKID = 4269
+
+
+def _m(phi):
+    s = np.sin(phi)
+    return np.cos(phi) / np.sqrt(1 - _E2 * s * s)
+
+
+def _q(phi):
+    s = np.sin(phi)
+    return (1 - _E2) * (s / (1 - _E2 * s * s) - (1 / (2 * _E)) * np.log((1 - _E * s) / (1 + _E * s)))
+
+
+_M1, _M2 = _m(_LAT1), _m(_LAT2)
+_Q0, _Q1, _Q2 = _q(_LAT0), _q(_LAT1), _q(_LAT2)
+_N = (_M1 ** 2 - _M2 ** 2) / (_Q2 - _Q1)
+_C = _M1 ** 2 + _N * _Q1
+_RHO0 = _A * math.sqrt(_C - _N * _Q0) / _N
+_Q_POLE = 1 - ((1 - _E2) / (2 * _E)) * math.log((1 - _E) / (1 + _E))
+
+
+#############################################################################################
+# TRANSFORMS
+#############################################################################################
+
+def forward(lon, lat):
+    """
+    Geographic degrees (lon, lat) -> BC Albers metres (x, y).
+    Accepts scalars or array-likes; returns float64 arrays.
+    """
+    lam = np.radians(np.asarray(lon, dtype="f8"))
+    phi = np.radians(np.asarray(lat, dtype="f8"))
+
+    rho = _A * np.sqrt(_C - _N * _q(phi)) / _N
+    theta = _N * (lam - _LON0)
+
+    x = _FALSE_EASTING + rho * np.sin(theta)
+    y = _FALSE_NORTHING + _RHO0 - rho * np.cos(theta)
+    return x, y
+
+
+def inverse(x, y, iterations=3):
+    """
+    BC Albers metres (x, y) -> geographic degrees (lon, lat).
+    Latitude starts from the authalic series and is refined with Newton steps.
+    """
+    dx = np.asarray(x, dtype="f8") - _FALSE_EASTING
+    dy = _RHO0 - (np.asarray(y, dtype="f8") - _FALSE_NORTHING)
+
+    rho = np.hypot(dx, dy)
+    theta = np.arctan2(dx, dy)
+    q = (_C - (rho * _N / _A) ** 2) / _N
+
+    # Authalic latitude -> geodetic latitude (series), then Newton refinement on q(phi)
+    beta = np.arcsin(np.clip(q / _Q_POLE, -1.0, 1.0))
+    e4, e6 = _E2 ** 2, _E2 ** 3
+    phi = (beta
+           + (_E2 / 3 + 31 * e4 / 180 + 517 * e6 / 5040) * np.sin(2 * beta)
+           + (23 * e4 / 360 + 251 * e6 / 3780) * np.sin(4 * beta)
+           + (761 * e6 / 45360) * np.sin(6 * beta))
+
+    for _ in range(iterations):
+        s = np.sin(phi)
+        w = 1 - _E2 * s * s
+        phi = phi + (w * w / (2 * np.cos(phi))) * (
+            q / (1 - _E2) - s / w + (1 / (2 * _E)) * np.log((1 - _E * s) / (1 + _E * s))
+        )
+
+    lam = _LON0 + theta / _N
+    return np.degrees(lam), np.degrees(phi)
+
+
+#############################################################################################
+# CONTROL POINTS
+#############################################################################################
+
+# (lon, lat) -> (x, y) reference values for EPSG:4269 -> EPSG:3005 from PROJ
+CONTROL_POINTS = [
+    ((-126.0, 45.0), (1000000.0, 0.0)),
+    ((-123.3656, 48.4284), (1195327.9029342681, 382812.0693173546)),
+    ((-120.0, 55.0), (1382469.6070165418, 1127447.6152458081)),
+    ((-130.0, 58.0), (763752.6098881182, 1452611.788325911)),
+    ((-114.05, 49.0), (1871374.8077350443, 516355.1997296502)),
+    ((-139.05, 60.0), (273995.89957093925, 1735643.8497245682)),
+    ((-122.0, 53.9), (1262083.2643600025, 995856.3447659835)),
+]
+
+
+def check_control_points(tolerance=0.001):
+    """
+    Compare forward() and inverse() against CONTROL_POINTS.
+    Returns the worst error in metres; raises ValueError if it exceeds `tolerance`.
+    """
+    lon = np.array([p[0][0] for p in CONTROL_POINTS])
+    lat = np.array([p[0][1] for p in CONTROL_POINTS])
+    ex = np.array([p[1][0] for p in CONTROL_POINTS])
+    ey = np.array([p[1][1] for p in CONTROL_POINTS])
+
+    x, y = forward(lon, lat)
+    fwd_err = np.hypot(x - ex, y - ey).max()
+
+    # Round trip: re-project the inverse result and measure the drift in metres
+    ilon, ilat = inverse(ex, ey)
+    rx, ry = forward(ilon, ilat)
+    inv_err = np.hypot(rx - ex, ry - ey).max()
+
+    worst = float(max(fwd_err, inv_err))
+    if worst > tolerance:
+        raise ValueError(f"BC Albers control point error {worst:.6f} m exceeds {tolerance} m.")
+    return worst
+
+
+#############################################################################################
+# ARCPY ADAPTER
+#############################################################################################
+
+def _check_geographic(sr, in_fc):
+    """Raise ValueError unless sr is WGS84 / NAD83 lat/long (the only input forward() handles)."""
+    name = (getattr(sr, "name", None) or "").upper()
+    code = getattr(sr, "factoryCode", None)
+    if getattr(sr, "type", None) != "Geographic" or not (
+            code in (WGS84_WKID, NAD83_WKID) or "WGS" in name or "NORTH_AMERICAN_1983" in name):
+        raise ValueError(f"{os.path.basename(str(in_fc))} is in {getattr(sr, 'name', None) or 'an unknown coordinate system'}; "
+                         f"the built-in Albers projection needs WGS84 or NAD83 geographic input.")
+
+
+def project_features(in_fc, out_fc):
+    """
+    Project a WGS84 / NAD83 geographic Point / Polyline / Polygon feature class into BC
+    Albers at out_fc, using forward() for every vertex in one array call. Attribute fields
+    are carried across (out_fc is created with in_fc as template); Z values are kept as
+    they are, M values are not carried. Raises ValueError for any other input coordinate
+    system.
+    """
+    desc = arcpy.Describe(in_fc)
+    shape_type = desc.shapeType
+    if shape_type not in ("Point", "Polyline", "Polygon"):
+        raise ValueError(f"Unsupported shape type for Albers projection: {shape_type}")
+    _check_geographic(desc.spatialReference, in_fc)
+    has_z = bool(getattr(desc, "hasZ", False))
+    z_args = {"has_z": True} if has_z else {}
+
+    sr = arcpy.SpatialReference(BC_ALBERS_WKID)
+    out_path, out_name = os.path.split(out_fc)
+    arcpy.management.CreateFeatureclass(out_path, out_name, shape_type.upper(), template=in_fc,
+                                        has_z="ENABLED" if has_z else "DISABLED", spatial_reference=sr)
+
+    fields = [f.name for f in arcpy.ListFields(in_fc) if f.type not in ("OID", "Geometry")]
+    out_fields = {f.name for f in arcpy.ListFields(out_fc)}
+    fields = [f for f in fields if f in out_fields]
+
+    # Read every vertex once; remember the part layout of each feature
+    lon, lat, z, layouts, attrs = [], [], [], [], []
+    with arcpy.da.SearchCursor(in_fc, ["SHAPE@"] + fields) as cur:
+        for row in cur:
+            geom = row[0]
+            parts = []
+            if geom is not None:
+                if shape_type == "Point":
+                    p = geom.firstPoint
+                    lon.append(p.X)
+                    lat.append(p.Y)
+                    if has_z:
+                        z.append(p.Z)
+                    parts.append(1)
+                else:
+                    # A None inside a polygon part separates rings; keep each ring as its own
+                    # array (arcpy.Polygon sorts out holes by ring orientation)
+                    for part in geom:
+                        n = 0
+                        for p in part:
+                            if p is None:
+                                if n:
+                                    parts.append(n)
+                                n = 0
+                                continue
+                            lon.append(p.X)
+                            lat.append(p.Y)
+                            if has_z:
+                                z.append(p.Z)
+                            n += 1
+                        if n:
+                            parts.append(n)
+            layouts.append(parts)
+            attrs.append(row[1:])
+
+    x, y = forward(lon, lat)
+    x, y = x.tolist(), y.tolist()
+    if not has_z:
+        z = [None] * len(x)
+
+    count = 0
+    pos = 0
+    with arcpy.da.InsertCursor(out_fc, ["SHAPE@"] + fields) as icur:
+        for parts, values in zip(layouts, attrs):
+            if not parts:
+                geom = None
+            elif shape_type == "Point":
+                geom = arcpy.PointGeometry(arcpy.Point(x[pos], y[pos], z[pos]), sr, **z_args)
+                pos += 1
+            else:
+                arr = arcpy.Array()
+                for n in parts:
+                    arr.add(arcpy.Array([arcpy.Point(x[i], y[i], z[i]) for i in range(pos, pos + n)]))
+                    pos += n
+                if shape_type == "Polyline":
+                    geom = arcpy.Polyline(arr, sr, **z_args)
+                else:
+                    geom = arcpy.Polygon(arr, sr, **z_args)
+            icur.insertRow((geom,) + tuple(values))
+            count += 1
+
+    return count
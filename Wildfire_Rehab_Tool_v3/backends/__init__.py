@@ -0,0 +1,113 @@
+import importlib
+
+"""
+Data backends for the v3 tools
+
+The task modules talk to the geodatabase through `arcpy` imported from here:
+
+    from backends import arcpy
+
+That name is a proxy for the active backend, so the same task code runs on
+- "arcpy"  : the real arcpy (default; what the script tools use in ArcGIS Pro)
+- "memory" : backends/memory.py, an in-memory arcpy stand-in (NumPy, no ArcGIS) for
+             benchmarks and regression checks of the hot paths
+
+    import backends
+    backends.use("memory")
+
+Switch backends before calling into the task modules; the proxy looks the backend up on
+every attribute access, so modules imported earlier follow the switch.
+
+PROTOCOL lists what a backend has to provide (the arcpy surface the task modules use for
+cursors, schema, describe and edit sessions). GP tools that only make sense inside
+ArcGIS Pro (BatchProject, mapping, ...) stay arcpy-only.
+
+set_wrapper() lets instrument.py see every attribute read through the proxy (to count
+cursors, rows and catalog calls while a step span is open).
+"""
+
+BACKENDS = {
+    "arcpy": "arcpy",
+    "memory": "backends.memory",
+}
+
+PROTOCOL = [
+    # cursors + edit sessions
+    "da.SearchCursor", "da.UpdateCursor", "da.InsertCursor", "da.Editor",
+    "da.FeatureClassToNumPyArray",
+    # schema / describe
+    "ListFields", "Describe", "Exists", "ValidateTableName",
+    "management.CreateFeatureclass", "management.AddField", "management.Delete",
+    "management.GetCount",
+    # geometry
+    "Point", "Array", "Polyline", "PointGeometry", "SpatialReference",
+    # messages / environment
+    "AddMessage", "AddWarning", "AddError", "ExecuteError", "env",
+    "mp.ArcGISProject",
+]
+
+_active = None
+_active_name = None
+_wrapper = None
+
+
+def use(backend):
+    """Activate a backend by name ("arcpy" / "memory") or module. Returns the module."""
+    global _active, _active_name
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+        _active, _active_name = importlib.import_module(BACKENDS[backend]), backend
+    else:
+        _active, _active_name = backend, getattr(backend, "__name__", str(backend))
+    return _active
+
+
+def active():
+    """The active backend module; arcpy on first use if installed, else None."""
+    if _active is None:
+        try:
+            use("arcpy")
+        except ImportError:
+            return None
+    return _active
+
+
+def active_name():
+    return _active_name if active() is not None else None
+
+
+def missing(backend) -> list:
+    """PROTOCOL entries a backend module does not provide."""
+    out = []
+    for entry in PROTOCOL:
+        obj = backend
+        for part in entry.split("."):
+            obj = getattr(obj, part, None)
+            if obj is None:
+                out.append(entry)
+                break
+    return out
+
+
+def set_wrapper(wrapper):
+    """Pass every proxy attribute through wrapper(name, value) (None removes it)."""
+    global _wrapper
+    _wrapper = wrapper
+
+
+class _BackendProxy:
+    """Module-like stand-in for arcpy that forwards to the active backend."""
+
+    def __getattr__(self, name):
+        backend = active()
+        if backend is None:
+            raise RuntimeError("No data backend: arcpy is not installed. Call backends.use('memory') first.")
+        value = getattr(backend, name)
+        return value if _wrapper is None else _wrapper(name, value)
+
+    def __repr__(self):
+        return f"<backend proxy: {active_name()}>"
+
+
+arcpy = _BackendProxy()
@@ -0,0 +1,701 @@
+import datetime
+import math
+import os
+import re
+from types import SimpleNamespace
+
+import numpy as np
+
+"""
+In-memory arcpy stand-in (backend "memory")
+
+Implements the part of arcpy listed in backends.PROTOCOL on plain Python / NumPy data so
+the v3 task functions run, unchanged, without ArcGIS Pro:
+
+    import backends
+    arcpy = backends.use("memory")
+    sr = arcpy.SpatialReference(3005)
+    arcpy.management.CreateFeatureclass("memory", "lines", "POLYLINE", spatial_reference=sr)
+    arcpy.management.AddField("memory/lines", "Status", "TEXT", field_length=50)
+
+Feature classes live in a process-wide workspace keyed by path (any path works; the
+"memory" workspace mirrors arcpy's). Tables are stored column-wise; cursors behave like
+arcpy.da cursors (tuples from SearchCursor, lists from UpdateCursor, "OID@", "SHAPE@",
+"SHAPE@XY", "SHAPE@X", "SHAPE@Y", "SHAPE@LENGTH" tokens, spatial_reference= projection).
+Text writes longer than the field length raise RuntimeError, as in a file GDB.
+
+Geometry covers points and polylines. projectAs() handles identical spatial references
+and WGS84 / NAD83 geographic -> BC Albers (EPSG:3005, via albers.py). Topology operators
+(intersect, touches, ...) are not implemented.
+
+Messages go to `messages` (and stdout when `echo` is True).
+"""
+
+echo = False
+messages = []
+
+_TABLES = {}
+
+
+def reset():
+    """Drop every in-memory table and message."""
+    _TABLES.clear()
+    del messages[:]
+
+
+#############################################################################################
+# MESSAGES / ENVIRONMENT
+#############################################################################################
+
+class ExecuteError(Exception):
+    pass
+
+
+def _log(severity, msg):
+    messages.append((severity, str(msg)))
+    if echo:
+        print(f"{severity}: {msg}" if severity != "message" else msg)
+
+
+def AddMessage(msg):
+    _log("message", msg)
+
+
+def AddWarning(msg):
+    _log("warning", msg)
+
+
+def AddError(msg):
+    _log("error", msg)
+
+
+def GetArgumentCount():
+    return 0
+
+
+env = SimpleNamespace(workspace=None, overwriteOutput=False)
+
+
+class _Project:
+    def __init__(self, aprx_path="CURRENT"):
+        self.filePath = aprx_path
+        self.defaultGeodatabase = "memory"
+        self.activeMap = None
+
+
+mp = SimpleNamespace(ArcGISProject=_Project)
+
+
+#############################################################################################
+# SPATIAL REFERENCE + GEOMETRY
+#############################################################################################
+
+_KNOWN_SR = {
+    3005: ("NAD_1983_BC_Environment_Albers", "Projected"),
+    4326: ("GCS_WGS_1984", "Geographic"),
+    4269: ("GCS_North_American_1983", "Geographic"),
+}
+
+
+class SpatialReference:
+    def __init__(self, item=None):
+        self.factoryCode = 0
+        self.name = "Unknown"
+        self.type = "Unknown"
+        if isinstance(item, int) or (isinstance(item, str) and item.isdigit()):
+            self.factoryCode = int(item)
+            self.name, self.type = _KNOWN_SR.get(self.factoryCode, (f"EPSG_{item}", "Projected"))
+        elif isinstance(item, str):
+            self.name = item
+            for code, (name, kind) in _KNOWN_SR.items():
+                if name == item:
+                    self.factoryCode, self.type = code, kind
+        self.XYTolerance = 8.983152841195215e-09 if self.type == "Geographic" else 0.001
+
+    def __eq__(self, other):
+        return isinstance(other, SpatialReference) and (self.factoryCode, self.name) == (other.factoryCode, other.name)
+
+    def __hash__(self):
+        return hash((self.factoryCode, self.name))
+
+    def exportToString(self):
+        return self.name
+
+
+def _transform(from_sr, to_sr):
+    """(xs, ys) -> (xs, ys) function between two spatial references, None if identical."""
+    if to_sr is None or from_sr is None or from_sr == to_sr:
+        return None
+    if from_sr.factoryCode in (4326, 4269) and to_sr.factoryCode == 3005:
+        import albers
+        return albers.forward
+    raise ValueError(f"memory backend cannot project {from_sr.name} -> {to_sr.name}")
+
+
+class Point:
+    __slots__ = ("X", "Y", "Z", "M", "ID")
+
+    def __init__(self, X=None, Y=None, Z=None, M=None, ID=None):
+        self.X, self.Y, self.Z, self.M, self.ID = X, Y, Z, M, ID
+
+    def __repr__(self):
+        return f"Point({self.X}, {self.Y})"
+
+
+class Array(list):
+    def add(self, item):
+        self.append(item)
+
+    def getObject(self, i):
+        return self[i]
+
+
+class Extent:
+    __slots__ = ("XMin", "YMin", "XMax", "YMax")
+
+    def __init__(self, XMin=None, YMin=None, XMax=None, YMax=None):
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+
+
+def _coords(item):
+    """Array / list of Points or (x, y) pairs -> list of (x, y)."""
+    return [(p.X, p.Y) if isinstance(p, Point) else (p[0], p[1]) for p in item if p is not None]
+
+
+class PointGeometry:
+    type = "point"
+
+    def __init__(self, inputs, spatial_reference=None):
+        self._xy = (inputs.X, inputs.Y) if isinstance(inputs, Point) else (inputs[0], inputs[1])
+        self.spatialReference = spatial_reference
+
+    @property
+    def firstPoint(self):
+        return Point(*self._xy)
+
+    lastPoint = centroid = firstPoint
+
+    @property
+    def extent(self):
+        x, y = self._xy
+        return Extent(x, y, x, y)
+
+    @property
+    def pointCount(self):
+        return 1
+
+    def projectAs(self, spatial_reference, transformation_name=None):
+        fn = _transform(self.spatialReference, spatial_reference)
+        if fn is None:
+            return self
+        x, y = fn(np.array([self._xy[0]]), np.array([self._xy[1]]))
+        return PointGeometry((float(x[0]), float(y[0])), spatial_reference)
+
+
+class Polyline:
+    """Polyline kept as a list of parts, each a list of (x, y) tuples."""
+
+    type = "polyline"
+
+    def __init__(self, inputs, spatial_reference=None, has_z=False, has_m=False):
+        if inputs and isinstance(inputs[0], (Array, list, tuple)) and not _is_xy(inputs[0]):
+            self._parts = [_coords(part) for part in inputs]
+        else:
+            self._parts = [_coords(inputs)]
+        self.spatialReference = spatial_reference
+
+    @classmethod
+    def from_coords(cls, parts, spatial_reference=None):
+        """Fast constructor from [[(x, y), ...], ...] (no Point objects)."""
+        g = cls.__new__(cls)
+        g._parts = parts
+        g.spatialReference = spatial_reference
+        return g
+
+    def __iter__(self):
+        for part in self._parts:
+            yield Array(Point(x, y) for x, y in part)
+
+    def getPart(self, index=None):
+        if index is None:
+            return Array(self)
+        return Array(Point(x, y) for x, y in self._parts[index])
+
+    @property
+    def partCount(self):
+        return len(self._parts)
+
+    @property
+    def pointCount(self):
+        return sum(len(p) for p in self._parts)
+
+    @property
+    def firstPoint(self):
+        return Point(*self._parts[0][0])
+
+    @property
+    def lastPoint(self):
+        return Point(*self._parts[-1][-1])
+
+    @property
+    def extent(self):
+        xs = [x for part in self._parts for x, _y in part]
+        ys = [y for part in self._parts for _x, y in part]
+        return Extent(min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def length(self):
+        return sum(math.hypot(x2 - x1, y2 - y1)
+                   for part in self._parts for (x1, y1), (x2, y2) in zip(part, part[1:]))
+
+    def projectAs(self, spatial_reference, transformation_name=None):
+        fn = _transform(self.spatialReference, spatial_reference)
+        if fn is None:
+            return self
+        parts = []
+        for part in self._parts:
+            x, y = fn(np.array([p[0] for p in part]), np.array([p[1] for p in part]))
+            parts.append(list(zip(x.tolist(), y.tolist())))
+        return Polyline.from_coords(parts, spatial_reference)
+
+
+def _is_xy(item):
+    return isinstance(item, Point) or (isinstance(item, tuple) and len(item) == 2 and not isinstance(item[0], (list, tuple, Point)))
+
+
+#############################################################################################
+# TABLES
+#############################################################################################
+
+_FIELD_TYPES = {
+    "TEXT": "String", "LONG": "Integer", "SHORT": "SmallInteger", "BIGINTEGER": "BigInteger",
+    "DOUBLE": "Double", "FLOAT": "Single", "DATE": "Date", "GUID": "Guid",
+}
+
+_SHAPE_TYPES = {"POINT": "Point", "POLYLINE": "Polyline"}
+
+
+class Field:
+    def __init__(self, name, type, length=0, domain="", aliasName=None, isNullable=True, editable=True):
+        self.name = name
+        self.type = type
+        self.length = length
+        self.domain = domain
+        self.aliasName = aliasName or name
+        self.isNullable = isNullable
+        self.editable = editable
+        self.baseName = name
+
+
+def _key(path):
+    return os.path.normcase(os.path.normpath(str(path))).replace("\\", "/")
+
+
+class _Table:
+    def __init__(self, path, shape_type, spatial_reference):
+        self.path = path
+        self.name = os.path.basename(str(path).replace("\\", "/"))
+        self.shapeType = shape_type
+        self.spatialReference = spatial_reference
+        self.fields = [Field("OBJECTID", "OID", 4, isNullable=False, editable=False),
+                       Field("Shape", "Geometry", 0, isNullable=True)]
+        if shape_type == "Polyline":
+            self.fields.append(Field("Shape_Length", "Double", 8, editable=False))
+        self.columns = {"objectid": [], "shape": []}
+        self.next_oid = 1
+        self.selection = set()
+
+    def __len__(self):
+        return len(self.columns["objectid"])
+
+    def field(self, name):
+        lower = name.lower()
+        for f in self.fields:
+            if f.name.lower() == lower:
+                return f
+        return None
+
+    def add_field(self, field):
+        if self.field(field.name) is not None:
+            raise ExecuteError(f"ERROR 000012: {field.name} already exists")
+        self.fields.append(field)
+        self.columns[field.name.lower()] = [None] * len(self)
+
+    # -----------------------------
+    # Column access for cursors
+    # -----------------------------
+    def read_column(self, name, spatial_reference=None):
+        """Values of one field / token in row order (a new list for tokens, shared otherwise)."""
+        token = name.upper()
+        if token == "OID@":
+            return self.columns["objectid"]
+        if token.startswith("SHAPE@") or name.lower() == "shape":
+            shapes = self.columns["shape"]
+            if spatial_reference is not None and _transform(self.spatialReference, spatial_reference) is not None:
+                shapes = [None if g is None else g.projectAs(spatial_reference) for g in shapes]
+            if token in ("SHAPE@", "SHAPE"):
+                return shapes
+            if token == "SHAPE@XY":
+                return [None if g is None else (g.firstPoint.X, g.firstPoint.Y) for g in shapes]
+            if token == "SHAPE@X":
+                return [None if g is None else g.firstPoint.X for g in shapes]
+            if token == "SHAPE@Y":
+                return [None if g is None else g.firstPoint.Y for g in shapes]
+            if token == "SHAPE@LENGTH":
+                return [None if g is None else getattr(g, "length", 0.0) for g in shapes]
+            raise RuntimeError(f"Token {name} is not supported by the memory backend")
+        if name.lower() == "shape_length" and self.shapeType == "Polyline":
+            return [None if g is None else g.length for g in self.columns["shape"]]
+        field = self.field(name)
+        if field is None:
+            raise RuntimeError(f"Cannot find field '{name}' in {self.path}")
+        return self.columns[field.name.lower()]
+
+    def writer(self, name):
+        """(column list, coerce function) for a writable field / token, or None (read-only)."""
+        token = name.upper()
+        if token in ("SHAPE@", "SHAPE") or name.lower() == "shape":
+            return self.columns["shape"], self._coerce_shape
+        if token == "SHAPE@XY":
+            return self.columns["shape"], lambda v: None if v is None else PointGeometry(v, self.spatialReference)
+        field = self.field(name)
+        if field is None or not field.editable or field.type in ("OID", "Geometry"):
+            return None
+        return self.columns[field.name.lower()], _coercer(field, self.path)
+
+    def _coerce_shape(self, geom):
+        if geom is None:
+            return None
+        if geom.spatialReference is not None and self.spatialReference is not None:
+            return geom.projectAs(self.spatialReference)
+        return geom
+
+    def append_row(self):
+        oid = self.next_oid
+        self.next_oid += 1
+        for name, col in self.columns.items():
+            col.append(oid if name == "objectid" else None)
+        return oid
+
+    def delete_rows(self, positions):
+        keep = sorted(set(range(len(self))) - set(positions))
+        for name, col in self.columns.items():
+            self.columns[name] = [col[i] for i in keep]
+
+
+def _coercer(field, path):
+    ftype = field.type
+    if ftype == "String":
+        max_len = field.length
+
+        def coerce(v):
+            if v is None:
+                return None
+            v = v if isinstance(v, str) else str(v)
+            if max_len and len(v) > max_len:
+                raise RuntimeError(f"The value type is incompatible with the field type. [{field.name}] ({path})")
+            return v
+        return coerce
+    if ftype in ("Integer", "SmallInteger", "BigInteger"):
+        return lambda v: None if v is None or v == "" else int(v)
+    if ftype in ("Double", "Single"):
+        return lambda v: None if v is None or v == "" else float(v)
+    if ftype == "Date":
+        def coerce(v):
+            if isinstance(v, datetime.date) and not isinstance(v, datetime.datetime):
+                return datetime.datetime(v.year, v.month, v.day)
+            if isinstance(v, str):
+                return datetime.datetime.fromisoformat(v)
+            return v
+        return coerce
+    return lambda v: v
+
+
+def _table(path) -> _Table:
+    t = _TABLES.get(_key(getattr(path, "dataSource", path)))
+    if t is None:
+        raise RuntimeError(f"ERROR 000732: Dataset {path} does not exist or is not supported")
+    return t
+
+
+def table_of(path) -> _Table:
+    """The in-memory table behind a path (for tests / benchmarks that inspect results)."""
+    return _table(path)
+
+
+def select(path, oids):
+    """Set a table's selection (what Describe(...).FIDSet reports and cursors honour)."""
+    _table(path).selection = set(oids)
+
+
+def clear_selection(path):
+    _table(path).selection = set()
+
+
+#############################################################################################
+# DESCRIBE / SCHEMA
+#############################################################################################
+
+def Exists(path):
+    return _key(getattr(path, "dataSource", path)) in _TABLES
+
+
+def ValidateTableName(name, workspace=None):
+    name = re.sub(r"[^0-9A-Za-z_]", "_", str(name))
+    return f"T{name}" if name[:1].isdigit() else name
+
+
+def ListFields(dataset, wild_card=None, field_type=None):
+    fields = list(_table(dataset).fields)
+    if wild_card:
+        pattern = re.compile("^" + re.escape(wild_card).replace(r"\*", ".*") + "$", re.IGNORECASE)
+        fields = [f for f in fields if pattern.match(f.name)]
+    if field_type and field_type != "All":
+        fields = [f for f in fields if f.type == field_type]
+    return fields
+
+
+def Describe(dataset):
+    t = _table(dataset)
+    return SimpleNamespace(
+        name=t.name,
+        catalogPath=t.path,
+        path=os.path.dirname(str(t.path)),
+        dataType="FeatureClass",
+        shapeType=t.shapeType,
+        spatialReference=t.spatialReference,
+        OIDFieldName="OBJECTID",
+        shapeFieldName="Shape",
+        hasOID=True,
+        fields=list(t.fields),
+        FIDSet="; ".join(str(o) for o in sorted(t.selection)),
+        extent=_table_extent(t),
+    )
+
+
+def _table_extent(t):
+    boxes = [g.extent for g in t.columns["shape"] if g is not None]
+    if not boxes:
+        return Extent()
+    return Extent(min(b.XMin for b in boxes), min(b.YMin for b in boxes),
+                  max(b.XMax for b in boxes), max(b.YMax for b in boxes))
+
+
+def _create_feature_class(out_path, out_name, geometry_type="POLYGON", template=None, has_m="DISABLED",
+                          has_z="DISABLED", spatial_reference=None, *args, **kwargs):
+    shape_type = _SHAPE_TYPES.get(str(geometry_type).upper())
+    if shape_type is None:
+        raise ExecuteError(f"memory backend does not support geometry type {geometry_type}")
+    path = os.path.join(str(out_path), out_name)
+    key = _key(path)
+    if key in _TABLES and not env.overwriteOutput:
+        raise ExecuteError(f"ERROR 000258: Output {path} already exists")
+    if isinstance(spatial_reference, (int, str)):
+        spatial_reference = SpatialReference(spatial_reference)
+    t = _Table(path, shape_type, spatial_reference)
+    if template is not None:
+        for f in _table(template).fields:
+            if t.field(f.name) is None and f.type not in ("OID", "Geometry"):
+                t.add_field(Field(f.name, f.type, f.length, f.domain))
+    _TABLES[key] = t
+    return [path]
+
+
+def _add_field(in_table, field_name, field_type, field_precision=None, field_scale=None, field_length=None,
+               field_alias=None, field_is_nullable="NULLABLE", field_is_required="NON_REQUIRED",
+               field_domain=None):
+    ftype = _FIELD_TYPES.get(str(field_type).upper())
+    if ftype is None:
+        raise ExecuteError(f"memory backend does not support field type {field_type}")
+    length = field_length or (255 if ftype == "String" else 4 if ftype in ("Integer", "Single") else 8)
+    _table(in_table).add_field(Field(field_name, ftype, length, field_domain or "", field_alias,
+                                     field_is_nullable != "NON_NULLABLE"))
+    return [in_table]
+
+
+def _delete(in_data, data_type=None):
+    for path in in_data if isinstance(in_data, (list, tuple)) else [in_data]:
+        _TABLES.pop(_key(path), None)
+    return [in_data]
+
+
+def _get_count(in_rows):
+    t = _table(in_rows)
+    return [str(len(t.selection) if t.selection else len(t))]
+
+
+management = SimpleNamespace(
+    CreateFeatureclass=_create_feature_class,
+    AddField=_add_field,
+    Delete=_delete,
+    GetCount=_get_count,
+)
+
+
+#############################################################################################
+# CURSORS (arcpy.da)
+#############################################################################################
+
+def _rows_in_scope(t):
+    """Row positions a cursor visits: the selection if there is one, else every row."""
+    if not t.selection:
+        return None
+    return [i for i, oid in enumerate(t.columns["objectid"]) if oid in t.selection]
+
+
+class _Cursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+class SearchCursor(_Cursor):
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None, *args, **kwargs):
+        if where_clause:
+            raise NotImplementedError("memory backend cursors do not support where clauses")
+        self._table = _table(in_table)
+        self.fields = tuple([field_names] if isinstance(field_names, str) else field_names)
+        self._sr = spatial_reference
+
+    def __iter__(self):
+        t = self._table
+        n = len(t)
+        cols = [t.read_column(f, self._sr) for f in self.fields]
+        scope = _rows_in_scope(t)
+        if scope is None:
+            return zip(*(c[:n] for c in cols))
+        return (tuple(c[i] for c in cols) for i in scope)
+
+
+class UpdateCursor(_Cursor):
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None, *args, **kwargs):
+        if where_clause:
+            raise NotImplementedError("memory backend cursors do not support where clauses")
+        self._table = _table(in_table)
+        self.fields = tuple([field_names] if isinstance(field_names, str) else field_names)
+        self._sr = spatial_reference
+        self._writers = [self._table.writer(f) for f in self.fields]
+        self._pos = None
+        self._deleted = []
+
+    def __iter__(self):
+        t = self._table
+        cols = [t.read_column(f, self._sr) for f in self.fields]
+        scope = _rows_in_scope(t)
+        for i in range(len(t)) if scope is None else scope:
+            self._pos = i
+            yield [c[i] for c in cols]
+        self._pos = None
+
+    def updateRow(self, row):
+        i = self._pos
+        if i is None:
+            raise RuntimeError("updateRow() called outside of cursor iteration")
+        for value, w in zip(row, self._writers):
+            if w is not None:
+                col, coerce = w
+                col[i] = coerce(value)
+
+    def deleteRow(self):
+        self._deleted.append(self._pos)
+
+    def close(self):
+        if self._deleted:
+            self._table.delete_rows(self._deleted)
+            self._deleted = []
+
+
+class InsertCursor(_Cursor):
+    def __init__(self, in_table, field_names, *args, **kwargs):
+        self._table = _table(in_table)
+        self.fields = tuple([field_names] if isinstance(field_names, str) else field_names)
+        self._writers = [self._table.writer(f) for f in self.fields]
+
+    def insertRow(self, row):
+        t = self._table
+        oid = t.append_row()
+        for value, w in zip(row, self._writers):
+            if w is not None:
+                col, coerce = w
+                col[-1] = coerce(value)
+        return oid
+
+
+class Editor:
+    """Edit session: a no-op in memory (edits are applied immediately)."""
+
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.isEditing = False
+
+    def startEditing(self, with_undo=True, multiuser_mode=True):
+        self.isEditing = True
+
+    def stopEditing(self, save_changes=True):
+        self.isEditing = False
+
+    def startOperation(self):
+        pass
+
+    def stopOperation(self):
+        pass
+
+    def abortOperation(self):
+        pass
+
+    def __enter__(self):
+        self.startEditing()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopEditing(exc[0] is None)
+        return False
+
+
+def _numpy_dtype(t, name):
+    token = name.upper()
+    if token == "OID@":
+        return "<i4"
+    if token in ("SHAPE@X", "SHAPE@Y", "SHAPE@LENGTH"):
+        return "<f8"
+    if token == "SHAPE@XY":
+        return ("<f8", 2)
+    f = t.field(name)
+    if f is None:
+        raise RuntimeError(f"Cannot find field '{name}' in {t.path}")
+    return {
+        "SmallInteger": "<i2", "Integer": "<i4", "BigInteger": "<i8", "Single": "<f4",
+        "Double": "<f8", "Date": "<M8[us]", "OID": "<i4",
+    }.get(f.type, f"<U{f.length or 255}" if f.type == "String" else "O")
+
+
+def FeatureClassToNumPyArray(in_table, field_names, where_clause=None, spatial_reference=None,
+                             explode_to_points=False, skip_nulls=False, null_value=None):
+    t = _table(in_table)
+    fields = [field_names] if isinstance(field_names, str) else list(field_names)
+    dtype = [(f, _numpy_dtype(t, f)) for f in fields]
+    with SearchCursor(in_table, fields, where_clause, spatial_reference) as cur:
+        rows = list(cur)
+    if skip_nulls:
+        rows = [r for r in rows if all(v is not None for v in r)]
+    elif null_value is not None:
+        rows = [tuple(null_value if v is None else v for v in r) for r in rows]
+    return np.array(rows, dtype=dtype)
+
+
+da = SimpleNamespace(
+    SearchCursor=SearchCursor,
+    UpdateCursor=UpdateCursor,
+    InsertCursor=InsertCursor,
+    Editor=Editor,
+    FeatureClassToNumPyArray=FeatureClassToNumPyArray,
+)
@@ -0,0 +1,343 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+
+import backends
+from backends import arcpy
+import domain_cache
+import instrument
+import schema_cache
+import task01_data_setup as task01
+import task02_lines
+import task03_points
+import task07_reports
+
+"""
+Batch runner: the rehab pipeline for many fires, headless
+
+The script tools work on one fire inside an open ArcGIS Pro session. During the season
+this runs every fire of a manifest from a plain Python prompt (no CURRENT project):
+
+    backup   1.1 backup_gdb
+    import   1.3 reproject_shapefiles_batch(out_gdb=...) into Data\\{fire_number}_Batch_Import.gdb
+    points   3.1 - 3.3 for every projected point layer, then 3.4
+    lines    2.1 - 2.3 for every projected line layer, then 2.4 (2.5 with --single-pass)
+    reports  7 generate_reports into <fire>\\Outputs\\Reports
+
+Paths come from task01's _get_fire_context / _get_rehab_gdb_paths; the targets are the
+wildfireBC_Rehab point / line feature classes of {fire_number}_Rehab.gdb (as in 1.2).
+
+The manifest is a CSV with a header row:
+
+    year,fire_number,incoming_folder,fire_name,status
+    2024,C30788,\\\\server\\...\\C30788\\Data\\Incoming\\2024-08-02,Antoine Creek,Active
+
+Fires are independent, so they run in a process pool (--workers). Each fire writes its
+own log (<log folder>\\{fire_number}.log: messages, warnings, errors, step timings) and
+stops at its first failing step (a failed backup never reaches the GDB edits). A summary
+table and batch_summary.json are written at the end; the exit code is 1 if any fire failed.
+
+    python batch_runner.py fires.csv --workers 4 --builtin-albers
+"""
+
+STEPS = ("backup", "import", "points", "lines", "reports")
+
+_COLUMNS = {
+    "year": ("year", "fire_year"),
+    "fire_number": ("fire_number", "firenumber"),
+    "incoming_folder": ("incoming_folder", "incoming", "collected_data_folder"),
+    "fire_name": ("fire_name", "firename"),
+    "status": ("status",),
+}
+
+
+#############################################################################################
+# MANIFEST
+#############################################################################################
+def read_manifest(path):
+    """[{year, fire_number, incoming_folder, fire_name, status}] from a CSV manifest."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        header = {(h or "").strip().lower(): h for h in reader.fieldnames or []}
+        columns = {}
+        for key, names in _COLUMNS.items():
+            found = next((header[n] for n in names if n in header), None)
+            if found is None:
+                raise ValueError(f"Manifest {path} has no '{key}' column (header: {', '.join(header)})")
+            columns[key] = found
+
+        fires = []
+        for line_no, row in enumerate(reader, start=2):
+            fire = {key: (row.get(col) or "").strip() for key, col in columns.items()}
+            if not any(fire.values()) or fire["year"].startswith("#"):
+                continue
+            missing = [key for key in ("year", "fire_number") if not fire[key]]
+            if missing:
+                raise ValueError(f"Manifest line {line_no}: missing {', '.join(missing)}")
+            fire["fire_number"] = fire["fire_number"].upper()
+            fires.append(fire)
+
+    seen = set()
+    for fire in fires:
+        # two workers editing the same GDB would corrupt it
+        if fire["fire_number"] in seen:
+            raise ValueError(f"Manifest lists {fire['fire_number']} more than once")
+        seen.add(fire["fire_number"])
+    return fires
+
+
+#############################################################################################
+# PER-FIRE LOG
+#############################################################################################
+class _FireLog:
+    """The active backend, with AddMessage / AddWarning / AddError written to the fire's log."""
+
+    def __init__(self, backend, log_file):
+        self._backend = backend
+        self._log = log_file
+        self.errors = []
+
+    def _write(self, level, msg):
+        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self._log.write(f"{stamp} {level:<7} {msg}\n")
+        self._log.flush()
+
+    def AddMessage(self, msg):
+        self._write("INFO", msg)
+
+    def AddWarning(self, msg):
+        self._write("WARNING", msg)
+
+    def AddError(self, msg):
+        self.errors.append(str(msg))
+        self._write("ERROR", msg)
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+
+#############################################################################################
+# ONE FIRE
+#############################################################################################
+def _fire_paths(fire):
+    """(rehab GDB, import GDB, reports folder) of a manifest row."""
+    fire_code, _, fire_district = task01._get_fire_context(fire["year"], fire["fire_number"], "Batch")
+    _, _, gdb_path = task01._get_rehab_gdb_paths(fire["year"], fire["fire_number"], fire_district, fire_code)
+    import_gdb = os.path.join(os.path.dirname(gdb_path), f"{fire['fire_number']}_Batch_Import.gdb")
+    reports_folder = instrument.reports_folder_for(gdb_path) or os.path.dirname(gdb_path)
+    return gdb_path, import_gdb, reports_folder
+
+
+def _by_shape_type(fcs):
+    """{shape type: [fc, ...]} of the projected layers."""
+    out = {}
+    for fc in fcs:
+        out.setdefault(schema_cache.shape_type(fc), []).append(fc)
+    return out
+
+
+def _run_steps(fire, options, log, result):
+    result["failed_step"] = "setup"
+    gdb_path, import_gdb, reports_folder = _fire_paths(fire)
+    fire_number, fire_name, status = fire["fire_number"], fire["fire_name"], fire["status"]
+    result["reports_folder"] = reports_folder
+
+    if not arcpy.Exists(gdb_path):
+        raise FileNotFoundError(f"Rehab GDB not found: {gdb_path}")
+    state = {}
+
+    def backup():
+        task01.backup_gdb(fire["year"], fire_number, incremental=options["incremental_backup"],
+                          use_store=options["backup_store"])
+
+    def targets():
+        if "points" not in state:
+            state["points"], state["lines"] = task01._rehab_feature_classes(gdb_path, "Batch")
+            if state["points"] is None:
+                raise FileNotFoundError(f"Rehab point / line feature classes not found in {gdb_path}")
+        return state["points"], state["lines"]
+
+    def import_():
+        if not fire["incoming_folder"] or not os.path.isdir(fire["incoming_folder"]):
+            raise FileNotFoundError(f"Incoming folder not found: {fire['incoming_folder'] or '(empty)'}")
+        if not arcpy.Exists(import_gdb):
+            arcpy.management.CreateFileGDB(os.path.dirname(import_gdb), os.path.basename(import_gdb))
+        projected = task01.reproject_shapefiles_batch(fire_number, fire["incoming_folder"],
+                                                      use_builtin_albers=options["builtin_albers"],
+                                                      out_gdb=import_gdb)
+        state["sources"] = _by_shape_type(projected)
+        for shape_type, fcs in sorted(state["sources"].items()):
+            if shape_type not in ("Point", "Polyline"):
+                arcpy.AddWarning(f"Batch {len(fcs)} {shape_type} layer(s) not copied: "
+                                 f"{', '.join(os.path.basename(fc) for fc in fcs)}")
+
+    def points():
+        tgt_points, _ = targets()
+        sources = state.get("sources", {}).get("Point", [])
+        arcpy.AddMessage(f"Batch {len(sources)} point layer(s) -> {os.path.basename(tgt_points)}")
+        for src in sources:
+            task03_points.copy_points(src, tgt_points)
+            task03_points.copy_attributes_based_on_location_points(src, tgt_points)
+            task03_points.copy_domain_values_based_on_location_points(src, tgt_points)
+        task03_points.update_basic_fields_points(tgt_points, fire_number, fire_name, status)
+
+    def lines():
+        _, tgt_lines = targets()
+        sources = state.get("sources", {}).get("Polyline", [])
+        arcpy.AddMessage(f"Batch {len(sources)} line layer(s) -> {os.path.basename(tgt_lines)}")
+        if options["single_pass"] and sources:
+            for src in sources:
+                task02_lines.run_lines_pipeline(src, tgt_lines, fire_number, fire_name, status)
+            return
+        for src in sources:
+            task02_lines.copy_lines(src, tgt_lines)
+            task02_lines.copy_attributes_based_on_location_lines(src, tgt_lines)
+            task02_lines.copy_domain_values_based_on_location_lines(src, tgt_lines)
+        task02_lines.update_basic_fields_lines(tgt_lines, fire_number, fire_name, status)
+
+    def reports():
+        tgt_points, tgt_lines = targets()
+        task07_reports.ensure_folder(reports_folder)
+        task07_reports.generate_reports(tgt_points, tgt_lines, reports_folder, fire_number)
+
+    run = {"backup": backup, "import": import_, "points": points, "lines": lines, "reports": reports}
+    for name in STEPS:
+        if name in options["skip"]:
+            log.AddMessage(f"Batch step '{name}' skipped.")
+            continue
+        result["failed_step"] = name
+        errors_before = len(log.errors)
+        t0 = time.perf_counter()
+        run[name]()
+        result["steps"][name] = round(time.perf_counter() - t0, 2)
+        if len(log.errors) > errors_before:
+            # steps report some problems with AddError + return instead of raising
+            raise RuntimeError(log.errors[-1])
+        log.AddMessage(f"Batch step '{name}' done in {result['steps'][name]:.2f}s.")
+    result["failed_step"] = None
+
+
+def run_fire(fire, options):
+    """Run the pipeline for one manifest row (in a pool worker). Returns its result dict."""
+    result = {"fire_number": fire["fire_number"], "year": fire["year"], "fire_name": fire["fire_name"],
+              "ok": False, "failed_step": None, "error": None, "steps": {}, "seconds": None,
+              "log": os.path.join(options["log_folder"], f"{fire['fire_number']}.log")}
+    previous = backends.active()
+    if previous is None:
+        result["error"] = "arcpy is not installed"
+        return result
+
+    t0 = time.perf_counter()
+    with open(result["log"], "w", encoding="utf-8") as f, redirect_stdout(f), redirect_stderr(f):
+        log = _FireLog(previous, f)
+        backends.use(log)
+        schema_cache.invalidate()
+        domain_cache.invalidate()
+        instrument.start_run(f"batch {fire['fire_number']}")
+        log.AddMessage(f"Batch {fire['fire_number']} {fire['fire_name']} ({fire['year']}), status '{fire['status']}'")
+        try:
+            previous.env.overwriteOutput = True
+            _run_steps(fire, options, log, result)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            log.AddError(f"Batch step '{result['failed_step']}' failed: {result['error']}")
+            f.write(traceback.format_exc())
+        finally:
+            result["seconds"] = round(time.perf_counter() - t0, 2)
+            instrument.finish_run(result.get("reports_folder"))
+            backends.use(previous)
+    return result
+
+
+#############################################################################################
+# BATCH
+#############################################################################################
+def summary_table(results):
+    """Text lines: one row per fire, failures last."""
+    lines = [f"{'Fire':<10} {'Year':<6} {'Result':<8} {'Time':>9}  {'Failed step':<12} Error"]
+    for r in sorted(results, key=lambda r: (not r["ok"], r["fire_number"])):
+        seconds = f"{r['seconds']:8.1f}s" if r["seconds"] is not None else f"{'-':>9}"
+        lines.append(f"{r['fire_number']:<10} {r['year']:<6} {'ok' if r['ok'] else 'FAILED':<8} {seconds}  "
+                     f"{r['failed_step'] or '':<12} {r['error'] or ''}")
+    failed = sum(1 for r in results if not r["ok"])
+    lines.append(f"{len(results) - failed} of {len(results)} fire(s) completed, {failed} failed.")
+    return lines
+
+
+def run_batch(fires, log_folder, workers=2, skip=(), builtin_albers=False, single_pass=False,
+              incremental_backup=False, backup_store=False):
+    """Run every fire (workers > 1: process pool). Returns the result dicts in manifest order."""
+    unknown = set(skip) - set(STEPS)
+    if unknown:
+        raise ValueError(f"Unknown step(s) to skip: {', '.join(sorted(unknown))}. Choose from: {', '.join(STEPS)}")
+    os.makedirs(log_folder, exist_ok=True)
+    options = {"log_folder": log_folder, "skip": tuple(skip), "builtin_albers": builtin_albers,
+               "single_pass": single_pass, "incremental_backup": incremental_backup, "backup_store": backup_store}
+
+    results = {}
+    if workers <= 1:
+        for fire in fires:
+            results[fire["fire_number"]] = _report(run_fire(fire, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_fire, fire, options): fire for fire in fires}
+            for fut in as_completed(futures):
+                fire = futures[fut]
+                try:
+                    r = fut.result()
+                except Exception as e:   # worker crashed (BrokenProcessPool, pickling, ...)
+                    r = {"fire_number": fire["fire_number"], "year": fire["year"], "fire_name": fire["fire_name"],
+                         "ok": False, "failed_step": None, "error": f"{type(e).__name__}: {e}", "steps": {},
+                         "seconds": None, "log": os.path.join(log_folder, f"{fire['fire_number']}.log")}
+                results[fire["fire_number"]] = _report(r)
+    return [results[fire["fire_number"]] for fire in fires]
+
+
+def _report(r):
+    where = f" at '{r['failed_step']}'" if r["failed_step"] else ""
+    state = "ok" if r["ok"] else f"FAILED{where}: {r['error']}"
+    print(f"{r['fire_number']}: {state} (log: {r['log']})", flush=True)
+    return r
+
+
+def write_summary(results, log_folder):
+    """batch_summary.json in the log folder. Returns the path."""
+    path = os.path.join(log_folder, "batch_summary.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"finished": datetime.datetime.now().isoformat(timespec="seconds"), "fires": results}, f, indent=1)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the rehab pipeline for every fire in a manifest.")
+    parser.add_argument("manifest", help="CSV: year, fire_number, incoming_folder, fire_name, status")
+    parser.add_argument("--workers", type=int, default=2, help="fires processed in parallel (1: no pool)")
+    parser.add_argument("--log-folder", default=None,
+                        help="per-fire logs + batch_summary.json (default: batch_logs\\<timestamp> next to the manifest)")
+    parser.add_argument("--skip", default="", help=f"comma-separated steps to skip: {', '.join(STEPS)}")
+    parser.add_argument("--builtin-albers", action="store_true", help="project with albers.py instead of BatchProject")
+    parser.add_argument("--single-pass", action="store_true", help="lines through 2.5 instead of 2.1 - 2.4")
+    parser.add_argument("--incremental-backup", action="store_true", help="delta snapshot instead of a full copy")
+    parser.add_argument("--backup-store", action="store_true", help="snapshot into the compressed backup store")
+    args = parser.parse_args()
+
+    manifest_fires = read_manifest(args.manifest)
+    folder = args.log_folder or os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "batch_logs",
+                                             datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    batch = run_batch(manifest_fires, folder, workers=args.workers,
+                      skip=[s.strip() for s in args.skip.split(",") if s.strip()],
+                      builtin_albers=args.builtin_albers, single_pass=args.single_pass,
+                      incremental_backup=args.incremental_backup, backup_store=args.backup_store)
+    print()
+    for line in summary_table(batch):
+        print(line)
+    print(f"\nSummary: {write_summary(batch, folder)}")
+    sys.exit(0 if all(r["ok"] for r in batch) else 1)
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the v3 tools.
+
+Run from the Wildfire_Rehab_Tool_v3 folder, e.g.:
+    python -m benchmarks.bench_albers
+"""
@@ -0,0 +1,71 @@
+import argparse
+import time
+
+import numpy as np
+
+import albers
+import backends
+
+"""
+Benchmark: built-in NumPy BC Albers transform vs the arcpy projection path
+
+- checks albers.forward/inverse against the control points (1 mm tolerance)
+- times forward/inverse over N random points inside BC
+- if arcpy is available, times PointGeometry.projectAs (the per-feature arcpy path) on
+  a sample and reports the largest difference between the two
+"""
+
+
+def _random_bc_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-139.0, -114.0, n), rng.uniform(48.3, 60.0, n)
+
+
+def _timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t
+
+
+def run(n=1_000_000, arcpy_sample=20_000):
+    err = albers.check_control_points(tolerance=0.001)
+    print(f"Control points: worst error {err * 1000:.6f} mm (tolerance 1 mm)")
+
+    lon, lat = _random_bc_points(n)
+    (x, y), t_fwd = _timed(albers.forward, lon, lat)
+    (lon2, lat2), t_inv = _timed(albers.inverse, x, y)
+    print(f"NumPy forward: {n:,} pts in {t_fwd:.3f}s ({n / t_fwd:,.0f} pts/s)")
+    print(f"NumPy inverse: {n:,} pts in {t_inv:.3f}s ({n / t_inv:,.0f} pts/s)")
+    print(f"Round trip max error: {max(np.abs(lon2 - lon).max(), np.abs(lat2 - lat).max()):.2e} deg")
+
+    if backends.active_name() != "arcpy":
+        print("arcpy not available - skipping arcpy comparison.")
+        return
+
+    arcpy = albers.arcpy
+    m = min(arcpy_sample, n)
+    sr_in = arcpy.SpatialReference(albers.WGS84_WKID)
+    sr_out = arcpy.SpatialReference(albers.BC_ALBERS_WKID)
+
+    def arcpy_path():
+        out = []
+        for a, b in zip(lon[:m].tolist(), lat[:m].tolist()):
+            p = arcpy.PointGeometry(arcpy.Point(a, b), sr_in).projectAs(sr_out).firstPoint
+            out.append((p.X, p.Y))
+        return out
+
+    pts, t_arc = _timed(arcpy_path)
+    ax = np.array([p[0] for p in pts])
+    ay = np.array([p[1] for p in pts])
+    diff = np.hypot(ax - x[:m], ay - y[:m]).max()
+    print(f"arcpy projectAs: {m:,} pts in {t_arc:.3f}s ({m / t_arc:,.0f} pts/s)")
+    print(f"NumPy speed-up vs arcpy: {(n / t_fwd) / (m / t_arc):,.0f}x")
+    print(f"Max NumPy vs arcpy difference: {diff * 1000:.3f} mm")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BC Albers NumPy vs arcpy benchmark")
+    parser.add_argument("-n", type=int, default=1_000_000, help="points for the NumPy transform")
+    parser.add_argument("--arcpy-sample", type=int, default=20_000, help="points for the arcpy path")
+    args = parser.parse_args()
+    run(args.n, args.arcpy_sample)
@@ -0,0 +1,89 @@
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import gdb_backup
+
+"""
+Benchmark: full GDB copy vs delta snapshots vs the compressed blob store
+
+Uses the sample geodatabases in Wildfire_Rehab_ProcessSuite/FireSeasonWork_Test (or any
+.gdb folders given with --gdb). For each GDB, on a scratch copy:
+- full copy (shutil.copytree, what Copy_management costs in bytes)
+- first and second store_backup (second one after "editing" one .gdbtable)
+- restore of the latest snapshot, checked file-by-file against the source
+Throughput is reported in MB/s of GDB size; "stored" is the bytes actually written.
+"""
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_SAMPLES = os.path.join(_HERE, "..", "..", "Wildfire_Rehab_ProcessSuite", "FireSeasonWork_Test", "*", "Data", "*.gdb")
+
+
+def _timed(fn, *args, **kwargs):
+    t = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t
+
+
+def _mb(n):
+    return n / 1048576.0
+
+
+def _touch_one_table(gdb):
+    """Append a byte to the largest .gdbtable, like an edit session rewriting one table."""
+    tables = sorted(glob.glob(os.path.join(gdb, "*.gdbtable")), key=os.path.getsize)
+    with open(tables[-1], "ab") as f:
+        f.write(b"\0")
+
+
+def _same_tree(a, b):
+    for name in os.listdir(a):
+        if gdb_backup.file_sha256(os.path.join(a, name)) != gdb_backup.file_sha256(os.path.join(b, name)):
+            return False
+    return sorted(os.listdir(a)) == sorted(os.listdir(b))
+
+
+def run(gdbs, codec=None, repeat=3):
+    codec = codec or gdb_backup.default_codec()
+    print(f"codec: {codec}")
+    for src in gdbs:
+        work = tempfile.mkdtemp(prefix="bench_backup_")
+        try:
+            gdb = os.path.join(work, "Fire_Rehab.gdb")
+            shutil.copytree(src, gdb)
+            size = sum(os.path.getsize(os.path.join(gdb, n)) for n in os.listdir(gdb))
+            print(f"\n{os.path.basename(src)}: {len(os.listdir(gdb))} files, {_mb(size):.1f} MB")
+
+            best_copy = min(_timed(shutil.copytree, gdb, os.path.join(work, f"copy{i}.gdb"))[1]
+                            for i in range(repeat))
+            print(f"  full copy      {best_copy:.3f}s  {_mb(size) / best_copy:8.1f} MB/s  written {_mb(size):.2f} MB")
+
+            store = os.path.join(work, "store")
+            r1, t1 = _timed(gdb_backup.store_backup, gdb, store, "FIRE", codec=codec)
+            print(f"  store #1       {t1:.3f}s  {_mb(size) / t1:8.1f} MB/s  written {_mb(r1['new_bytes']):.2f} MB "
+                  f"({100.0 * r1['new_bytes'] / size:.0f}% of GDB)")
+
+            _touch_one_table(gdb)
+            time.sleep(0.01)
+            r2, t2 = _timed(gdb_backup.store_backup, gdb, store, "FIRE", codec=codec)
+            print(f"  store #2 (1 table edited) {t2:.3f}s  written {_mb(r2['new_bytes']):.3f} MB, "
+                  f"{r2['new_blobs']} new blob(s)")
+
+            out = os.path.join(work, "restored.gdb")
+            _, tr = _timed(gdb_backup.restore, "FIRE", r2["snapshot_id"], store, out)
+            ok = _same_tree(gdb, out)
+            print(f"  restore        {tr:.3f}s  {_mb(size) / tr:8.1f} MB/s  identical: {ok}")
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GDB backup store benchmark")
+    parser.add_argument("--gdb", action="append", help="GDB folder(s) to use (default: FireSeasonWork_Test samples)")
+    parser.add_argument("--codec", choices=["zlib", "zstd"], default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="full-copy repetitions (best is reported)")
+    args = parser.parse_args()
+    run(args.gdb or sorted(glob.glob(_SAMPLES)), args.codec, args.repeat)
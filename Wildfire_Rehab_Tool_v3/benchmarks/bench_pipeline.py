@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import backends
+import schema_cache
+import task02_lines
+import task03_points
+import task05_detect_self_intersecting_lines as task05
+import task07_reports
+from benchmarks import synthetic_fire
+
+"""
+Benchmark suite: the rehab pipeline on synthetic fires, with a JSON history
+
+For each scale (GPS point count; lines = points / 2, one machine guard per 100 lines)
+a synthetic fire is generated (benchmarks/synthetic_fire.py) and every step is run
+through the in-memory backend:
+
+    2.1 - 2.4 lines (four steps), 2.5 lines pipeline, 3.1 - 3.4 points,
+    5 detect_line_intersections on the machine guards (checked: exactly
+      guards * crossings SELF points, no CROSS) and on all GPS lines,
+    7 generate_reports
+
+Each scale is timed --repeat times (best time per step is kept), then run once more
+under tracemalloc for the peak Python memory of every step (tracing slows the code down,
+so it never overlaps the timing). Results are appended to a JSON history file (by default
+WildfireRehab/bench_history.json in the user's cache folder, outside the source tree; see
+--history) and compared with the previous run of the same scales; steps slower than
+--threshold are flagged (steps under 50 ms are too noisy to flag).
+
+    python -m benchmarks.bench_pipeline --scales 1000,10000 --label "before grid change"
+"""
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# Outside the source tree, next to the domain cache (domain_cache.CACHE_DIR)
+DEFAULT_HISTORY = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+                               "WildfireRehab", "bench_history.json")
+
+
+def _steps(fire, out_folder):
+    """(step name, function) in pipeline order for one synthetic fire."""
+    fire_args = synthetic_fire.FIRE
+    lines_fused = synthetic_fire.rehab_lines_fc("bench_rehab_lines_fused")
+    return [
+        ("2.1 copy_lines", lambda: task02_lines.copy_lines(fire["src_lines"], fire["tgt_lines"])),
+        ("2.2 copy_attributes_lines",
+         lambda: task02_lines.copy_attributes_based_on_location_lines(fire["src_lines"], fire["tgt_lines"])),
+        ("2.3 copy_domain_values_lines",
+         lambda: task02_lines.copy_domain_values_based_on_location_lines(fire["src_lines"], fire["tgt_lines"])),
+        ("2.4 update_basic_fields_lines", lambda: task02_lines.update_basic_fields_lines(fire["tgt_lines"], *fire_args)),
+        ("2.5 run_lines_pipeline",
+         lambda: task02_lines.run_lines_pipeline(fire["src_lines"], lines_fused, *fire_args)),
+        ("3.1 copy_points", lambda: task03_points.copy_points(fire["src_points"], fire["tgt_points"])),
+        ("3.2 copy_attributes_points",
+         lambda: task03_points.copy_attributes_based_on_location_points(fire["src_points"], fire["tgt_points"])),
+        ("3.3 copy_domain_values_points",
+         lambda: task03_points.copy_domain_values_based_on_location_points(fire["src_points"], fire["tgt_points"])),
+        ("3.4 update_basic_fields_points",
+         lambda: task03_points.update_basic_fields_points(fire["tgt_points"], *fire_args)),
+        ("5 intersections (guards)",
+         lambda: _check_guards(task05.detect_line_intersections(fire["guards"], out_name="Guard_Crossings"),
+                               fire["expected_guard_self"])),
+        ("5 intersections (all lines)",
+         lambda: task05.detect_line_intersections(fire["src_lines"], out_name="Line_Crossings")),
+        ("7 generate_reports",
+         lambda: task07_reports.generate_reports(fire["tgt_points"], fire["tgt_lines"], out_folder,
+                                                 synthetic_fire.FIRE[0])),
+    ]
+
+
+def _check_guards(out_fc, expected_self):
+    kinds = backends.active().table_of(out_fc).columns["type"]
+    n_self, n_cross = kinds.count("SELF"), kinds.count("CROSS")
+    if n_self != expected_self or n_cross:
+        raise AssertionError(f"Machine guards: expected {expected_self} SELF / 0 CROSS, got {n_self} / {n_cross}")
+
+
+def _run_scale(n_points, crossings, seed, trace):
+    """{step: seconds} (trace=False) or {step: peak MB} (trace=True) for one scale."""
+    arcpy = backends.use("memory")
+    arcpy.reset()
+    n_lines = max(1, n_points // 2)
+    fire = synthetic_fire.make_fire(n_points, n_lines, n_guards=max(1, n_lines // 100), crossings=crossings,
+                                    seed=seed, prefix="bench")
+    out_folder = tempfile.mkdtemp(prefix="bench_reports_")
+    results = {}
+    try:
+        for name, fn in _steps(fire, out_folder):
+            schema_cache.invalidate()
+            if trace:
+                tracemalloc.start()
+                fn()
+                results[name] = tracemalloc.get_traced_memory()[1] / 1048576.0
+                tracemalloc.stop()
+            else:
+                t = time.perf_counter()
+                fn()
+                results[name] = time.perf_counter() - t
+    finally:
+        shutil.rmtree(out_folder, ignore_errors=True)
+    return results
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1048576.0 if sys.platform == "darwin" else rss / 1024.0
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_HERE, capture_output=True, text=True,
+                             timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _previous(history, scales):
+    for run in reversed(history):
+        if sorted(run["scales"]) == sorted(scales):
+            return run
+    return None
+
+
+def compare(run, previous, threshold=0.25, min_seconds=0.05):
+    """Print per-step change vs a previous run; returns [(scale, step, ratio)] regressions."""
+    regressions = []
+    print(f"\nvs {previous['timestamp']} ({previous.get('label') or previous.get('commit') or 'previous run'}):")
+    for scale, steps in run["scales"].items():
+        before = previous["scales"].get(scale, {})
+        for step, now in steps.items():
+            old = before.get(step)
+            if not old or not old["seconds"]:
+                continue
+            ratio = now["seconds"] / old["seconds"]
+            slow = ratio > 1.0 + threshold and now["seconds"] >= min_seconds
+            flag = "  <-- REGRESSION" if slow else ""
+            print(f"  {scale:>8} {step:<32} {old['seconds']:8.3f}s -> {now['seconds']:8.3f}s ({ratio - 1:+.0%}){flag}")
+            if flag:
+                regressions.append((scale, step, ratio))
+    return regressions
+
+
+def run(scales, crossings=3, seed=0, memory=True, history_path=DEFAULT_HISTORY, label=None, threshold=0.25,
+        repeat=3):
+    task07_reports.USE_NATIVE_READER = False   # reports read through the memory backend too
+    record = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "crossings": crossings,
+        "seed": seed,
+        "repeat": repeat,
+        "scales": {},
+    }
+    for n in scales:
+        print(f"\n{n:,} GPS points / {max(1, n // 2):,} lines")
+        seconds = _run_scale(n, crossings, seed, trace=False)
+        for _ in range(repeat - 1):
+            again = _run_scale(n, crossings, seed, trace=False)
+            seconds = {step: min(s, again[step]) for step, s in seconds.items()}
+        peaks = _run_scale(n, crossings, seed, trace=True) if memory else {}
+        steps = {}
+        for step, s in seconds.items():
+            steps[step] = {"seconds": round(s, 4), "peak_mb": round(peaks[step], 2) if step in peaks else None}
+            mem = f"{peaks[step]:9.1f} MB" if step in peaks else ""
+            print(f"  {step:<32} {s:9.3f}s {mem}")
+        record["scales"][str(n)] = steps
+    record["peak_rss_mb"] = _peak_rss_mb()
+
+    history = load_history(history_path)
+    previous = _previous(history, record["scales"])
+    regressions = compare(record, previous, threshold) if previous else []
+    history.append(record)
+    save_history(history_path, history)
+    print(f"\nAppended to {history_path}")
+    return record, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rehab pipeline benchmark on synthetic fires")
+    parser.add_argument("--scales", default="1000,10000,100000", help="comma-separated GPS point counts")
+    parser.add_argument("--crossings", type=int, default=3, help="self-crossings per machine guard")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scale (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--label", default=None, help="free text stored with the run (e.g. branch or change)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slow-down ratio flagged as a regression")
+    args = parser.parse_args()
+    _record, found = run([int(s) for s in args.scales.split(",")], args.crossings, args.seed, not args.no_memory,
+                         args.history, args.label, args.threshold, max(1, args.repeat))
+    sys.exit(1 if found else 0)
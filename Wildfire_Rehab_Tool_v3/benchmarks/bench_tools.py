@@ -0,0 +1,188 @@
+import argparse
+import datetime
+import time
+
+import numpy as np
+
+import backends
+import schema_cache
+import task02_lines
+import task03_points
+import task05_detect_self_intersecting_lines as task05
+import task06_update_status
+
+"""
+Benchmark: the v3 tool functions on synthetic data through the in-memory backend
+
+Runs the real copy_* / update_* / run_lines_pipeline / detect_line_intersections code on
+synthetic rehab datasets (10k / 100k / 1M features by default) with backends.memory
+standing in for arcpy, and reports features per second for each step. Times cover the
+tool logic and the Python side of cursor traffic, not file GDB I/O, so they are for
+comparing code changes, not for predicting ArcGIS Pro run times.
+
+Also checks that the single-pass lines pipeline (2.5) leaves the target exactly as the
+four steps 2.1 -> 2.4 do, on targets that already hold part of the source (a resent
+export: the duplicate check must skip the same lines on both paths).
+
+    python -m benchmarks.bench_tools --sizes 10000,100000
+"""
+
+arcpy = backends.use("memory")
+
+SR = arcpy.SpatialReference(3005)
+WS = "memory"
+
+LINE_LABELS = ["Pull Back (PB)", "Recontour (RC)", "Dry Seed (DS)", "Grade Road (GR)", "No Treatment NT"]
+FL_LABELS = ["Completed Machine Line", "Completed Handline", "Road", "Trail TR", "Not a fire line"]
+WIDTHS = ["1m", "6m", "12m", "25m", ""]
+POINT_LABELS = ["Water Bar WB", "Cross Ditch Repair CDR", "Steep Slope SS", "Sump (SP)", "Not a point type"]
+
+
+def _fc(name, shape_type, fields):
+    arcpy.management.Delete(f"{WS}/{name}")
+    arcpy.management.CreateFeatureclass(WS, name, shape_type, spatial_reference=SR)
+    path = f"{WS}/{name}"
+    for field_name, field_type, length in fields:
+        arcpy.management.AddField(path, field_name, field_type, field_length=length)
+    return path
+
+
+def _source_fields():
+    return [("name", "TEXT", 50), ("desc", "TEXT", 254), ("TimeStamp", "DATE", None), ("CritWork", "TEXT", 5),
+            ("sym_name", "TEXT", 100)]
+
+
+def _make_lines(n, seed=0):
+    """Source lines (3 vertices, ~50 m legs) at a density that gives some crossings."""
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(n) * 400.0
+    x0 = 1_000_000 + rng.uniform(0, side, n)
+    y0 = 500_000 + rng.uniform(0, side, n)
+    steps = rng.normal(0, 50.0, (n, 2, 2))
+
+    src = _fc(f"src_lines_{n}", "POLYLINE", _source_fields() + [
+        ("RLType", "TEXT", 100), ("FLType", "TEXT", 100), ("LineWidth", "TEXT", 20), ("AvgSlope", "TEXT", 20)])
+    labels = rng.integers(0, len(LINE_LABELS), n)
+    when = datetime.datetime(2025, 7, 1, 9, 30)
+    fields = ["SHAPE@", "name", "desc", "TimeStamp", "CritWork", "sym_name", "RLType", "FLType", "LineWidth", "AvgSlope"]
+    with arcpy.da.InsertCursor(src, fields) as cur:
+        for i in range(n):
+            x1, y1 = x0[i] + steps[i, 0, 0], y0[i] + steps[i, 0, 1]
+            x2, y2 = x1 + steps[i, 1, 0], y1 + steps[i, 1, 1]
+            geom = arcpy.Polyline.from_coords([[(x0[i], y0[i]), (x1, y1), (x2, y2)]], SR)
+            k = labels[i]
+            cur.insertRow((geom, f"MG{i}", f"line {i}", when, "Yes", LINE_LABELS[k],
+                           "" if k == 0 else LINE_LABELS[(k + 1) % 5], FL_LABELS[k], WIDTHS[k], "0 to 15"))
+    return src
+
+
+def _make_points(n, seed=1):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(n) * 400.0
+    xs = 1_000_000 + rng.uniform(0, side, n)
+    ys = 500_000 + rng.uniform(0, side, n)
+
+    src = _fc(f"src_points_{n}", "POINT", _source_fields() + [("RPtType2", "TEXT", 100)])
+    labels = rng.integers(0, len(POINT_LABELS), n)
+    when = datetime.datetime(2025, 7, 1, 9, 30)
+    with arcpy.da.InsertCursor(src, ["SHAPE@XY", "name", "desc", "TimeStamp", "CritWork", "sym_name", "RPtType2"]) as cur:
+        for i in range(n):
+            k = labels[i]
+            cur.insertRow(((xs[i], ys[i]), f"P{i}", f"point {i}", when, "No", POINT_LABELS[k],
+                           POINT_LABELS[(k + 2) % 5]))
+    return src
+
+
+def _target(name, shape_type, extra):
+    return _fc(name, shape_type, [
+        ("Fire_Num", "TEXT", 8), ("Fire_Name", "TEXT", 40), ("Status", "TEXT", 50), ("Label", "TEXT", 50),
+        ("Comments", "TEXT", 254), ("CaptureDate", "DATE", None), ("CritWork", "TEXT", 5),
+    ] + extra)
+
+
+def _line_target(name):
+    return _target(name, "POLYLINE", [(f, "TEXT", 5) for f in
+                                      ("RLType", "RLType_2", "RLType_3", "FLType", "FLType2", "LineWidth", "AvgSlope")])
+
+
+def _point_target(name):
+    return _target(name, "POINT", [(f, "TEXT", 5) for f in ("RPtType", "RPtType2", "RPtType3")])
+
+
+def _prepopulate(tgt, src, n):
+    """Copy the first n source geometries into tgt, as an earlier import of the same export would."""
+    with arcpy.da.SearchCursor(src, ["SHAPE@"]) as s_cur, arcpy.da.InsertCursor(tgt, ["SHAPE@", "Fire_Num"]) as i_cur:
+        for i, (geom,) in enumerate(s_cur):
+            if i >= n:
+                break
+            i_cur.insertRow((geom, ""))
+
+
+def _snapshot(fc):
+    """All attribute columns of a memory table (row order = OID order)."""
+    t = arcpy.table_of(fc)
+    return {name: list(col) for name, col in t.columns.items() if name not in ("objectid", "shape")}
+
+
+def _timed(results, label, n, fn, *args, **kwargs):
+    schema_cache.invalidate()
+    t = time.perf_counter()
+    out = fn(*args, **kwargs)
+    seconds = time.perf_counter() - t
+    results.append((label, n, seconds))
+    print(f"  {label:<48} {seconds:8.2f}s  {n / seconds if seconds else float('inf'):>12,.0f} features/s")
+    return out
+
+
+def run(sizes, workers=1, skip_intersections=False):
+    fire = ("C99999", "Synthetic Fire", "RehabRequiresFieldVerification")
+    results = []
+    for n in sizes:
+        arcpy.reset()
+        print(f"\n{n:,} features")
+
+        src_lines = _make_lines(n)
+        tgt = _line_target(f"rehab_lines_{n}")
+        _prepopulate(tgt, src_lines, n // 4)
+        _timed(results, "2.1 copy_lines", n, task02_lines.copy_lines, src_lines, tgt)
+        _timed(results, "2.2 copy_attributes_based_on_location_lines", n,
+               task02_lines.copy_attributes_based_on_location_lines, src_lines, tgt)
+        _timed(results, "2.3 copy_domain_values_based_on_location_lines", n,
+               task02_lines.copy_domain_values_based_on_location_lines, src_lines, tgt)
+        _timed(results, "2.4 update_basic_fields_lines", n, task02_lines.update_basic_fields_lines, tgt, *fire)
+        four_step = _snapshot(tgt)
+
+        tgt_fused = _line_target(f"rehab_lines_fused_{n}")
+        _prepopulate(tgt_fused, src_lines, n // 4)
+        _timed(results, "2.5 run_lines_pipeline", n, task02_lines.run_lines_pipeline, src_lines, tgt_fused, *fire)
+        same = _snapshot(tgt_fused) == four_step
+        print(f"  2.5 pipeline == 2.1-2.4: {same}")
+        if not same:
+            raise AssertionError("run_lines_pipeline left the target different from 2.1 -> 2.4")
+
+        src_points = _make_points(n)
+        tgt = _point_target(f"rehab_points_{n}")
+        _timed(results, "3.1 copy_points", n, task03_points.copy_points, src_points, tgt)
+        _timed(results, "3.2 copy_attributes_based_on_location_points", n,
+               task03_points.copy_attributes_based_on_location_points, src_points, tgt)
+        _timed(results, "3.3 copy_domain_values_based_on_location_points", n,
+               task03_points.copy_domain_values_based_on_location_points, src_points, tgt)
+        _timed(results, "3.4 update_basic_fields_points", n, task03_points.update_basic_fields_points, tgt, *fire)
+
+        arcpy.select(tgt, range(1, n + 1))
+        _timed(results, "5.1 update_status", n, task06_update_status.update_status, tgt, "RehabCompleted")
+        arcpy.clear_selection(tgt)
+
+        if not skip_intersections:
+            _timed(results, "detect_line_intersections", n, task05.detect_line_intersections, src_lines,
+                   out_name=f"Self_Intersection_Points_{n}", workers=workers)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="v3 tool benchmark on the in-memory backend")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated feature counts")
+    parser.add_argument("--workers", type=int, default=1, help="processes for detect_line_intersections")
+    parser.add_argument("--skip-intersections", action="store_true")
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.workers, args.skip_intersections)
@@ -0,0 +1,183 @@
+import datetime
+import math
+
+import numpy as np
+
+import backends
+from domain_registry import LINE_DOMAIN_MAPPING_RAW, POINT_DOMAIN_MAPPING_RAW
+
+"""
+Synthetic incidents for the benchmarks (in-memory backend)
+
+make_fire() builds one fire in the "memory" workspace:
+- GPS lines: random-walk tracks (~10 m vertex spacing) with sym_name / RLType / FLType
+  labels drawn from the real domain dictionaries (domain_registry),
+  plus a share of unknown labels so the "no code" paths run too
+- GPS points: mostly on the tracks (waypoints taken along a line), sym_name from
+  domain_registry.POINT_DOMAIN_MAPPING_RAW
+- machine guards: polylines that cross themselves exactly `crossings` times each (one
+  loop per crossing), spaced so guards never touch each other; they are also part of
+  the lines layer, like guards walked with a GPS
+- empty rehab target feature classes with the master GDB schema
+
+Everything is seeded, so the same arguments give the same fire.
+"""
+
+SR_CODE = 3005
+WS = "memory"
+FIRE = ("C99999", "Synthetic Fire", "RehabRequiresFieldVerification")
+
+# LINE_DOMAIN_MAPPING_RAW is one table in sections: RLType, FLType ('Unknown'...), LineWidth ('1m'...)
+_LINE_KEYS = list(LINE_DOMAIN_MAPPING_RAW)
+_RL_LABELS = _LINE_KEYS[:_LINE_KEYS.index("Unknown")]
+_FL_LABELS = _LINE_KEYS[_LINE_KEYS.index("Unknown"):_LINE_KEYS.index("1m")]
+_WIDTHS = ["1m", "3m", "5m", "6m", "10m", "12m", "25m"]
+_SLOPES = ["0 to 15", "16 to 25", "26 to 35", "above 35"]
+_POINT_LABELS = list(POINT_DOMAIN_MAPPING_RAW)
+_UNKNOWN = ["Misc", "Flagging tape", "TBD"]
+_GUARD_LABEL = "Completed Machine Line MG"
+
+
+def _arcpy():
+    return backends.use("memory")
+
+
+def create_fc(name, shape_type, fields):
+    """(Re)create memory/<name> with [(field, type, length), ...]. Returns its path."""
+    arcpy = _arcpy()
+    path = f"{WS}/{name}"
+    arcpy.management.Delete(path)
+    arcpy.management.CreateFeatureclass(WS, name, shape_type, spatial_reference=arcpy.SpatialReference(SR_CODE))
+    for field_name, field_type, length in fields:
+        arcpy.management.AddField(path, field_name, field_type, field_length=length)
+    return path
+
+
+def _rehab_fc(name, shape_type, extra):
+    return create_fc(name, shape_type, [
+        ("Fire_Num", "TEXT", 8), ("Fire_Name", "TEXT", 40), ("Status", "TEXT", 50), ("Label", "TEXT", 50),
+        ("Comments", "TEXT", 254), ("CaptureDate", "DATE", None), ("CritWork", "TEXT", 5),
+        ("ProtValue", "TEXT", 5),
+    ] + extra)
+
+
+def rehab_lines_fc(name):
+    """Empty target with the rehab line schema (coded fields are short TEXT)."""
+    return _rehab_fc(name, "POLYLINE", [(f, "TEXT", 5) for f in
+                                        ("RLType", "RLType_2", "RLType_3", "FLType", "FLType2", "LineWidth", "AvgSlope")])
+
+
+def rehab_points_fc(name):
+    """Empty target with the rehab point schema."""
+    return _rehab_fc(name, "POINT", [(f, "TEXT", 5) for f in ("RPtType", "RPtType2", "RPtType3")])
+
+
+def _gps_fields():
+    return [("name", "TEXT", 50), ("desc", "TEXT", 254), ("TimeStamp", "DATE", None),
+            ("CritWork", "TEXT", 5), ("ProtValue", "TEXT", 5), ("sym_name", "TEXT", 100)]
+
+
+def guard_coords(x0, y0, crossings, size=20.0, rng=None):
+    """
+    Vertices of a machine guard heading east from (x0, y0) with `crossings` loops.
+    Each loop runs east 2*size, north, back west past its middle and south across the
+    first leg (one proper crossing), then clears the loop before the next one.
+    """
+    jitter = (lambda: rng.uniform(-0.1, 0.1) * size) if rng is not None else (lambda: 0.0)
+    pts = [(x0, y0)]
+    x = x0
+    for _ in range(crossings):
+        pts += [(x + 2 * size, y0),
+                (x + 2 * size, y0 + size + jitter()),
+                (x + size + jitter(), y0 + size),
+                (x + size, y0 - size + jitter()),
+                (x + 3 * size, y0 - size),
+                (x + 3 * size, y0)]
+        x += 3 * size
+    pts.append((x + 2 * size, y0))
+    return pts
+
+
+def _track(rng, x, y, n_vertices, step=10.0):
+    heading = rng.uniform(0, 2 * math.pi)
+    pts = [(x, y)]
+    for _ in range(n_vertices - 1):
+        heading += rng.normal(0, 0.35)
+        x += step * math.cos(heading)
+        y += step * math.sin(heading)
+        pts.append((x, y))
+    return pts
+
+
+def _line_row(rng, i, when):
+    unknown = rng.random() < 0.03
+    sym = _UNKNOWN[i % len(_UNKNOWN)] if unknown else _RL_LABELS[rng.integers(len(_RL_LABELS))]
+    rl = "" if rng.random() < 0.4 else sym       # blank RLType -> sym_name fallback
+    return (f"L{i}", f"GPS track {i}, {_WIDTHS[i % len(_WIDTHS)]} wide", when + datetime.timedelta(minutes=i),
+            "Yes" if i % 7 == 0 else "", "No", sym, rl, _FL_LABELS[rng.integers(len(_FL_LABELS))],
+            _WIDTHS[rng.integers(len(_WIDTHS))], _SLOPES[rng.integers(len(_SLOPES))])
+
+
+def make_fire(n_points, n_lines, n_guards=0, crossings=3, seed=0, prefix="fire"):
+    """
+    Build a synthetic fire in the memory workspace. Returns a dict of paths:
+    src_points, src_lines, guards, tgt_points, tgt_lines, plus expected_guard_self
+    (SELF points detect_line_intersections must report for the guards layer).
+    """
+    arcpy = _arcpy()
+    sr = arcpy.SpatialReference(SR_CODE)
+    rng = np.random.default_rng(seed)
+    when = datetime.datetime(2025, 7, 1, 8, 0)
+
+    # Fire area grows with the data so density stays about constant
+    radius = 200.0 * math.sqrt(max(n_lines, 1))
+    cx, cy = 1_300_000.0, 850_000.0
+
+    line_fields = ["SHAPE@", "name", "desc", "TimeStamp", "CritWork", "ProtValue", "sym_name",
+                   "RLType", "FLType", "LineWidth", "AvgSlope"]
+    src_lines = create_fc(f"{prefix}_gps_lines", "POLYLINE", _gps_fields() + [
+        ("RLType", "TEXT", 100), ("FLType", "TEXT", 100), ("LineWidth", "TEXT", 20), ("AvgSlope", "TEXT", 20)])
+    guards = create_fc(f"{prefix}_guards", "POLYLINE", _gps_fields())
+
+    tracks = []
+    with arcpy.da.InsertCursor(src_lines, line_fields) as cur:
+        for i in range(n_lines):
+            r, a = radius * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+            pts = _track(rng, cx + r * math.cos(a), cy + r * math.sin(a), int(rng.integers(5, 40)))
+            tracks.append(pts)
+            cur.insertRow((arcpy.Polyline.from_coords([pts], sr),) + _line_row(rng, i, when))
+
+        # Guards: one row each, outside the track area, far enough apart not to touch
+        with arcpy.da.InsertCursor(guards, ["SHAPE@", "name", "sym_name"]) as g_cur:
+            for j in range(n_guards):
+                pts = guard_coords(cx - radius, cy + radius + 200.0 + 100.0 * j, crossings, rng=rng)
+                geom = arcpy.Polyline.from_coords([pts], sr)
+                g_cur.insertRow((geom, f"MG{j + 1}", _GUARD_LABEL))
+                cur.insertRow((geom, f"MG{j + 1}", "Machine guard", when, "Yes", "No", _GUARD_LABEL,
+                               "", "Completed Machine Line MG", "5m", "16 to 25"))
+
+    src_points = create_fc(f"{prefix}_gps_points", "POINT", _gps_fields() + [("RPtType2", "TEXT", 100)])
+    with arcpy.da.InsertCursor(src_points, ["SHAPE@XY", "name", "desc", "TimeStamp", "CritWork", "ProtValue",
+                                            "sym_name", "RPtType2"]) as cur:
+        for i in range(n_points):
+            if tracks and rng.random() < 0.8:
+                track = tracks[rng.integers(len(tracks))]
+                x, y = track[rng.integers(len(track))]
+            else:
+                r, a = radius * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+                x, y = cx + r * math.cos(a), cy + r * math.sin(a)
+            x, y = x + rng.uniform(-0.5, 0.5), y + rng.uniform(-0.5, 0.5)
+            sym = (_UNKNOWN[i % len(_UNKNOWN)] if rng.random() < 0.03
+                   else _POINT_LABELS[rng.integers(len(_POINT_LABELS))])
+            second = _POINT_LABELS[rng.integers(len(_POINT_LABELS))] if rng.random() < 0.2 else None
+            cur.insertRow(((x, y), f"P{i}", f"Waypoint {i}", when + datetime.timedelta(minutes=i), "",
+                           "No", sym, second))
+
+    return {
+        "src_points": src_points,
+        "src_lines": src_lines,
+        "guards": guards,
+        "tgt_points": rehab_points_fc(f"{prefix}_rehab_points"),
+        "tgt_lines": rehab_lines_fc(f"{prefix}_rehab_lines"),
+        "expected_guard_self": n_guards * crossings,
+    }
@@ -0,0 +1,323 @@
+import contextlib
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from backends import arcpy
+import filegdb_reader
+import geometry_index
+import schema_cache
+
+"""
+Write-ahead journal for the geometry copy steps (2.1 copy_lines, 3.1 copy_points)
+
+The copy inserts in batches of BATCH_SIZE rows, each batch in its own edit session. Before
+a batch is inserted its source OIDs are appended to the journal (intent record); once the
+edit session has saved, the (source OID, target OID) pairs are appended (commit record)
+and the file is fsync'ed. If the run dies, the next run of the same copy (same step,
+source and target) replays the journal and
+- skips every committed source OID,
+- settles a batch that has an intent but no commit: its rows are the target OIDs above the
+  high-water mark stored with the intent (the edit session saved all of them or none),
+- reads the source only past the last committed OID (where clause on the OID field).
+
+The header stores the insert fields and their values; a journal whose header does not
+match the current run is never resumed (see CopyJournal.open). The journal is deleted
+when the copy completes, so a finished copy leaves nothing behind and the next import
+starts fresh. Only the inserts are journaled: the update steps (2.2 - 2.4, 3.2 - 3.4)
+write the same values again when re-run, so an interrupted update is simply run again. Journals live next to the target GDB:
+
+    Data\\{fire_number}_Rehab.gdb
+    Data\\{fire_number}_Rehab_journal\\<step>_<hash of source + target>.wal
+
+Targets outside a file GDB (memory, SDE) are journaled under JOURNAL_DIR when it is set,
+otherwise not at all.
+
+File format: MAGIC, then records of  type (1 byte) | payload length (uint32) | crc32 (uint32)
+| payload, all little-endian:
+    H  JSON header: step, source, target, insert fields and their values
+    B  intent:  high-water target OID (int64), then the batch's source OIDs (int64 each)
+    C  commit:  (source OID, target OID) int64 pairs
+A torn record at the end (crash while appending) fails its length / crc check and is cut off.
+"""
+
+BATCH_SIZE = 5000
+JOURNAL_DIR = None
+
+MAGIC = b"RHCJ\x01"
+_REC = struct.Struct("<cII")
+_HWM = struct.Struct("<q")
+
+
+#############################################################################################
+# LOCATION
+#############################################################################################
+def journal_dir(target):
+    """<GDB folder>\\<GDB name>_journal for a file GDB target, else JOURNAL_DIR (None: no journal)."""
+    try:
+        gdb = filegdb_reader.split_fc_path(target)[0]
+    except filegdb_reader.FileGDBError:
+        return JOURNAL_DIR
+    return os.path.join(os.path.dirname(gdb), os.path.splitext(os.path.basename(gdb))[0] + "_journal")
+
+
+def journal_path(step, source, target):
+    folder = journal_dir(target)
+    if not folder:
+        return None
+    key = "|".join(os.path.normcase(os.path.abspath(str(p))) for p in (source, target))
+    return os.path.join(folder, f"{step}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.wal")
+
+
+#############################################################################################
+# JOURNAL FILE
+#############################################################################################
+class CopyJournal:
+    """
+    One copy run: committed source -> target OIDs, plus at most one unsettled batch.
+    With path=None every method is a no-op (no journal location for the target).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self.done = {}            # source OID -> target OID
+        self.pending = None       # (high-water OID, [source OIDs]) of a batch without commit
+        self._f = None
+
+    @classmethod
+    def open(cls, step, source, target, header):
+        """
+        Replay an interrupted run's journal, or start a new one with `header`. A journal
+        written for a different header (other insert fields / values) is discarded if it
+        recorded no batch yet; otherwise ValueError, since resuming it would mix the two.
+        """
+        journal = cls(journal_path(step, source, target))
+        if journal.path:
+            if os.path.exists(journal.path):
+                journal._replay()
+            if journal.header is not None and journal.header != header:
+                if journal.resumed:
+                    raise ValueError(f"{step} The interrupted copy journaled in {journal.path} was started with "
+                                     f"different settings ({journal.header}). Finish it with the same settings, "
+                                     f"or delete the journal to copy from scratch.")
+                arcpy.AddWarning(f"{step} Discarding the journal {journal.path}: it was written for different "
+                                 f"settings and recorded no copied features.")
+                journal = cls(journal.path)
+            if journal.header is None:
+                journal._create(header)
+            else:
+                journal._f = open(journal.path, "ab")
+        return journal
+
+    @property
+    def resumed(self):
+        return bool(self.done) or self.pending is not None
+
+    def last_source_oid(self):
+        return max(self.done) if self.done else None
+
+    def _create(self, header):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._f = open(self.path, "wb")
+        self._f.write(MAGIC)
+        self.header = header
+        self._append(b"H", json.dumps(header).encode("utf-8"), sync=True)
+
+    def _replay(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            return          # unreadable: start over
+        pos, good = len(MAGIC), len(MAGIC)
+        while pos + _REC.size <= len(data):
+            kind, length, crc = _REC.unpack_from(data, pos)
+            payload = data[pos + _REC.size:pos + _REC.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break       # torn tail
+            pos += _REC.size + length
+            good = pos
+            if kind == b"H":
+                self.header = json.loads(payload.decode("utf-8"))
+            elif kind == b"B":
+                hwm = _HWM.unpack_from(payload)[0]
+                self.pending = (hwm, np.frombuffer(payload, dtype="<i8", offset=_HWM.size).tolist())
+            elif kind == b"C":
+                pairs = np.frombuffer(payload, dtype="<i8").reshape(-1, 2)
+                self.done.update(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist()))
+                self.pending = None
+        if good < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _append(self, kind, payload, sync=False):
+        self._f.write(_REC.pack(kind, len(payload), zlib.crc32(payload)) + payload)
+        self._f.flush()
+        if sync:
+            os.fsync(self._f.fileno())
+
+    def begin(self, high_water_oid, source_oids):
+        """Intent: this batch of source OIDs is about to be inserted above high_water_oid."""
+        if self._f is not None:
+            self._append(b"B", _HWM.pack(high_water_oid) + np.asarray(source_oids, dtype="<i8").tobytes(), sync=True)
+
+    def commit(self, pairs):
+        """The batch's (source OID, target OID) pairs are saved in the target."""
+        self.done.update(pairs)
+        self.pending = None
+        if self._f is not None:
+            self._append(b"C", np.asarray(pairs, dtype="<i8").reshape(-1, 2).tobytes(), sync=True)
+
+    def close(self, complete):
+        """Close the file; a completed copy deletes its journal."""
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        if complete:
+            os.remove(self.path)
+
+
+#############################################################################################
+# JOURNALED COPY
+#############################################################################################
+def _target_oids(target):
+    return arcpy.da.FeatureClassToNumPyArray(target, ["OID@"])["OID@"]
+
+
+def _settle_pending(journal, target, step):
+    """Commit (or drop) a batch that was interrupted between its intent and its commit."""
+    hwm, source_oids = journal.pending
+    oids = _target_oids(target)
+    above = np.sort(oids[oids > hwm])
+    if len(above) == 0:
+        journal.pending = None
+        return
+    if len(above) != len(source_oids):
+        arcpy.AddWarning(f"{step} Interrupted batch: {len(source_oids)} source feature(s) journaled, "
+                         f"{len(above)} target feature(s) found above OID {hwm}. Treating the first "
+                         f"{min(len(above), len(source_oids))} as copied.")
+    pairs = list(zip(source_oids, above.tolist()))
+    journal.commit(pairs)
+    arcpy.AddMessage(f"{step} Recovered {len(pairs)} feature(s) of an interrupted batch from the journal.")
+
+
+def _source_rows(source, fields, after_oid, spatial_reference=None):
+    """(OID, *fields) rows of the source, past after_oid when the backend can filter."""
+    if after_oid is not None:
+        oid_field = schema_cache.oid_field(source)
+        if oid_field:
+            try:
+                return arcpy.da.SearchCursor(source, ["OID@"] + fields, where_clause=f"{oid_field} > {int(after_oid)}",
+                                             spatial_reference=spatial_reference)
+            except NotImplementedError:
+                pass   # memory backend: full read, committed OIDs are skipped below
+    return arcpy.da.SearchCursor(source, ["OID@"] + fields, spatial_reference=spatial_reference)
+
+
+def _existing_fingerprints(index, target, journal):
+    """
+    Fingerprints the target held before this copy started: the index, minus the rows an
+    interrupted run of the same copy already inserted (those are its own, not duplicates).
+    """
+    if not journal.done:
+        return index.hashes
+    ours = set(journal.done.values())
+    copied = set()
+    with arcpy.da.SearchCursor(target, ["OID@", "SHAPE@"]) as cur:
+        for oid, geom in cur:
+            if oid in ours:
+                copied.add(index.fingerprint(geom))
+    return index.hashes - copied
+
+
+def copy_features(source, target, workspace, step, insert_fields, values=(), batch_size=None, index=None,
+                  rows=None):
+    """
+    Insert every source geometry into target as (SHAPE@, *values) rows for insert_fields,
+    journaled and resumable. With a geometry_index.GeometryIndex of the target, geometries
+    that were already in the target before the copy are skipped; coincident features
+    within the source are all copied (and counted in a message).
+    rows: (source OID, geometry in the target's coordinates) pairs of `source` from a read
+    the caller already does (2.5); by default the source is read here.
+    Returns (inserted this run, already copied by an interrupted run, duplicates skipped).
+    """
+    batch_size = batch_size or BATCH_SIZE
+    header = {"step": step, "source": str(source), "target": str(target),
+              "fields": list(insert_fields), "values": list(values)}
+    journal = CopyJournal.open(step, source, target, header)
+
+    skipped = 0
+    if journal.pending is not None:
+        _settle_pending(journal, target, step)
+    if journal.resumed:
+        skipped = len(journal.done)
+        arcpy.AddMessage(f"{step} Resuming an interrupted copy: {skipped} feature(s) already in the target.")
+
+    oids = _target_oids(target) if journal.path else ()
+    high_water = int(oids.max()) if len(oids) else 0
+    values = tuple(values)
+    inserted = 0
+    duplicates = 0
+    complete = False
+    # fingerprints compare in the target's coordinates
+    read_sr = schema_cache.spatial_reference(target) if index is not None else None
+    existing = _existing_fingerprints(index, target, journal) if index is not None else None
+    new_fps = set()
+    coincident = 0
+
+    def insert(batch):
+        nonlocal high_water, inserted
+        journal.begin(high_water, [oid for oid, _ in batch])
+        pairs = []
+        with arcpy.da.Editor(workspace):
+            with arcpy.da.InsertCursor(target, list(insert_fields)) as i_cur:
+                for oid, geom in batch:
+                    pairs.append((oid, i_cur.insertRow((geom,) + values)))
+        journal.commit(pairs)
+        high_water = max(high_water, max(t for _, t in pairs))
+        inserted += len(pairs)
+
+    try:
+        batch = []
+        if rows is None:
+            reader = _source_rows(source, ["SHAPE@"], journal.last_source_oid(), read_sr)
+        else:
+            reader = contextlib.nullcontext(rows)
+        with reader as s_cur:
+            for oid, geom in s_cur:
+                if oid in journal.done:
+                    continue
+                if index is not None:
+                    fp = index.fingerprint(geom)
+                    if fp is not None and fp in existing:
+                        duplicates += 1
+                        continue
+                    if fp is not None:
+                        if fp in new_fps:
+                            coincident += 1
+                        new_fps.add(fp)
+                batch.append((oid, geom))
+                if len(batch) >= batch_size:
+                    insert(batch)
+                    batch = []
+        if batch:
+            insert(batch)
+        complete = True
+    finally:
+        journal.close(complete)
+        schema_cache.touched(target)
+        if index is not None:
+            if complete:
+                index.hashes.update(new_fps)
+                index.save()
+            else:
+                geometry_index.invalidate(target)   # holds fingerprints of rows that may not exist
+    if coincident:
+        arcpy.AddMessage(f"{step} Copied {coincident} source feature(s) that coincide with another feature "
+                         f"of the same source (kept, not treated as duplicates).")
+    return inserted, skipped, duplicates
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+
+import backends
+from backends import arcpy
+import domain_registry
+import filegdb_reader
+import schema_cache
+
+"""
+Coded-value domains read from the target GDB, cached on disk
+
+The hand-maintained tables in domain_registry drift from the real domains in
+{fire_number}_Rehab.gdb. load() reads the coded-value domains of a file GDB once
+(arcpy.da.ListDomains, or filegdb_reader without arcpy) and stores them in a small JSON
+file per workspace under CACHE_DIR, stamped with the GDB's `timestamps` file (and the
+GDB_Items table the domains live in). Later runs only stat those two files; the domains
+are re-read when the stamp changes.
+
+The copy steps and the report decoders resolve through the domain of the target field:
+
+    label_table(tgt, "RLType", domain_registry.LINES).code(label)
+    code_labels(points_fc, "RPtType", domain_registry.POINTS)[code]
+
+GDB labels/codes override the hand table. The hand table still supplies its alias
+labels ('Pull Back PB', ...), but only those whose code is in the field's domain, with the
+code cast to the domain's type (a combined table such as domain_registry.LINES also holds
+FLType / LineWidth codes that must not resolve for RLType). It is used as-is for fields
+without a domain and for workspaces that are not file GDBs (memory, SDE).
+"""
+
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+                         "WildfireRehab", "domains")
+CACHE_VERSION = 1
+
+# Files whose (mtime, size) stamp the domains: the GDB's change stamp and GDB_Items
+_STAMP_FILES = ("timestamps", "a00000004.gdbtable")
+
+_DOMAINS = {}      # workspace key -> (stamp, {domain: {code: label}})
+_TABLES = {}       # (workspace key, stamp, domain, fallback name) -> DomainTable / code map
+
+
+def workspace_of(dataset_or_layer):
+    """File GDB folder of a dataset/layer, or None (memory, SDE, shapefile)."""
+    path = dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer)
+    try:
+        return filegdb_reader.split_fc_path(path)[0]
+    except filegdb_reader.FileGDBError:
+        return None
+
+
+def _key(workspace):
+    return os.path.normcase(os.path.abspath(workspace))
+
+
+def _stamp(workspace):
+    stamp = []
+    for name in _STAMP_FILES:
+        try:
+            st = os.stat(os.path.join(workspace, name))
+        except OSError:
+            return None
+        stamp.append([st.st_mtime_ns, st.st_size])
+    return stamp
+
+
+def _cache_file(workspace):
+    return os.path.join(CACHE_DIR, hashlib.sha1(_key(workspace).encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def _read_domains(workspace) -> dict:
+    """{domain: {code: label}} for the coded-value domains of a workspace."""
+    if backends.active() is not None and hasattr(arcpy.da, "ListDomains"):
+        return {d.name: dict(d.codedValues) for d in arcpy.da.ListDomains(workspace)
+                if d.domainType == "CodedValue"}
+    return filegdb_reader.open_gdb(workspace).coded_value_domains()
+
+
+def _load_file(workspace, stamp):
+    try:
+        with open(_cache_file(workspace), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != CACHE_VERSION or data.get("workspace") != _key(workspace) or data.get("stamp") != stamp:
+        return None
+    # codes keep their type (text / integer domains): stored as [code, label] pairs
+    return {name: {code: label for code, label in pairs} for name, pairs in data["domains"].items()}
+
+
+def _save_file(workspace, stamp, domains):
+    path = _cache_file(workspace)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "workspace": _key(workspace), "stamp": stamp,
+                       "domains": {name: [[c, l] for c, l in codes.items()] for name, codes in domains.items()}}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass      # read-only profile: the in-process cache still works
+
+
+def load(workspace) -> dict:
+    """{domain: {code: label}} for a file GDB; read from the GDB only when its stamp changed."""
+    key = _key(workspace)
+    stamp = _stamp(workspace)
+    cached = _DOMAINS.get(key)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        return cached[1]
+
+    domains = _load_file(workspace, stamp) if stamp is not None else None
+    if domains is None:
+        domains = _read_domains(workspace)
+        if stamp is not None:
+            _save_file(workspace, stamp, domains)
+    _DOMAINS[key] = (stamp, domains)
+    return domains
+
+
+def invalidate(workspace=None):
+    """Forget the in-process domains (the disk file is re-validated by its stamp anyway)."""
+    if workspace is None:
+        _DOMAINS.clear()
+        _TABLES.clear()
+    else:
+        _DOMAINS.pop(_key(workspace), None)
+
+
+def _field_domain(dataset_or_layer, field):
+    """(workspace, domain name, {code: label}) for a field, or None."""
+    workspace = workspace_of(dataset_or_layer)
+    if workspace is None:
+        return None
+    name = schema_cache.get_schema(dataset_or_layer).domain(field)
+    if not name:
+        return None
+    codes = load(workspace).get(name)
+    return (workspace, name, codes) if codes else None
+
+
+def _domain_codes(codes) -> dict:
+    """code_key(code) -> code as the GDB stores it, for matching hand-table codes to a domain."""
+    return {domain_registry.code_key(code): code for code in codes}
+
+
+def label_table(dataset_or_layer, field, fallback):
+    """DomainTable (label -> code) for a target field: its GDB domain over the fallback aliases in it."""
+    found = _field_domain(dataset_or_layer, field)
+    if found is None:
+        return fallback
+    workspace, name, codes = found
+    key = (_key(workspace), str(_DOMAINS[_key(workspace)][0]), name, fallback.name, "labels")
+    table = _TABLES.get(key)
+    if table is None:
+        typed = _domain_codes(codes)
+        merged = {label: typed[domain_registry.code_key(code)] for label, code in fallback.raw.items()
+                  if domain_registry.code_key(code) in typed}
+        merged.update({label: code for code, label in codes.items()})
+        table = _TABLES[key] = domain_registry.DomainTable(name, merged)
+    return table
+
+
+def code_labels(dataset_or_layer, field, fallback) -> dict:
+    """code -> label for decoding a field: its GDB domain over the fallback labels of its codes."""
+    found = _field_domain(dataset_or_layer, field)
+    if found is None:
+        return fallback.code_to_label
+    workspace, name, codes = found
+    key = (_key(workspace), str(_DOMAINS[_key(workspace)][0]), name, fallback.name, "codes")
+    mapping = _TABLES.get(key)
+    if mapping is None:
+        typed = _domain_codes(codes)
+        mapping = {code: label for code, label in fallback.code_to_label.items() if code in typed}
+        mapping.update({domain_registry.code_key(code): label for code, label in codes.items()})
+        _TABLES[key] = mapping
+    return mapping
@@ -0,0 +1,351 @@
+import re
+from collections import defaultdict
+
+"""
+Domain registry: label -> code tables for points and lines, compiled once
+
+The coded-value tables used by 2.3 / 3.3 (label -> code) and by the reports
+(code -> label) live here. Each table is compiled at import into
+- normalized label -> code (lowercase alphanumerics; on a normalized-key collision the
+  later label wins, as the old per-call {_norm(k): v} dicts did)
+- code -> first label (the reports' decoding)
+- a trigram index over the normalized labels
+
+DomainTable.code(label) is a memoized O(1) lookup. A label with no exact normalized
+match falls back to its nearest label by trigram similarity (Dice >= FUZZY_MIN_SCORE,
+and only if the best match is unambiguous); those hits are remembered per table so
+the steps can report which labels were near-matched.
+
+Wildfire_Rehab_Tool/a_project_setup/domain_mappings.py (legacy tool) builds its
+POINT_DOMAIN_MAPPING / LINE_DOMAIN_MAPPING from POINTS.by_norm / LINES.by_norm.
+"""
+
+FUZZY_MIN_SCORE = 0.75
+
+
+def normalize(label) -> str:
+    """'Pull Back (PB)' -> 'pullbackpb'."""
+    return re.sub(r'[^a-zA-Z0-9]', '', str(label)).lower()
+
+
+def _trigrams(norm: str) -> set:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def code_key(code):
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return code
+
+
+class DomainTable:
+    """One label -> code table with normalized, reverse and near-match lookups."""
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+        self.by_norm = {normalize(k): v for k, v in raw.items()}
+        self.code_to_label = {}
+        for label, code in raw.items():
+            self.code_to_label.setdefault(code_key(code), label)
+        self._norm_label = {normalize(k): k for k in raw}     # normalized -> last raw label
+        self._grams = {n: _trigrams(n) for n in self.by_norm}
+        self._index = defaultdict(set)
+        for n, grams in self._grams.items():
+            for g in grams:
+                self._index[g].add(n)
+        self._exact = {}          # raw label -> code (exact normalized hits)
+        self._near = {}           # raw label -> (matched label, code, score) or None
+        self.fuzzy_used = {}      # raw label -> near-match lookups since reset_usage()
+
+    def code(self, label, fuzzy=True):
+        """Code for a label (None if unknown); memoized per raw label."""
+        code = self._exact.get(label)
+        if code is not None:
+            return code
+        if label not in self._near:
+            norm = normalize(label) if label is not None else ""
+            code = self.by_norm.get(norm)
+            if code is not None:
+                self._exact[label] = code
+                return code
+            self._near[label] = self._nearest(norm) if norm else None
+        near = self._near[label]
+        if near is None or not fuzzy:
+            return None
+        self.fuzzy_used[label] = self.fuzzy_used.get(label, 0) + 1
+        return near[1]
+
+    def label(self, code, default=None):
+        """First label for a code ('7' / 7)."""
+        return self.code_to_label.get(code_key(code), default)
+
+    def _nearest(self, norm):
+        grams = _trigrams(norm)
+        shared = defaultdict(int)
+        for g in grams:
+            for n in self._index.get(g, ()):
+                shared[n] += 1
+        scored = sorted(((2.0 * c / (len(grams) + len(self._grams[n])), n) for n, c in shared.items()),
+                        reverse=True)
+        if not scored or scored[0][0] < FUZZY_MIN_SCORE:
+            return None
+        best_score, best = scored[0]
+        if len({self.by_norm[n] for score, n in scored if score == best_score}) > 1:
+            return None           # equally close to labels with different codes
+        return self._norm_label[best], self.by_norm[best], round(best_score, 3)
+
+    @property
+    def fuzzy_hits(self) -> dict:
+        """Every label resolved by near-match so far: label -> (matched label, code, score)."""
+        return {label: near for label, near in self._near.items() if near is not None}
+
+    def reset_usage(self):
+        self.fuzzy_used.clear()
+
+    def fuzzy_summary(self) -> list:
+        """One line per label near-matched since reset_usage()."""
+        lines = []
+        for label, n in sorted(self.fuzzy_used.items(), key=lambda kv: -kv[1]):
+            matched, code, score = self._near[label]
+            lines.append(f"Near-matched '{label}' -> '{matched}' (code {code}, score {score:.2f}) x{n}")
+        return lines
+
+    def __contains__(self, label):
+        return normalize(label) in self.by_norm
+
+    def __len__(self):
+        return len(self.raw)
+
+
+#############################################################################################
+# LINES: RLType / FLType / LineWidth / AvgSlope
+#############################################################################################
+RLTYPE_DOMAIN_RAW = {
+    'Clean Ditch (CD)': '1',
+    'Dry Seed (DS)': '2',
+    'Fence - Damaged (FD)': '3',
+    'Fence - Undamaged (FND)': '4',
+    'Danger Tree Treatment Required (DTA)': '14',
+    'Grade Road (GR)': '5',
+    'Pull Back (PB)': '6',
+    'Recontour (RC)': '7',
+    'Steep Slopes >35% (SS)': '10',
+    'No Treatment - Line (NA)': '11',
+    'Hazard (H)': '13',
+    'Unassigned': '99',
+    'Fuel Hazard Treatment Required (FHT)': '15',
+    'Division Break': '89',
+    'Other Rehab Treatment Type': '16',
+    'Road Damage - Requires Repair (RR)': '9',
+
+    'Ditch Clean Repair DCR': '1',
+    'Dry Seed DS': '2',
+    'Fire Hazard Treatment FHT': '13',
+    'Grade Road GR': '5',
+    'Infrastructure No Treatment INT': '21',
+    'Infrastructure Repair IR': '20',
+    'No Treatment NT': '11',
+    'No Work Zone NWZ': '22',
+    'Other Rehab Treatment Type ORT': '16',
+    'Pull Back PB': '6',
+    'Recontour RC': '7',
+    'Steep Slopes SS': '10'
+}
+
+FLTYPE_DOMAIN_RAW = {
+    'Unknown': '0',
+    'Active Burnout': '1',
+    'Aerial Foam Drop': '2',
+    'Aerial Hazard': '3',
+    'Aerial Ignition': '4',
+    'Aerial Retardant Drop': '5',
+    'Aerial Water Drop': '6',
+    'Branch Break': '7',
+    'Completed Burnout': '8',
+    'Completed Machine Line': '9',
+    'Completed Handline': '10',
+    'Completed Line': '11',
+    'Division Break': '12',
+    'Danger Tree Assessed': '13',
+    'Danger Tree Assessed/Felled': '14',
+    'Escape Route': '15',
+    'Fire Break Planned or Incomplete': '16',
+    'Fire Spread Prediction': '17',
+    'Highlighted Geographic Feature': '18',
+    'Highlighted Manmade Feature': '19',
+    'Line Break Complete': '20',
+    'Planned Fire Line': '21',
+    'Planned Secondary Line': '22',
+    'Proposed Burnout': '23',
+    'Proposed Machine Line': '24',
+    'Trigger Point': '25',
+    'Uncontrolled Fire Edge': '26',
+    'Other': '27',
+    'Contingency Line': '28',
+    'No Work Zone': '29',
+    'Completed Fuel Free Line': '30',
+    'Road - Modified Existing': '32',
+    'Trail': '34',
+    'Road': '31',
+    'Road - Heavily Used': '33',
+    'Pipeline': '35',
+    'Completed Hoselay': '36',
+    'Containment / Control Line': '37',
+
+    # duplicates / alt labels
+    'Containment Control Line': '37',
+    'Completed Fuel Free Line FF': '30',
+    'Completed Handline HL': '10',
+    'Completed Machine Line MG': '9',
+    'Road Heavily Used RHU': '33',
+    'Road Modified Existing REM': '32',
+    'Trail TR': '34'
+}
+
+LINEWIDTH_DOMAIN_RAW = {
+    '1m': '0',
+    '5m': '1',
+    '10m': '2',
+    '15m': '3',
+    '20m and wider': '4',
+}
+
+AVGSLOPE_DOMAIN_RAW = {
+    '0 to 15': '0',
+    '16 to 25': '1',
+    '26 to 35': '2',
+    'above 35': '3',
+}
+
+# 2.3 maps every line domain field through one table (RLType labels first; 'Division Break'
+# is in RLType and FLType, the FLType code wins)
+LINE_DOMAIN_MAPPING_RAW = {**RLTYPE_DOMAIN_RAW, **FLTYPE_DOMAIN_RAW, **LINEWIDTH_DOMAIN_RAW, **AVGSLOPE_DOMAIN_RAW}
+
+
+#############################################################################################
+# POINTS: RPtType / RPtType2 / RPtType3
+#############################################################################################
+POINT_DOMAIN_MAPPING_RAW = {
+    'Berm Breach BB': '2',
+    'Berm High BH': '43',
+    'Cleared Area CA': '42',
+    'Cross Ditch Culvert Backup CDB': '50',
+    'Cross Ditch Install CDI': '6',
+    'Cross Ditch Repair CDR': '7',
+    'Culvert Clean Repair CC': '8',
+    'Culvert Insert CI': '9',
+    'Culvert No Damage CND': '51',
+    'Culvert Remove and Dispose CRD': '52',
+    'Ditch Clean Repair DCR': '14',
+    'Ditch Install DI': '15',
+    'Domestic Water Supply W': '18',
+    'Dry Seed DS': '19',
+    'Existing Deactivation ED': '20',
+    'Hazard H': '27',
+    'Infrastructure No Treatment INT': '53',
+    'Infrastructure Repair IR': '54',
+    'Lowbed Turnaround LBT': '55',
+    'No Treatment Point NT': '41',
+    'No Work Zone NWZ': '56',
+    'Other Rehab Treatment Type ORT': '46',
+    'Point of Commencement Termination PCT': '49',
+    'Pull Back PB': '30',
+    'Recontour RC': '31',
+    'Restore Draw RD': '32',
+    'Seepage SG': '48',
+    'Steep Slope SS': '36',
+    'Stream Crossing Classified SCC': '60',
+    'Stream Crossing Non Classified SCN': '37',
+    'Sump SP': '38',
+    'Unassigned UN': '99',
+    'Unique Point UP': '40',
+    'Water Bar WB': '39',
+    'Wood Bunched BW': '47',
+    'Wood Burn Pile BPW': '34',
+    'Wood Decked DW': '13',
+
+    # 2024 gdb
+    'Steep Slope gt 35% (SS)': '36',
+    'Breach Berm (BB)': '2',
+    'Cattle Guard Damage (CGD)': '3',
+    'Cattle Guard No Damage (CGND)': '4',
+    'Cleared Area (CA)': '42',
+    'Cross Ditch - Install (CDI)': '6',
+    'Cross Ditch - Repair (CDR)': '7',
+    'Culvert - Clean/Repair Culvert (CC)': '8',
+    'Culvert - Insert Metal (MC)': '9',
+    'Culvert - Insert Wood (WC)': '10',
+    'Culvert - Remove and Dispose (RC)': '11',
+    'Culvert - Rock Ford / Squamish (SO)': '12',
+    'Decked Wood (DW)': '13',
+    'Ditch - Clean/Repair (CD)': '14',
+    'Ditch - Install (ID)': '15',
+    'Ditch - Install French Drain (FD)': '16',
+    'Ditch - Install Rock Check Dam (ID)': '17',
+    'Domestic Water Supply (W)': '18',
+    'Dry Seed (DS)': '19',
+    'Existing Deactivation (ED)': '20',
+    'Fence Damage - Point (FD)': '21',
+    'Fence No Damaged - Point (FND)': '22',
+    'Ford - Install (FI)': '23',
+    'Ford - Removal (FR)': '24',
+    'Gate Damage (GD)': '25',
+    'Gate No Damage (GND)': '26',
+    'Hazard (H)': '27',
+    'High Berm (HB)': '43',
+    'Point of Commencement (POC)': '28',
+    'Point of Termination (POT)': '29',
+    'Pull Back (PB)': '30',
+    'Recontour (RC)': '31',
+    'Restore Draw (RD)': '32',
+    'Safety Zone (SZ)': '33',
+    'Slash / Burn Pile / Hazard (SBP)': '34',
+    'Staging Area (SA)': '35',
+    'Steep Slope >35% (SS)': '36',
+    'Stream Crossing (SC)': '37',
+    'Sump (SP)': '38',
+    'Water Bar (WB)': '39',
+    'Unique Point (UP)': '40',
+    'No Treatment - Point (NA)': '41',
+    'Unassigned': '99',
+    'Division Label': '98',
+    'Straw Bales (SB)': '44',
+    'Danger Tree Treatment Required (DTA)': '45',
+    'Armouring / Coco Matting / Rip Rap (ACR)': '1',
+    'Other Rehab Treatment Type': '46',
+    'Bunched Wood (BW)': '47',
+    'Seepage (SG)': '48',
+    'Point of Commencement / Termination (PTC)': '49'
+}
+
+
+#############################################################################################
+# COMPILED TABLES
+#############################################################################################
+LINES = DomainTable("lines", LINE_DOMAIN_MAPPING_RAW)
+RLTYPE = DomainTable("RLType", RLTYPE_DOMAIN_RAW)
+FLTYPE = DomainTable("FLType", FLTYPE_DOMAIN_RAW)
+POINTS = DomainTable("RPtType", POINT_DOMAIN_MAPPING_RAW)
+
+TABLES = {t.name: t for t in (LINES, RLTYPE, FLTYPE, POINTS)}
+
+
+def reset_usage(tables):
+    for t in set(tables):
+        t.reset_usage()
+
+
+def fuzzy_summary(tables) -> list:
+    """fuzzy_summary() lines of each distinct table, in order."""
+    lines = []
+    for t in dict.fromkeys(tables):
+        lines += t.fuzzy_summary()
+    return lines
+
+
+def fuzzy_report() -> dict:
+    """{table name: {label: (matched label, code, score)}} for every near-matched label so far."""
+    return {name: dict(t.fuzzy_hits) for name, t in TABLES.items() if t.fuzzy_hits}
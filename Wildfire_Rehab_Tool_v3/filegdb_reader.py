@@ -0,0 +1,647 @@
+import datetime
+import mmap
+import os
+import struct
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+"""
+Read-only File Geodatabase reader (.gdbtable / .gdbtablx), standard library only
+
+Lets the rehab master GDB ({fire_number}_Rehab.gdb) be read without ArcGIS, e.g. for
+reports and stats on a Linux batch box:
+
+    gdb = FileGDB(r"...\\Data\\C30788_Rehab.gdb")
+    table = gdb.table("wildfireBC_Rehab_Line")
+    for oid, rl, fl, shape in table.rows(["OID@", "RLType", "FLType", "SHAPE"]):
+        ...
+    gdb.coded_value_domains()     # {domain name: {code: label}}  (from GDB_Items)
+
+Covered: the field types these feature classes use (int16/int32/int64, float32/64,
+string, date/datetime, OBJECTID, GUID/GlobalID, binary/XML as raw values, geometry) and
+point / multipoint / polyline / polygon shapes (Z and M values are read past, not
+returned). Rows are decoded lazily and only the projected columns are converted.
+Compressed (.cdf) and raster columns are not supported.
+
+Geometries come back as (x, y) for points and [[(x, y), ...], ...] (one list per part)
+for everything else, in the feature class's own coordinates.
+
+Format reference: the open FileGDB specification (OpenFileGDB driver, GDAL).
+"""
+
+GdbField = namedtuple("GdbField", ["name", "alias", "type", "nullable", "length"])
+
+# Field types
+INT16, INT32, FLOAT32, FLOAT64, STRING, DATETIME, OBJECTID, GEOMETRY, BINARY, RASTER, \
+    GUID, GLOBALID, XML, INT64, DATEONLY, TIMEONLY, DATETIME_OFFSET = range(17)
+
+FIELD_TYPE_NAMES = {
+    INT16: "SmallInteger", INT32: "Integer", FLOAT32: "Single", FLOAT64: "Double",
+    STRING: "String", DATETIME: "Date", OBJECTID: "OID", GEOMETRY: "Geometry",
+    BINARY: "Blob", RASTER: "Raster", GUID: "Guid", GLOBALID: "GlobalID", XML: "XML",
+    INT64: "BigInteger", DATEONLY: "DateOnly", TIMEONLY: "TimeOnly",
+    DATETIME_OFFSET: "TimestampOffset",
+}
+
+# Table geometry types (field section header)
+GEOMETRY_TYPE_NAMES = {0: None, 1: "Point", 2: "Multipoint", 3: "Polyline", 4: "Polygon", 9: "MultiPatch"}
+
+_EPOCH = datetime.datetime(1899, 12, 30)
+_FIXED = {INT16: ("<h", 2), INT32: ("<i", 4), FLOAT32: ("<f", 4), FLOAT64: ("<d", 8),
+          DATETIME: ("<d", 8), INT64: ("<q", 8), DATEONLY: ("<d", 8), TIMEONLY: ("<d", 8)}
+
+
+class FileGDBError(Exception):
+    """Raised for files this reader can't decode."""
+
+
+#############################################################################################
+# VARINTS
+#############################################################################################
+
+def _varuint(buf, pos):
+    """Unsigned LEB128 -> (value, new pos)."""
+    result = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _varint(buf, pos):
+    """FileGDB signed varint (sign in bit 6 of the first byte) -> (value, new pos)."""
+    b = buf[pos]
+    pos += 1
+    result = b & 0x3F
+    negative = b & 0x40
+    shift = 6
+    while b & 0x80:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        shift += 7
+    return (-result if negative else result), pos
+
+
+#############################################################################################
+# TABLE
+#############################################################################################
+
+class GdbTable:
+    """One .gdbtable (+ .gdbtablx) file."""
+
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self._files = []
+        self._data = self._map(path)
+        tablx = os.path.splitext(path)[0] + ".gdbtablx"
+        self._index = self._map(tablx) if os.path.exists(tablx) else None
+
+        magic, self.row_count, _max_row, _five = struct.unpack_from("<4i", self._data, 0)
+        if magic != 3:
+            raise FileGDBError(f"Unsupported .gdbtable version ({magic}): {path}")
+        fields_offset, = struct.unpack_from("<q", self._data, 32)
+        self._read_fields(fields_offset)
+        self._read_offsets()
+
+    def _map(self, path):
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for m in (self._data, self._index):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.row_count
+
+    # -----------------------------
+    # Header
+    # -----------------------------
+    def _read_fields(self, pos):
+        buf = self._data
+        _size, version, layer_flags, n_fields = struct.unpack_from("<iiIh", buf, pos)
+        if version not in (3, 4):
+            raise FileGDBError(f"Unsupported field section version {version}: {self.path}")
+        pos += 14
+        self.geometry_type = GEOMETRY_TYPE_NAMES.get(layer_flags & 0xFF)
+        self._layer_has_m = bool(layer_flags & 0x40000000)
+        self._layer_has_z = bool(layer_flags & 0x80000000)
+
+        self.fields = []
+        self._layout = []       # per field: (type, nullable, geometry params or None)
+        self.srs_wkt = None
+        self.extent = None
+        self.geometry_field = None
+        self.oid_field = None
+
+        for _ in range(n_fields):
+            n = buf[pos]
+            name = bytes(buf[pos + 1:pos + 1 + 2 * n]).decode("utf-16-le")
+            pos += 1 + 2 * n
+            n = buf[pos]
+            alias = bytes(buf[pos + 1:pos + 1 + 2 * n]).decode("utf-16-le")
+            pos += 1 + 2 * n
+            ftype = buf[pos]
+            pos += 1
+
+            geom = None
+            length = None
+            if ftype == OBJECTID:
+                nullable = False
+                pos += 2
+                self.oid_field = name
+            elif ftype == GEOMETRY:
+                flags = buf[pos + 1]
+                nullable = bool(flags & 1)
+                pos += 2
+                geom, pos = self._read_geometry_def(pos)
+                self.geometry_field = name
+            elif ftype == STRING:
+                length, flags = struct.unpack_from("<iB", buf, pos)
+                nullable = bool(flags & 1)
+                pos += 5
+                default_len, pos = _varuint(buf, pos)
+                pos += default_len
+            elif ftype in (BINARY, XML, GUID, GLOBALID):
+                flags = buf[pos + 1]
+                nullable = bool(flags & 1)
+                pos += 2
+            elif ftype == RASTER:
+                raise FileGDBError(f"Raster fields are not supported: {self.path}")
+            else:
+                width, flags, default_len = buf[pos], buf[pos + 1], buf[pos + 2]
+                length = width or None
+                nullable = bool(flags & 1)
+                pos += 3 + default_len
+
+            self.fields.append(GdbField(name, alias, FIELD_TYPE_NAMES.get(ftype, str(ftype)), nullable, length))
+            self._layout.append((ftype, nullable, geom))
+
+        self._n_nullable = sum(1 for _t, nullable, _g in self._layout if nullable)
+
+    def _read_geometry_def(self, pos):
+        buf = self._data
+        wkt_len, = struct.unpack_from("<H", buf, pos)
+        pos += 2
+        self.srs_wkt = bytes(buf[pos:pos + wkt_len]).decode("utf-16-le") or None
+        pos += wkt_len
+        flags = buf[pos]
+        pos += 1
+        has_m, has_z = bool(flags & 2), bool(flags & 4)
+
+        x_origin, y_origin, xy_scale = struct.unpack_from("<3d", buf, pos)
+        pos += 24
+        if has_m:
+            pos += 16
+        if has_z:
+            pos += 16
+        pos += 8                                   # xy tolerance
+        if has_m:
+            pos += 8
+        if has_z:
+            pos += 8
+        self.extent = struct.unpack_from("<4d", buf, pos)
+        pos += 32
+        if self._layer_has_z:                      # z / m ranges follow the layer type,
+            pos += 16                              # not the field's origin/scale flags
+        if self._layer_has_m:
+            pos += 16
+        pos += 1                                   # always 0
+        n_grids, = struct.unpack_from("<i", buf, pos)
+        pos += 4 + 8 * n_grids
+        return (x_origin, y_origin, xy_scale, has_z, has_m), pos
+
+    def _read_offsets(self):
+        """Row file offsets by OBJECTID - 1 (0 = deleted / never written)."""
+        if self._index is None:
+            raise FileGDBError(f"Missing .gdbtablx for {self.path}")
+        idx = self._index
+        _magic, n_blocks, n_rows, off_size = struct.unpack_from("<4i", idx, 0)
+        body = 16 + n_blocks * 1024 * off_size
+
+        block_of = None  # sparse tables: which 1024-row blocks are present
+        if n_blocks and len(idx) >= body + 16:
+            n_words, _n_total, _n_present, _lead = struct.unpack_from("<4i", idx, body)
+            if n_words:
+                bitmap = idx[body + 16: body + 16 + 4 * n_words]
+                block_of = [b for b in range(8 * len(bitmap)) if bitmap[b // 8] & (1 << (b % 8))]
+
+        offsets = []
+        for slot in range(n_blocks * 1024):
+            p = 16 + slot * off_size
+            offsets.append(int.from_bytes(idx[p:p + off_size], "little"))
+
+        if block_of is None:
+            self._oid_offsets = [(i + 1, o) for i, o in enumerate(offsets[:max(n_rows, 0)]) if o]
+        else:
+            self._oid_offsets = [
+                (block_of[slot // 1024] * 1024 + slot % 1024 + 1, o)
+                for slot, o in enumerate(offsets) if o and slot // 1024 < len(block_of)
+            ]
+
+    # -----------------------------
+    # Rows
+    # -----------------------------
+    @property
+    def field_names(self):
+        return [f.name for f in self.fields]
+
+    def _column_positions(self, columns):
+        lower = {f.name.lower(): i for i, f in enumerate(self.fields)}
+        out = []
+        for c in columns:
+            key = c.upper()
+            if key == "OID@":
+                out.append("oid")
+            elif key in ("SHAPE@", "SHAPE@XY"):
+                if self.geometry_field is None:
+                    raise KeyError(f"{self.name} has no geometry")
+                out.append((lower[self.geometry_field.lower()], key))
+            elif c.lower() in lower:
+                out.append((lower[c.lower()], None))
+            else:
+                raise KeyError(f"Field '{c}' not in {self.name}")
+        return out
+
+    def rows(self, columns=None):
+        """
+        Yield a tuple per live row with the values of `columns` (all fields by default).
+        Besides field names, "OID@", "SHAPE@" (decoded geometry) and "SHAPE@XY" (first
+        point) are accepted.
+        """
+        columns = self.field_names if columns is None else list(columns)
+        wanted = self._column_positions(columns)
+        needed = {w[0] for w in wanted if w != "oid"}
+        last_needed = max(needed) if needed else -1
+        buf = self._data
+        layout = self._layout
+        null_bytes = (self._n_nullable + 7) // 8
+
+        for oid, off in self._oid_offsets:
+            pos = off + 4
+            nulls = buf[pos:pos + null_bytes]
+            pos += null_bytes
+            values = {}
+            bit = 0
+            for i, (ftype, nullable, geom) in enumerate(layout):
+                if i > last_needed:
+                    break
+                if ftype == OBJECTID:
+                    values[i] = oid
+                    continue
+                if nullable:
+                    is_null = nulls[bit >> 3] & (1 << (bit & 7))
+                    bit += 1
+                    if is_null:
+                        values[i] = None
+                        continue
+                pos, value = self._read_value(buf, pos, ftype, geom, i in needed)
+                values[i] = value
+
+            out = []
+            for w in wanted:
+                if w == "oid":
+                    out.append(oid)
+                    continue
+                i, mode = w
+                v = values.get(i)
+                if mode == "SHAPE@XY" and v is not None:
+                    v = v if isinstance(v, tuple) else (v[0][0] if v and v[0] else None)
+                out.append(v)
+            yield tuple(out)
+
+    def _read_value(self, buf, pos, ftype, geom, decode):
+        fixed = _FIXED.get(ftype)
+        if fixed is not None:
+            fmt, size = fixed
+            if not decode:
+                return pos + size, None
+            v, = struct.unpack_from(fmt, buf, pos)
+            if ftype in (DATETIME, DATEONLY):
+                v = _EPOCH + datetime.timedelta(days=v)
+            elif ftype == TIMEONLY:
+                v = (datetime.datetime.min + datetime.timedelta(days=v)).time()
+            return pos + size, v
+        if ftype == DATETIME_OFFSET:
+            if not decode:
+                return pos + 10, None
+            days, minutes = struct.unpack_from("<dh", buf, pos)
+            tz = datetime.timezone(datetime.timedelta(minutes=minutes))
+            return pos + 10, (_EPOCH + datetime.timedelta(days=days)).replace(tzinfo=tz)
+        if ftype in (GUID, GLOBALID):
+            raw = bytes(buf[pos:pos + 16])
+            if not decode:
+                return pos + 16, None
+            return pos + 16, "{" + str(_uuid_from_le(raw)).upper() + "}"
+        if ftype in (STRING, BINARY, XML, GEOMETRY):
+            n, pos = _varuint(buf, pos)
+            if not decode:
+                return pos + n, None
+            raw = buf[pos:pos + n]
+            if ftype in (STRING, XML):
+                return pos + n, bytes(raw).decode("utf-8", "replace")
+            if ftype == BINARY:
+                return pos + n, bytes(raw)
+            return pos + n, _decode_geometry(raw, geom)
+        raise FileGDBError(f"Unsupported field type {ftype} in {self.path}")
+
+
+def _uuid_from_le(raw):
+    import uuid
+    return uuid.UUID(bytes_le=raw)
+
+
+#############################################################################################
+# GEOMETRY
+#############################################################################################
+
+def _decode_geometry(buf, params):
+    x_origin, y_origin, scale, _has_z, _has_m = params
+    gtype, pos = _varuint(buf, 0)
+    base = gtype & 0xFF
+
+    if base in (1, 9, 11, 21, 52):                      # point (+Z/M variants, general point)
+        xi, pos = _varuint(buf, pos)
+        yi, pos = _varuint(buf, pos)
+        if xi == 0:
+            return None
+        return ((xi - 1) / scale + x_origin, (yi - 1) / scale + y_origin)
+
+    if base in (8, 18, 20, 28, 53):                      # multipoint
+        n_points, pos = _varuint(buf, pos)
+        if n_points == 0:
+            return None
+        for _ in range(4):                              # bbox
+            _v, pos = _varuint(buf, pos)
+        return [_read_points(buf, pos, n_points, x_origin, y_origin, scale)[0]]
+
+    if base in (3, 10, 13, 23, 5, 15, 19, 25, 50, 51):  # polyline / polygon
+        n_points, pos = _varuint(buf, pos)
+        if n_points == 0:
+            return None
+        n_parts, pos = _varuint(buf, pos)
+        if gtype & 0x20000000:                          # curves
+            _n_curves, pos = _varuint(buf, pos)
+        for _ in range(4):                              # bbox
+            _v, pos = _varuint(buf, pos)
+        counts = []
+        for _ in range(n_parts - 1):
+            c, pos = _varuint(buf, pos)
+            counts.append(c)
+        counts.append(n_points - sum(counts))
+        pts, pos = _read_points(buf, pos, n_points, x_origin, y_origin, scale)
+        parts, start = [], 0
+        for c in counts:
+            parts.append(pts[start:start + c])
+            start += c
+        return parts
+
+    raise FileGDBError(f"Unsupported geometry type {gtype}")
+
+
+def _read_points(buf, pos, n, x_origin, y_origin, scale):
+    pts = []
+    x = y = 0
+    for _ in range(n):
+        dx, pos = _varint(buf, pos)
+        dy, pos = _varint(buf, pos)
+        x += dx
+        y += dy
+        pts.append((x / scale + x_origin, y / scale + y_origin))
+    return pts, pos
+
+
+#############################################################################################
+# GEODATABASE
+#############################################################################################
+
+class FileGDB:
+    """A .gdb folder: table lookup by name (GDB_SystemCatalog) and GDB_Items metadata."""
+
+    def __init__(self, path):
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Geodatabase folder not found: {path}")
+        self.path = path
+        self._tables = {}
+        with GdbTable(self._table_file(1), "GDB_SystemCatalog") as catalog:
+            for oid, name in catalog.rows(["OID@", "Name"]):
+                self._tables[name.lower()] = (oid, name)
+
+    def _table_file(self, table_id):
+        return os.path.join(self.path, f"a{table_id:08x}.gdbtable")
+
+    def table_names(self, include_system=False):
+        return sorted(name for _oid, name in self._tables.values()
+                      if include_system or not name.startswith("GDB_"))
+
+    def table_path(self, name):
+        """(.gdbtable path, real name) of a table / feature class (case-insensitive)."""
+        hit = self._tables.get(name.lower())
+        if hit is None:
+            raise KeyError(f"'{name}' not found in {self.path}")
+        oid, real_name = hit
+        return self._table_file(oid), real_name
+
+    def table(self, name):
+        """Open a table / feature class by name (case-insensitive). Close it when done."""
+        path, real_name = self.table_path(name)
+        if not os.path.exists(path) or os.path.exists(path + ".cdf"):
+            raise FileGDBError(f"'{real_name}' has no readable table file (compressed or missing)")
+        return GdbTable(path, real_name)
+
+    def _item_definitions(self):
+        with self.table("GDB_Items") as items:
+            for name, definition in items.rows(["Name", "Definition"]):
+                if definition:
+                    yield name, definition
+
+    def coded_value_domains(self):
+        """{domain name: {code: label}} for every coded-value domain in GDB_Items."""
+        domains = {}
+        for _name, definition in self._item_definitions():
+            if not definition.lstrip().startswith("<GPCodedValueDomain"):
+                continue
+            root = ET.fromstring(definition)
+            domain_name = root.findtext("DomainName")
+            field_type = root.findtext("FieldType") or ""
+            codes = {}
+            for cv in root.iter("CodedValue"):
+                code = cv.findtext("Code")
+                codes[_typed_code(code, field_type)] = cv.findtext("Name")
+            domains[domain_name] = codes
+        return domains
+
+    def field_domains(self, table_name):
+        """{field name: domain name} for a table, from its GDB_Items definition."""
+        for name, definition in self._item_definitions():
+            if name.split(".")[-1].lower() != table_name.lower():
+                continue
+            if not definition.lstrip().startswith(("<DEFeatureClassInfo", "<DETableInfo")):
+                continue
+            root = ET.fromstring(definition)
+            out = {}
+            for info in root.iter("GPFieldInfoEx"):
+                domain = info.findtext("DomainName")
+                if domain:
+                    out[info.findtext("Name")] = domain
+            return out
+        return {}
+
+
+def _typed_code(code, field_type):
+    if code is None:
+        return None
+    if field_type in ("esriFieldTypeSmallInteger", "esriFieldTypeInteger", "esriFieldTypeBigInteger"):
+        try:
+            return int(code)
+        except ValueError:
+            return code
+    if field_type in ("esriFieldTypeDouble", "esriFieldTypeSingle"):
+        try:
+            return float(code)
+        except ValueError:
+            return code
+    return code
+
+
+#############################################################################################
+# ARCPY-STYLE ACCESS
+#############################################################################################
+
+FieldDesc = namedtuple("FieldDesc", ["name", "type", "length", "domain"])
+
+_GDBS = {}
+
+
+def split_fc_path(fc):
+    """r"...\\X_Rehab.gdb\\[dataset\\]name" -> (gdb folder, table name)."""
+    parts = os.path.normpath(str(fc)).replace("\\", "/").split("/")
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i].lower().endswith(".gdb"):
+            if i == len(parts) - 1:
+                break
+            return "/".join(parts[:i + 1]) or "/", parts[-1]
+    raise FileGDBError(f"Not a file geodatabase table path: {fc}")
+
+
+def open_gdb(gdb_path):
+    """FileGDB for a folder, opened once per process."""
+    key = os.path.normcase(os.path.abspath(gdb_path))
+    gdb = _GDBS.get(key)
+    if gdb is None:
+        gdb = _GDBS[key] = FileGDB(gdb_path)
+    return gdb
+
+
+def list_fields(fc):
+    """arcpy.ListFields stand-in: FieldDesc(name, type, length, domain) per field."""
+    gdb_path, name = split_fc_path(fc)
+    gdb = open_gdb(gdb_path)
+    domains = gdb.field_domains(name)
+    with gdb.table(name) as table:
+        return [FieldDesc(f.name, f.type, f.length, domains.get(f.name)) for f in table.fields]
+
+
+TableDesc = namedtuple("TableDesc", ["name", "shape_type", "spatial_reference", "extent"])
+
+
+def describe(fc):
+    """arcpy.Describe stand-in: TableDesc(name, shape type, SRS WKT, (xmin, ymin, xmax, ymax))."""
+    gdb_path, name = split_fc_path(fc)
+    with open_gdb(gdb_path).table(name) as table:
+        return TableDesc(name, table.geometry_type, table.srs_wkt, table.extent)
+
+
+class SearchCursor:
+    """arcpy.da.SearchCursor stand-in (field names, "OID@", "SHAPE@", "SHAPE@XY")."""
+
+    def __init__(self, fc, field_names):
+        gdb_path, name = split_fc_path(fc)
+        self.fields = list(field_names)
+        self._table = open_gdb(gdb_path).table(name)
+
+    def __iter__(self):
+        return self._table.rows(self.fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._table.close()
+
+
+#############################################################################################
+# VALIDATION
+#############################################################################################
+
+def validate(gdb_path):
+    """
+    Decode every row of every readable table in a GDB and sanity-check it: row counts
+    against the table header, geometries inside the layer extent, coded-domain values
+    present in their domains. Returns a list of (table, rows, problems).
+    """
+    gdb = FileGDB(gdb_path)
+    domains = gdb.coded_value_domains()
+    report = []
+    for name in gdb.table_names(include_system=True):
+        try:
+            table = gdb.table(name)
+        except FileGDBError as e:
+            report.append((name, 0, [str(e)]))
+            continue
+        problems = []
+        with table:
+            field_domains = gdb.field_domains(name) if not name.startswith("GDB_") else {}
+            checked = [f for f in field_domains if f in table.field_names and field_domains[f] in domains]
+            n = 0
+            out_of_extent = 0
+            bad_codes = {}
+            cols = table.field_names
+            for row in table.rows(cols):
+                n += 1
+                values = dict(zip(cols, row))
+                if table.geometry_field and table.extent and values[table.geometry_field] is not None:
+                    xmin, ymin, xmax, ymax = table.extent
+                    g = values[table.geometry_field]
+                    pts = [g] if isinstance(g, tuple) else [p for part in g for p in part]
+                    tol = 1e-6 * max(1.0, abs(xmax - xmin), abs(ymax - ymin))
+                    if any(not (xmin - tol <= x <= xmax + tol and ymin - tol <= y <= ymax + tol) for x, y in pts):
+                        out_of_extent += 1
+                for f in checked:
+                    v = values[f]
+                    if v is not None and v not in domains[field_domains[f]]:
+                        bad_codes.setdefault(f, set()).add(v)
+            if n != table.row_count:
+                problems.append(f"decoded {n} rows, header says {table.row_count}")
+            if out_of_extent:
+                problems.append(f"{out_of_extent} geometries outside the layer extent")
+            for f, codes in bad_codes.items():
+                problems.append(f"{f}: {len(codes)} value(s) not in domain {field_domains[f]}")
+        report.append((name, n, problems))
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    for gdb_path in sys.argv[1:]:
+        print(gdb_path)
+        for name, n, problems in validate(gdb_path):
+            print(f"  {name}: {n} row(s){'' if not problems else ' - ' + '; '.join(problems)}")
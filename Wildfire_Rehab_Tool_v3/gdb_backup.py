@@ -0,0 +1,464 @@
+import hashlib
+import json
+import os
+import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import zstandard  # optional: faster / smaller blobs when installed
+except ImportError:
+    zstandard = None
+
+"""
+Incremental backups of a file geodatabase folder (used by 1.1)
+
+A file GDB is a plain folder of files (a0000000N.gdbtable / .gdbtablx / .atx /
+.gdbindexes / timestamps / gdb ...). An edit session only rewrites the files of the
+tables it touched, so instead of copying the whole GDB every time, delta_backup()
+hashes the files and copies only the ones whose content changed since the last
+snapshot:
+
+    <snapshots_dir>/
+        20240812T101500/          one folder per snapshot
+            manifest.json         every file of the GDB -> sha256, size, snapshot holding the bytes
+            a00000009.gdbtable    only the files that changed in this snapshot
+            ...
+
+Unchanged files are not copied again; the manifest points at the snapshot that already
+holds them. restore_snapshot() rebuilds a complete .gdb folder from any snapshot.
+
+Lock files (*.lock) belong to open ArcGIS sessions and are never backed up.
+
+The blob store (BlobStore / store_backup / restore) keeps many snapshots of many fires
+for the cost of their unique bytes: every file version is stored once, compressed,
+under its SHA-256, and a snapshot is just a manifest of (path -> hash):
+
+    <store_root>/
+        blobs/3f/3f9a...c1.zlib          (or .zst with zstandard installed)
+        snapshots/<fire_number>/<snapshot_id>.json
+
+parallel_copy() is the plain full-copy engine: the many small files of a GDB are copied
+by a bounded thread pool (a UNC share is latency-bound, not bandwidth-bound), hashed while
+they stream, and listed in a verification manifest next to the copy.
+"""
+
+MANIFEST = "manifest.json"
+_CHUNK = 1024 * 1024
+
+
+#############################################################################################
+# HASHING
+#############################################################################################
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_lock_file(name):
+    return name.lower().endswith(".lock")
+
+
+def has_lock_files(gdb):
+    """True if an ArcGIS session holds a lock on the GDB (*.lock files present)."""
+    return any(_is_lock_file(n) for _root, _dirs, files in os.walk(gdb) for n in files)
+
+
+def scan_gdb(gdb, previous=None, rehash=False):
+    """
+    {relative path: {"size", "mtime_ns", "sha256"}} for every file in the GDB folder.
+
+    previous: entries of the last snapshot; a file whose size and mtime are unchanged
+              keeps its previous hash instead of being read again (rehash=True reads all).
+    """
+    previous = previous or {}
+    entries = {}
+    for root, _dirs, files in os.walk(gdb):
+        for name in sorted(files):
+            if _is_lock_file(name):
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, gdb).replace(os.sep, "/")
+            st = os.stat(path)
+            prev = previous.get(rel)
+            if (not rehash and prev and prev["size"] == st.st_size
+                    and prev["mtime_ns"] == st.st_mtime_ns):
+                digest = prev["sha256"]
+            else:
+                digest = file_sha256(path)
+            entries[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return entries
+
+
+#############################################################################################
+# SNAPSHOTS
+#############################################################################################
+
+def list_snapshots(snapshots_dir):
+    """Snapshot ids (oldest first) that have a manifest."""
+    if not os.path.isdir(snapshots_dir):
+        return []
+    return sorted(
+        d for d in os.listdir(snapshots_dir)
+        if os.path.isfile(os.path.join(snapshots_dir, d, MANIFEST))
+    )
+
+
+def load_manifest(snapshots_dir, snapshot_id):
+    with open(os.path.join(snapshots_dir, snapshot_id, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _new_snapshot_id(snapshots_dir, suffix=""):
+    """Timestamp id not yet used in snapshots_dir (as a folder, or a file with `suffix`)."""
+    base = datetime.now().strftime("%Y%m%dT%H%M%S")
+    snapshot_id, i = base, 1
+    while os.path.exists(os.path.join(snapshots_dir, snapshot_id + suffix)):
+        snapshot_id = f"{base}_{i}"
+        i += 1
+    return snapshot_id
+
+
+def delta_backup(input_gdb, snapshots_dir, rehash=False):
+    """
+    Snapshot input_gdb into snapshots_dir, copying only files that changed since the
+    latest snapshot. Returns a dict with snapshot_id, files, copied_files, copied_bytes,
+    total_bytes.
+    """
+    if not os.path.isdir(input_gdb):
+        raise FileNotFoundError(f"Geodatabase folder not found: {input_gdb}")
+
+    existing = list_snapshots(snapshots_dir)
+    last = load_manifest(snapshots_dir, existing[-1]) if existing else None
+    last_files = last["files"] if last else {}
+
+    entries = scan_gdb(input_gdb, previous=last_files, rehash=rehash)
+
+    snapshot_id = _new_snapshot_id(snapshots_dir)
+    snap_dir = os.path.join(snapshots_dir, snapshot_id)
+    os.makedirs(snap_dir)
+
+    copied_files = copied_bytes = 0
+    for rel, entry in entries.items():
+        prev = last_files.get(rel)
+        if prev and prev["sha256"] == entry["sha256"]:
+            entry["stored_in"] = prev["stored_in"]
+            continue
+        dst = os.path.join(snap_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy2(os.path.join(input_gdb, *rel.split("/")), dst)
+        entry["stored_in"] = snapshot_id
+        copied_files += 1
+        copied_bytes += entry["size"]
+
+    manifest = {
+        "snapshot_id": snapshot_id,
+        "source": os.path.abspath(input_gdb),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "parent": existing[-1] if existing else None,
+        "files": entries,
+    }
+    # Manifest last: a snapshot without one is incomplete and is ignored by list_snapshots()
+    with open(os.path.join(snap_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return {
+        "snapshot_id": snapshot_id,
+        "files": len(entries),
+        "copied_files": copied_files,
+        "copied_bytes": copied_bytes,
+        "total_bytes": sum(e["size"] for e in entries.values()),
+    }
+
+
+def restore_snapshot(snapshots_dir, snapshot_id, out_gdb):
+    """Rebuild the complete .gdb folder of a snapshot at out_gdb (must not exist)."""
+    if os.path.exists(out_gdb):
+        raise FileExistsError(f"Restore target already exists: {out_gdb}")
+    manifest = load_manifest(snapshots_dir, snapshot_id)
+    os.makedirs(out_gdb)
+    for rel, entry in manifest["files"].items():
+        src = os.path.join(snapshots_dir, entry["stored_in"], *rel.split("/"))
+        dst = os.path.join(out_gdb, *rel.split("/"))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy2(src, dst)
+        if file_sha256(dst) != entry["sha256"]:
+            raise IOError(f"Checksum mismatch restoring {rel} from snapshot {entry['stored_in']}")
+    return out_gdb
+
+
+#############################################################################################
+# CONTENT-ADDRESSED STORE
+#############################################################################################
+
+_CODECS = ("zstd", "zlib")
+
+
+def default_codec():
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def _blob_ext(codec):
+    return ".zst" if codec == "zstd" else ".zlib"
+
+
+class BlobStore:
+    """Compressed file blobs keyed by the SHA-256 of their uncompressed bytes."""
+
+    def __init__(self, root, codec=None, level=None):
+        codec = codec or default_codec()
+        if codec not in _CODECS:
+            raise ValueError(f"Unknown codec '{codec}' (use one of {', '.join(_CODECS)})")
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("codec 'zstd' needs the zstandard package")
+        self.root = root
+        self.codec = codec
+        self.level = level if level is not None else (3 if codec == "zstd" else 6)
+
+    def _path(self, digest, codec):
+        return os.path.join(self.root, "blobs", digest[:2], digest + _blob_ext(codec))
+
+    def find(self, digest):
+        """(path, codec) of a stored blob, whatever codec wrote it, or None."""
+        for codec in _CODECS:
+            path = self._path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def put_file(self, path, digest):
+        """Store a file under its (already computed) digest. Returns stored bytes (0 if present)."""
+        if self.find(digest):
+            return 0
+        dst = self._path(digest, self.codec)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + ".tmp"
+        with open(path, "rb") as src, open(tmp, "wb") as out:
+            if self.codec == "zstd":
+                cctx = zstandard.ZstdCompressor(level=self.level)
+                cctx.copy_stream(src, out, read_size=_CHUNK, write_size=_CHUNK)
+            else:
+                comp = zlib.compressobj(self.level)
+                for chunk in iter(lambda: src.read(_CHUNK), b""):
+                    out.write(comp.compress(chunk))
+                out.write(comp.flush())
+        os.replace(tmp, dst)  # only complete blobs ever carry the final name
+        return os.path.getsize(dst)
+
+    def write_to(self, digest, dst):
+        """Decompress a blob into dst and check its hash. Returns the bytes written."""
+        found = self.find(digest)
+        if found is None:
+            raise FileNotFoundError(f"Blob {digest} is missing from {self.root}")
+        path, codec = found
+        h = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as src, open(dst, "wb") as out:
+            if codec == "zstd":
+                if zstandard is None:
+                    raise ImportError(f"Blob {digest} is zstd-compressed; install zstandard to restore it")
+                reader = zstandard.ZstdDecompressor().stream_reader(src)
+                chunks = iter(lambda: reader.read(_CHUNK), b"")
+            else:
+                decomp = zlib.decompressobj()
+                chunks = (decomp.decompress(c) for c in iter(lambda: src.read(_CHUNK), b""))
+            for data in chunks:
+                h.update(data)
+                out.write(data)
+                size += len(data)
+            if codec == "zlib":
+                tail = decomp.flush()
+                h.update(tail)
+                out.write(tail)
+                size += len(tail)
+        if h.hexdigest() != digest:
+            raise IOError(f"Checksum mismatch restoring blob {digest}")
+        return size
+
+
+def _store_snapshots_dir(store_root, fire_number):
+    return os.path.join(store_root, "snapshots", fire_number)
+
+
+def list_store_snapshots(store_root, fire_number):
+    """Snapshot ids (oldest first) of a fire in the store."""
+    folder = _store_snapshots_dir(store_root, fire_number)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.splitext(n)[0] for n in os.listdir(folder) if n.endswith(".json"))
+
+
+def load_store_manifest(store_root, fire_number, snapshot_id):
+    path = os.path.join(_store_snapshots_dir(store_root, fire_number), snapshot_id + ".json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def store_backup(input_gdb, store_root, fire_number, codec=None, rehash=False):
+    """
+    Snapshot input_gdb into the blob store. Only file versions the store has never seen
+    are compressed and written. Returns a dict with snapshot_id, files, new_blobs,
+    new_bytes (compressed), total_bytes.
+    """
+    if not os.path.isdir(input_gdb):
+        raise FileNotFoundError(f"Geodatabase folder not found: {input_gdb}")
+
+    store = BlobStore(store_root, codec=codec)
+    folder = _store_snapshots_dir(store_root, fire_number)
+    existing = list_store_snapshots(store_root, fire_number)
+    last = load_store_manifest(store_root, fire_number, existing[-1]) if existing else None
+
+    entries = scan_gdb(input_gdb, previous=last["files"] if last else None, rehash=rehash)
+
+    new_blobs = new_bytes = 0
+    for rel, entry in entries.items():
+        stored = store.put_file(os.path.join(input_gdb, *rel.split("/")), entry["sha256"])
+        if stored:
+            new_blobs += 1
+            new_bytes += stored
+
+    os.makedirs(folder, exist_ok=True)
+    snapshot_id = _new_snapshot_id(folder, ".json")
+    manifest = {
+        "snapshot_id": snapshot_id,
+        "fire_number": fire_number,
+        "source": os.path.abspath(input_gdb),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "parent": existing[-1] if existing else None,
+        "files": entries,
+    }
+    tmp = os.path.join(folder, snapshot_id + ".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(folder, snapshot_id + ".json"))
+
+    return {
+        "snapshot_id": snapshot_id,
+        "files": len(entries),
+        "new_blobs": new_blobs,
+        "new_bytes": new_bytes,
+        "total_bytes": sum(e["size"] for e in entries.values()),
+    }
+
+
+def restore(fire_number, snapshot_id, store_root, out_gdb):
+    """Rebuild the .gdb folder of a stored snapshot at out_gdb (must not exist)."""
+    if os.path.exists(out_gdb):
+        raise FileExistsError(f"Restore target already exists: {out_gdb}")
+    manifest = load_store_manifest(store_root, fire_number, snapshot_id)
+    store = BlobStore(store_root, codec="zlib")  # reading handles either codec
+    tmp = out_gdb + ".restoring"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for rel, entry in manifest["files"].items():
+        dst = os.path.join(tmp, *rel.split("/"))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        store.write_to(entry["sha256"], dst)
+    os.rename(tmp, out_gdb)
+    return out_gdb
+
+
+#############################################################################################
+# PARALLEL COPY
+#############################################################################################
+
+_COPY_BUFFER = 8 * 1024 * 1024
+
+
+def _copy_hashed(src, dst):
+    """Copy one file with large buffered reads, hashing the bytes on the way. Returns (size, sha256)."""
+    h = hashlib.sha256()
+    size = 0
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        for chunk in iter(lambda: fin.read(_COPY_BUFFER), b""):
+            h.update(chunk)
+            fout.write(chunk)
+            size += len(chunk)
+    shutil.copystat(src, dst)
+    return size, h.hexdigest()
+
+
+def manifest_path(gdb):
+    """Verification manifest written next to a copied GDB: <name>.gdb.manifest.json"""
+    return os.path.normpath(gdb) + ".manifest.json"
+
+
+def parallel_copy(src_gdb, dst_gdb, workers=8, verify=True):
+    """
+    Copy the GDB folder src_gdb to dst_gdb (replacing it) with `workers` threads.
+    The copy is built in dst_gdb + '.partial' and swapped in only when every file is
+    done (and, with verify=True, re-read and matched against the source hashes). The
+    previous dst_gdb is moved to dst_gdb + '.old' and deleted only after the swap.
+    Returns a dict with files, bytes, seconds and the manifest path.
+    """
+    if not os.path.isdir(src_gdb):
+        raise FileNotFoundError(f"Geodatabase folder not found: {src_gdb}")
+
+    rel_paths = []
+    for root, _dirs, files in os.walk(src_gdb):
+        for name in files:
+            if not _is_lock_file(name):
+                rel_paths.append(os.path.relpath(os.path.join(root, name), src_gdb).replace(os.sep, "/"))
+    rel_paths.sort()
+
+    partial = os.path.normpath(dst_gdb) + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    for rel in rel_paths:
+        os.makedirs(os.path.dirname(os.path.join(partial, *rel.split("/"))), exist_ok=True)
+
+    start = datetime.now()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            rel: pool.submit(_copy_hashed, os.path.join(src_gdb, *rel.split("/")),
+                             os.path.join(partial, *rel.split("/")))
+            for rel in rel_paths
+        }
+        files = {}
+        for rel in rel_paths:
+            size, digest = futures[rel].result()
+            files[rel] = {"size": size, "sha256": digest}
+
+        if verify:
+            checks = {rel: pool.submit(file_sha256, os.path.join(partial, *rel.split("/"))) for rel in rel_paths}
+            bad = [rel for rel in rel_paths if checks[rel].result() != files[rel]["sha256"]]
+            if bad:
+                shutil.rmtree(partial, ignore_errors=True)
+                raise IOError(f"Copy verification failed for: {', '.join(bad)}")
+
+    # Swap: the previous backup is only deleted once the new one is in place
+    old = os.path.normpath(dst_gdb) + ".old"
+    replacing = os.path.exists(dst_gdb)
+    if replacing:
+        shutil.rmtree(old, ignore_errors=True)
+        os.rename(dst_gdb, old)
+    try:
+        os.rename(partial, dst_gdb)
+    except OSError:
+        if replacing:
+            os.rename(old, dst_gdb)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+    manifest = {
+        "source": os.path.abspath(src_gdb),
+        "target": os.path.abspath(dst_gdb),
+        "created": start.isoformat(timespec="seconds"),
+        "verified": bool(verify),
+        "files": files,
+    }
+    with open(manifest_path(dst_gdb), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return {
+        "files": len(files),
+        "bytes": sum(e["size"] for e in files.values()),
+        "seconds": (datetime.now() - start).total_seconds(),
+        "manifest": manifest_path(dst_gdb),
+    }
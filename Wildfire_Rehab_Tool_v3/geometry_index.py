@@ -0,0 +1,248 @@
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from backends import arcpy
+import filegdb_reader
+
+"""
+Geometry fingerprint index of a target feature class (duplicate check for 2.1 / 3.1)
+
+Field crews often resend overlapping 'Layer NN.shp' exports; copying them again would
+double every feature. fingerprint() reduces a geometry to a 64-bit hash of its part count,
+vertex count and vertices snapped to a `tolerance` grid (in target units, metres in BC
+Albers). for_target() returns the set of fingerprints already in a target, so the copy
+steps skip a source feature with one set lookup:
+
+    index = geometry_index.for_target(tgt)
+    fp = index.fingerprint(geom)
+    if fp in index: skip
+    else: insert
+
+Only features that were in the target before the copy count as duplicates: coincident
+features within one export are all copied (copy_journal.copy_features adds the new
+fingerprints to the index once the copy is done).
+
+The index is kept next to the GDB ({fire_number}_Rehab_index\\<table>_<tolerance>.npz)
+and stamped with the (mtime, size) of the target's .gdbtable/.gdbtablx files. save()
+restamps it after our own inserts, and attribute_edits() after the attribute-only update
+steps (2.2 - 2.5, 3.2 - 3.4), which rewrite the table files but never a geometry; any
+other edit changes the stamp, and the index is rebuilt from the target on its next use.
+Targets outside a file GDB (memory, SDE) have no stamp and are fingerprinted again for
+every copy.
+
+Two vertices that differ by less than the tolerance but fall on different sides of a grid
+line get different fingerprints, so near-duplicates are not guaranteed to match; exact
+resends (the common case) always do.
+"""
+
+DEFAULT_TOLERANCE = 0.01
+INDEX_VERSION = 1
+
+_INDEXES = {}   # (target key, tolerance) -> GeometryIndex
+
+
+#############################################################################################
+# FINGERPRINTS
+#############################################################################################
+def _vertices(geom):
+    """(part count, [(x, y), ...]) of a point / polyline / polygon geometry."""
+    if geom.type == "point":
+        p = geom.firstPoint
+        return 1, [(p.X, p.Y)]
+    if geom.type == "multipoint":
+        xy = [(p.X, p.Y) for p in geom if p is not None]
+        return len(xy), xy
+    parts, xy = 0, []
+    for part in geom:
+        parts += 1
+        xy.extend((p.X, p.Y) for p in part if p is not None)
+    return parts, xy
+
+
+def fingerprint(geom, tolerance=DEFAULT_TOLERANCE):
+    """64-bit fingerprint of a geometry on a `tolerance` grid; None for null / empty geometries."""
+    if geom is None:
+        return None
+    parts, xy = _vertices(geom)
+    if not xy:
+        return None
+    grid = np.rint(np.asarray(xy, dtype="f8") / tolerance).astype("<i8")
+    digest = hashlib.blake2b(struct.pack("<II", parts, len(xy)) + grid.tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+#############################################################################################
+# INDEX
+#############################################################################################
+def _table_files(target):
+    """.gdbtable / .gdbtablx files of a file GDB feature class, or None."""
+    try:
+        gdb_path, name = filegdb_reader.split_fc_path(target)
+        table_file = filegdb_reader.open_gdb(gdb_path).table_path(name)[0]
+    except (filegdb_reader.FileGDBError, KeyError, OSError):
+        return None
+    return table_file, os.path.splitext(table_file)[0] + ".gdbtablx"
+
+
+def _stamp(files):
+    if files is None:
+        return None
+    stamp = []
+    for path in files:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp.append([st.st_mtime_ns, st.st_size])
+    return stamp
+
+
+def _index_file(target, tolerance):
+    gdb_path, name = filegdb_reader.split_fc_path(target)
+    folder = os.path.join(os.path.dirname(gdb_path), os.path.splitext(os.path.basename(gdb_path))[0] + "_index")
+    return os.path.join(folder, f"{name}_{tolerance:g}.npz")
+
+
+class GeometryIndex:
+    """Fingerprints of the features in one target."""
+
+    def __init__(self, target, tolerance=DEFAULT_TOLERANCE):
+        self.target = target
+        self.tolerance = tolerance
+        self.hashes = set()
+        self.stamp = None
+        self._files = _table_files(target)
+        self.path = _index_file(target, tolerance) if self._files else None
+
+    def fingerprint(self, geom):
+        return fingerprint(geom, self.tolerance)
+
+    def __contains__(self, fp):
+        return fp in self.hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, fp):
+        if fp is not None:
+            self.hashes.add(fp)
+
+    def current(self):
+        """True while nothing but our own inserts has changed the target since the stamp."""
+        return self.stamp is not None and self.stamp == _stamp(self._files)
+
+    def rebuild(self):
+        """Fingerprint every feature of the target (one geometry read)."""
+        self.hashes = set()
+        with arcpy.da.SearchCursor(self.target, ["SHAPE@"]) as cur:
+            for (geom,) in cur:
+                self.add(self.fingerprint(geom))
+        self.stamp = _stamp(self._files)
+
+    def load(self):
+        """Read the saved index; False if missing, unreadable or stale."""
+        if not self.path:
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(bytes(data["meta"]).decode("utf-8"))
+                if meta.get("version") != INDEX_VERSION or meta.get("stamp") != _stamp(self._files):
+                    return False
+                self.hashes = set(data["hashes"].tolist())
+                self.stamp = meta["stamp"]
+        except (OSError, ValueError, KeyError):
+            return False
+        return True
+
+    def save(self):
+        """Restamp after our own inserts and write the index (no-op outside a file GDB)."""
+        self.stamp = _stamp(self._files)
+        if not self.path or self.stamp is None:
+            return
+        meta = {"version": INDEX_VERSION, "target": str(self.target), "tolerance": self.tolerance,
+                "stamp": self.stamp}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp.npz"
+            np.savez(tmp, hashes=np.fromiter(self.hashes, dtype="<u8", count=len(self.hashes)),
+                     meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            arcpy.AddWarning(f"Could not save the geometry index {self.path}: {e}")
+
+
+def _key(target):
+    return os.path.normcase(os.path.normpath(str(target)))
+
+
+def for_target(target, tolerance=None):
+    """GeometryIndex of a target: in-process if still current, else the saved file, else rebuilt."""
+    tolerance = DEFAULT_TOLERANCE if tolerance is None else tolerance
+    if tolerance <= 0:
+        raise ValueError(f"Duplicate tolerance must be greater than 0, got {tolerance}.")
+    key = (_key(target), tolerance)
+    index = _INDEXES.get(key)
+    if index is not None and index.current():
+        return index
+
+    index = GeometryIndex(target, tolerance)
+    if index.load():
+        arcpy.AddMessage(f"Geometry index: {len(index)} feature(s) of {os.path.basename(str(target))} "
+                         f"loaded from {index.path}.")
+    else:
+        index.rebuild()
+        arcpy.AddMessage(f"Geometry index: fingerprinted {len(index)} feature(s) of "
+                         f"{os.path.basename(str(target))}.")
+    _INDEXES[key] = index
+    return index
+
+
+def invalidate(target=None):
+    """Forget in-process indexes (saved files are re-validated by their stamp anyway)."""
+    if target is None:
+        _INDEXES.clear()
+        return
+    key = _key(target)
+    for k in [k for k in _INDEXES if k[0] == key]:
+        del _INDEXES[k]
+
+
+def _current_indexes(target):
+    """Indexes of target (in-process or saved, any tolerance) that are current right now."""
+    key = _key(target)
+    current = {k[1]: index for k, index in _INDEXES.items() if k[0] == key and index.current()}
+    files = _table_files(target)
+    if files is None:
+        return list(current.values())
+    name = filegdb_reader.split_fc_path(target)[1]
+    folder = os.path.dirname(_index_file(target, DEFAULT_TOLERANCE))
+    for path in glob.glob(os.path.join(glob.escape(folder), glob.escape(name) + "_*.npz")):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                tolerance = json.loads(bytes(data["meta"]).decode("utf-8"))["tolerance"]
+        except (OSError, ValueError, KeyError):
+            continue
+        if tolerance in current:
+            continue
+        index = GeometryIndex(target, tolerance)
+        if index.path == path and index.load():
+            current[tolerance] = index
+    return list(current.values())
+
+
+@contextlib.contextmanager
+def attribute_edits(target):
+    """
+    Wrap edits that only change attributes of target: indexes that are current before
+    them are restamped and saved after them, so the next run can still load them.
+    """
+    current = _current_indexes(target)
+    yield
+    for index in current:
+        index.save()
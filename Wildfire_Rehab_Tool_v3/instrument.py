@@ -0,0 +1,299 @@
+import datetime
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+import backends
+from backends import arcpy
+
+"""
+Step instrumentation for the v3 tools
+
+Every numbered step (1.1 - 1.3, 2.1 - 2.5, 3.1 - 3.4, 4.1, 5, 5.1, 7) runs inside a
+span that records wall time, rows read / written through da cursors, cursors opened,
+catalog calls (Describe, ListFields, Exists, GetCount, ...) and other GP tool calls:
+
+    @instrument.step("2.1")
+    def copy_lines(...):
+
+    with instrument.span("2.2", "index source lines"):
+        ...
+
+Counting hooks into the backend proxy (backends.set_wrapper) only while a span is open,
+so code outside the steps runs on the bare backend. Spans nest; a parent's counts include
+its children's.
+
+A tool run brackets its steps with start_run() / finish_run(folder): finish_run prints a
+summary table and appends one JSON line per span to <folder>/tool_metrics.jsonl, next to
+the reports (reports_folder_for() finds <fire>\\Outputs\\Reports from a rehab GDB path).
+"""
+
+METRICS_FILE = "tool_metrics.jsonl"
+
+COUNTERS = ("rows_read", "rows_written", "cursors", "catalog_calls", "gp_calls")
+
+# Catalog reads (describe / list / count) vs GP tools that do work
+_CATALOG = {"Describe", "ListFields", "ListFeatureClasses", "ListTables", "ListDatasets", "ListDomains",
+            "ListWorkspaces", "ListFiles", "ListIndexes", "Exists", "GetCount", "TestSchemaLock"}
+_TOOLBOXES = {"management", "conversion", "analysis", "edit", "cartography"}
+_CURSORS = {"SearchCursor", "UpdateCursor", "InsertCursor"}
+
+_counts = dict.fromkeys(COUNTERS, 0)
+_records = []
+_open = 0
+_run = {"id": None, "tool": None}
+_wrapped = {}
+_seq = itertools.count()
+
+
+def _message(msg):
+    if backends.active() is not None:
+        arcpy.AddMessage(msg)
+    else:
+        print(msg)
+
+
+def _warning(msg):
+    if backends.active() is not None:
+        arcpy.AddWarning(msg)
+    else:
+        print(f"WARNING: {msg}", file=sys.stderr)
+
+
+#############################################################################################
+# COUNTING
+#############################################################################################
+class _CountingCursor:
+    """da cursor wrapper counting rows read (iteration) and written (update/insert/delete)."""
+
+    def __init__(self, cursor):
+        self._cur = cursor
+        _counts["cursors"] += 1
+
+    def __enter__(self):
+        self._cur.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+    def __iter__(self):
+        counts = _counts
+        for row in self._cur:
+            counts["rows_read"] += 1
+            yield row
+
+    def __next__(self):
+        row = next(self._cur)
+        _counts["rows_read"] += 1
+        return row
+
+    def updateRow(self, row):
+        self._cur.updateRow(row)
+        _counts["rows_written"] += 1
+
+    def deleteRow(self, *args):
+        self._cur.deleteRow(*args)
+        _counts["rows_written"] += 1
+
+    def insertRow(self, row):
+        oid = self._cur.insertRow(row)
+        _counts["rows_written"] += 1
+        return oid
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def count_cursor(cursor):
+    """Count a cursor that does not come through the backend proxy (e.g. filegdb_reader)."""
+    return _CountingCursor(cursor) if _open else cursor
+
+
+def _counted_call(fn, counter):
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        _counts[counter] += 1
+        return fn(*args, **kwargs)
+    return call
+
+
+def _cursor_factory(fn):
+    @functools.wraps(fn)
+    def open_cursor(*args, **kwargs):
+        return _CountingCursor(fn(*args, **kwargs))
+    return open_cursor
+
+
+def _to_numpy(fn):
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        arr = fn(*args, **kwargs)
+        _counts["cursors"] += 1
+        _counts["rows_read"] += len(arr)
+        return arr
+    return call
+
+
+class _CountingNamespace:
+    """arcpy.da / arcpy.management / ... with counted cursors and tool calls."""
+
+    def __init__(self, module, toolbox):
+        self._module = module
+        self._toolbox = toolbox
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if not callable(value) or isinstance(value, type) and issubclass(value, BaseException):
+            return value
+        if name in _CURSORS:
+            return _cursor_factory(value)
+        if name == "FeatureClassToNumPyArray":
+            return _to_numpy(value)
+        if name in _CATALOG:
+            return _counted_call(value, "catalog_calls")
+        if self._toolbox:
+            return _counted_call(value, "gp_calls")
+        return value
+
+
+def _wrap(name, value):
+    if name == "da" or name in _TOOLBOXES:
+        key = (name, id(value))
+        ns = _wrapped.get(key)
+        if ns is None:
+            ns = _wrapped[key] = _CountingNamespace(value, toolbox=name != "da")
+        return ns
+    if name in _CATALOG:
+        return _counted_call(value, "catalog_calls")
+    if "_" in name and name.rsplit("_", 1)[1] in _TOOLBOXES:   # Copy_management style
+        return _counted_call(value, "gp_calls")
+    return value
+
+
+#############################################################################################
+# SPANS
+#############################################################################################
+@contextmanager
+def span(step, name=""):
+    """Time and count one step. Yields the record (add extra keys to it if useful)."""
+    global _open
+    if _open == 0:
+        backends.set_wrapper(_wrap)
+    _open += 1
+    before = dict(_counts)
+    record = {"run": _run["id"], "tool": _run["tool"], "step": str(step), "name": name, "depth": _open - 1,
+              "seq": next(_seq), "start": datetime.datetime.now().isoformat(timespec="seconds")}
+    t0 = time.perf_counter()
+    try:
+        yield record
+        record["ok"] = True
+    except BaseException as e:
+        record["ok"] = False
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - t0, 4)
+        for c in COUNTERS:
+            record[c] = _counts[c] - before[c]
+        _records.append(record)
+        _open -= 1
+        if _open == 0:
+            backends.set_wrapper(None)
+
+
+def step(label):
+    """Decorator: run the function inside span(label, function name)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run_step(*args, **kwargs):
+            with span(label, fn.__name__):
+                return fn(*args, **kwargs)
+        return run_step
+    return decorate
+
+
+#############################################################################################
+# RUNS
+#############################################################################################
+def start_run(tool):
+    """Start collecting spans for one tool run (drops spans from earlier runs)."""
+    _records.clear()
+    _run["id"] = uuid.uuid4().hex[:12]
+    _run["tool"] = tool
+
+
+def records():
+    """Finished spans of the current run in start order (parents before their children)."""
+    return sorted(_records, key=lambda r: r["seq"])
+
+
+def summary_table(recs=None):
+    """Text lines: one row per span (children indented), total of the top-level spans."""
+    rows = records() if recs is None else sorted(recs, key=lambda r: r["seq"])
+    lines = [f"{'Step':<46} {'Time':>9} {'Read':>10} {'Written':>10} {'Cursors':>8} {'Catalog':>8} {'GP':>5}"]
+    for r in rows:
+        label = ("  " * r["depth"] + f"{r['step']} {r['name']}".strip())[:46]
+        flag = "" if r.get("ok", True) else "  FAILED"
+        lines.append(f"{label:<46} {r['seconds']:8.2f}s {r['rows_read']:>10,} {r['rows_written']:>10,} "
+                     f"{r['cursors']:>8,} {r['catalog_calls']:>8,} {r['gp_calls']:>5,}{flag}")
+    top = [r for r in rows if r["depth"] == 0]
+    if len(top) > 1:
+        total = {c: sum(r[c] for r in top) for c in COUNTERS}
+        lines.append(f"{'Total':<46} {sum(r['seconds'] for r in top):8.2f}s {total['rows_read']:>10,} "
+                     f"{total['rows_written']:>10,} {total['cursors']:>8,} {total['catalog_calls']:>8,} "
+                     f"{total['gp_calls']:>5,}")
+    return lines
+
+
+def write_jsonl(folder, recs=None):
+    """Append the spans to <folder>/tool_metrics.jsonl. Returns the path."""
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, METRICS_FILE)
+    with open(path, "a", encoding="utf-8") as f:
+        for r in (records() if recs is None else recs):
+            f.write(json.dumps(r, default=str) + "\n")
+    return path
+
+
+def finish_run(folder=None):
+    """Print the summary table; write the JSON lines if a folder is given. Never raises."""
+    if not _records:
+        return None
+    _message(f"Step timings ({_run['tool'] or 'tool run'}):")
+    for line in summary_table():
+        _message("  " + line)
+    if not folder:
+        return None
+    try:
+        path = write_jsonl(folder)
+    except OSError as e:
+        _warning(f"Could not write step metrics to {folder}: {e}")
+        return None
+    _message(f"Step metrics appended to {path}")
+    return path
+
+
+def reports_folder_for(dataset_or_layer):
+    """
+    Reports folder for a dataset in a rehab GDB: <fire>\\Outputs\\Reports when the GDB
+    sits in <fire>\\Data, else the folder holding the GDB. None for non-GDB paths.
+    """
+    path = dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer or "")
+    path = os.path.normpath(path)
+    while path and not path.lower().endswith(".gdb"):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    if not path:
+        return None
+    gdb_dir = os.path.dirname(path)
+    if os.path.basename(gdb_dir).lower() == "data":
+        return os.path.join(os.path.dirname(gdb_dir), "Outputs", "Reports")
+    return gdb_dir
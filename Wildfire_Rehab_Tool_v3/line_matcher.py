@@ -0,0 +1,97 @@
+import math
+
+"""
+Endpoint matcher for polylines (used by 2.2 / 2.3)
+
+Source lines are indexed by their projected first endpoint in a uniform grid whose
+cell size is the match tolerance, so a lookup only has to look at the 3x3 block of
+cells around the target endpoint (constant time on average, independent of the
+number of indexed lines).
+
+A source line matches a target line when BOTH endpoints are within `tolerance`
+(map units of the target spatial reference). The distance reported for a match is
+the larger of the two endpoint distances.
+"""
+
+# Smallest grid cell we allow (keeps tolerance=0 working as an exact match)
+_MIN_CELL = 0.001
+
+
+class LineMatcher:
+    """
+    Grid index over line endpoints.
+
+    tolerance:        max endpoint distance (target map units) for a match.
+    ignore_direction: if True, A->B also matches B->A.
+    """
+
+    def __init__(self, tolerance=0.01, ignore_direction=False):
+        if tolerance is None or tolerance < 0:
+            raise ValueError("LineMatcher tolerance must be >= 0.")
+        self.tolerance = float(tolerance)
+        self.ignore_direction = bool(ignore_direction)
+        self._cell = max(self.tolerance, _MIN_CELL)
+        self._grid = {}    # (cx, cy) -> [entry index, ...]
+        self._ends = []    # entry index -> (fx, fy, lx, ly)
+        self._values = []  # entry index -> payload
+
+    def __len__(self):
+        return len(self._ends)
+
+    def _cell_of(self, x, y):
+        return (math.floor(x / self._cell), math.floor(y / self._cell))
+
+    def add(self, first, last, value):
+        """Index a line by its (x, y) endpoints with an arbitrary payload."""
+        i = len(self._ends)
+        self._ends.append((first[0], first[1], last[0], last[1]))
+        self._values.append(value)
+        self._grid.setdefault(self._cell_of(first[0], first[1]), []).append(i)
+
+    def add_geometry(self, geom, value):
+        """Index an arcpy Polyline (already in the target spatial reference)."""
+        fp, lp = geom.firstPoint, geom.lastPoint
+        self.add((fp.X, fp.Y), (lp.X, lp.Y), value)
+
+    def _best(self, first, last, best_i, best_d):
+        """Nearest indexed line whose first endpoint is near `first` and last near `last`."""
+        tol = self.tolerance
+        cx, cy = self._cell_of(first[0], first[1])
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for i in self._grid.get((cx + dx, cy + dy), ()):
+                    fx, fy, lx, ly = self._ends[i]
+                    d = max(math.hypot(fx - first[0], fy - first[1]),
+                            math.hypot(lx - last[0], ly - last[1]))
+                    if d > tol:
+                        continue
+                    # Ties go to the line indexed last (same as a dict overwrite)
+                    if best_d is None or d < best_d or (d == best_d and i > best_i):
+                        best_i, best_d = i, d
+        return best_i, best_d
+
+    def match(self, first, last):
+        """
+        Return (value, distance) of the nearest indexed line, or None if no line
+        has both endpoints within tolerance.
+        """
+        best_i, best_d = self._best(first, last, None, None)
+        if self.ignore_direction:
+            best_i, best_d = self._best(last, first, best_i, best_d)
+        if best_i is None:
+            return None
+        return self._values[best_i], best_d
+
+    def match_geometry(self, geom):
+        """match() for an arcpy Polyline."""
+        fp, lp = geom.firstPoint, geom.lastPoint
+        return self.match((fp.X, fp.Y), (lp.X, lp.Y))
+
+
+def summarize_distances(distances) -> str:
+    """One-line summary of match distances for AddMessage."""
+    if not distances:
+        return "no matches"
+    exact = sum(1 for d in distances if d < _MIN_CELL)
+    return (f"{len(distances)} match(es), {exact} within {_MIN_CELL} "
+            f"(mean {sum(distances) / len(distances):.4f}, max {max(distances):.4f})")
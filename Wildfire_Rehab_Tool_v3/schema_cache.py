@@ -0,0 +1,170 @@
+import os
+from collections import namedtuple
+
+import backends
+from backends import arcpy
+import filegdb_reader
+
+"""
+Field schema / Describe cache shared by the v3 steps
+
+arcpy.ListFields and arcpy.Describe are catalog round-trips (slow over
+\\spatialfiles.bcgov UNC paths). get_schema() loads a dataset's fields once - name,
+type, length, domain - and describe() its shape type, spatial reference and extent;
+every later check is a dictionary lookup. Steps that touch the same dataset share the
+same FieldSchema / DatasetInfo, so each dataset is described once per tool run.
+
+Invalidate the cache whenever fields change (add_field() does this for you) or a GP
+tool (re)creates a dataset, call touched() after writing rows (the extent moves), and
+call invalidate() at the start of a tool run so a previous run in the same ArcGIS
+Pro session can't leak stale schemas.
+
+Fields come from the active data backend (see backends/); with no backend at all
+(headless report runs without arcpy) they come from filegdb_reader instead.
+"""
+
+FieldInfo = namedtuple("FieldInfo", ["name", "type", "length", "domain"])
+
+_SCHEMAS = {}
+_DESCRIBES = {}
+
+
+def _cache_key(dataset_or_layer) -> str:
+    """Normalized catalog path for a layer object or dataset path."""
+    path = dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer)
+    return os.path.normcase(os.path.normpath(path))
+
+
+class FieldSchema:
+    """Fields of one dataset, keyed case-insensitively."""
+
+    def __init__(self, dataset_or_layer):
+        if backends.active() is not None:
+            fields = arcpy.ListFields(dataset_or_layer)
+        else:
+            fields = filegdb_reader.list_fields(dataset_or_layer)
+        self.names = [f.name for f in fields]
+        self._fields = {
+            f.name.lower(): FieldInfo(f.name, f.type, f.length, f.domain or None)
+            for f in fields
+        }
+
+    def __contains__(self, field_name):
+        return field_name.lower() in self._fields
+
+    def get(self, field_name):
+        """FieldInfo for a field (case-insensitive), or None."""
+        return self._fields.get(field_name.lower())
+
+    def length(self, field_name):
+        f = self.get(field_name)
+        return f.length if f else None
+
+    def type(self, field_name):
+        f = self.get(field_name)
+        return f.type if f else None
+
+    def domain(self, field_name):
+        f = self.get(field_name)
+        return f.domain if f else None
+
+
+class DatasetInfo:
+    """
+    Describe() of one dataset: shape type, spatial reference, OID field, extent, field names.
+    Describes the catalog path, not the layer - selection-dependent properties (FIDSet)
+    must still come from arcpy.Describe(layer).
+    """
+
+    def __init__(self, dataset_or_layer):
+        self.path = dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer)
+        self._extent = None
+        if backends.active() is not None:
+            d = arcpy.Describe(self.path)
+            self.data_type = getattr(d, "dataType", None)
+            self.shape_type = getattr(d, "shapeType", None)
+            self.spatial_reference = getattr(d, "spatialReference", None)
+            self.oid_field = getattr(d, "OIDFieldName", None)
+        else:
+            d = filegdb_reader.describe(self.path)
+            self.data_type = "FeatureClass" if d.shape_type else "Table"
+            self.shape_type = d.shape_type
+            self.spatial_reference = d.spatial_reference
+            self.oid_field = "OBJECTID"
+            self._extent = d.extent
+
+    @property
+    def extent(self):
+        """Dataset extent, read on first use (dropped again by touched())."""
+        if self._extent is None:
+            if backends.active() is not None:
+                self._extent = arcpy.Describe(self.path).extent
+            else:
+                self._extent = filegdb_reader.describe(self.path).extent
+        return self._extent
+
+    @property
+    def fields(self):
+        return get_schema(self.path).names
+
+
+def describe(dataset_or_layer) -> DatasetInfo:
+    """Cached DatasetInfo for a dataset/layer (one Describe call per dataset)."""
+    key = _cache_key(dataset_or_layer)
+    info = _DESCRIBES.get(key)
+    if info is None:
+        info = DatasetInfo(dataset_or_layer)
+        _DESCRIBES[key] = info
+    return info
+
+
+def shape_type(dataset_or_layer) -> str:
+    return describe(dataset_or_layer).shape_type
+
+
+def spatial_reference(dataset_or_layer):
+    return describe(dataset_or_layer).spatial_reference
+
+
+def oid_field(dataset_or_layer) -> str:
+    return describe(dataset_or_layer).oid_field
+
+
+def get_schema(dataset_or_layer) -> FieldSchema:
+    """Cached FieldSchema for a dataset/layer (one ListFields call per dataset)."""
+    key = _cache_key(dataset_or_layer)
+    schema = _SCHEMAS.get(key)
+    if schema is None:
+        schema = FieldSchema(dataset_or_layer)
+        _SCHEMAS[key] = schema
+    return schema
+
+
+def field_names(dataset_or_layer) -> list:
+    """Field names in dataset order (for membership tests use get_schema(), it hashes)."""
+    return get_schema(dataset_or_layer).names
+
+
+def invalidate(dataset_or_layer=None):
+    """Drop one dataset from the cache, or everything if no dataset is given."""
+    if dataset_or_layer is None:
+        _SCHEMAS.clear()
+        _DESCRIBES.clear()
+    else:
+        key = _cache_key(dataset_or_layer)
+        _SCHEMAS.pop(key, None)
+        _DESCRIBES.pop(key, None)
+
+
+def touched(dataset_or_layer):
+    """Rows were written to a dataset: its cached extent is stale (schema still good)."""
+    info = _DESCRIBES.get(_cache_key(dataset_or_layer))
+    if info is not None:
+        info._extent = None
+
+
+def add_field(dataset, *args, **kwargs):
+    """arcpy.management.AddField that keeps the cache in sync."""
+    result = arcpy.management.AddField(dataset, *args, **kwargs)
+    invalidate(dataset)
+    return result
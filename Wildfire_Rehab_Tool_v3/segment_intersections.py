@@ -0,0 +1,411 @@
+import heapq
+import math
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+Line intersection engine for step 5 (self-intersecting / crossing lines)
+
+Works on plain coordinates instead of arcpy geometries:
+    features = [(oid, parts), ...]      parts = [[(x, y), (x, y), ...], ...]
+
+SELF: each feature's segments go through a plane sweep: segments are sorted by their
+left x, an active set (heap keyed on right x) drops segments the sweep line has passed,
+and only segments whose y-ranges also overlap get an exact intersection test.
+
+CROSS: feature envelopes are bucketed in a uniform grid (cell size picked from the data)
+and only features sharing a cell become candidate pairs; each candidate pair is then swept
+like a single feature. On sparse incident line work this is close to linear instead of the
+O(n^2) feature pairs of the arcpy scan.
+
+Output rules follow the arcpy scan in task05:
+- SELF:  pairs of non-adjacent segments (j > i + 1) of the same feature; with
+         ignore_touches a pair that only meets at a segment endpoint is skipped.
+- CROSS: every contact point between two features; with ignore_touches a feature pair
+         is skipped when all contacts are on a line end (part endpoint) of either
+         feature and nothing overlaps (arcpy's Polyline.touches()).
+`tolerance` plays the role of the XY tolerance (map units).
+
+With workers > 1 the SELF checks are split into feature chunks and the CROSS candidate
+pairs into spatial tiles, and both run in a process pool. Workers only get coordinate
+lists, and results are merged back in the serial order, so the rows are identical.
+"""
+
+SELF = "SELF"
+CROSS = "CROSS"
+
+
+#############################################################################################
+# SEGMENTS
+#############################################################################################
+
+def _feature_segments(parts):
+    """Segments of a feature, numbered across parts the same way task05 numbers them."""
+    segs = []
+    for pts in parts:
+        for a, b in zip(pts, pts[1:]):
+            segs.append((a[0], a[1], b[0], b[1]))
+    return segs
+
+
+def _line_ends(parts, tolerance):
+    """
+    Boundary of a polyline: part endpoints that occur an odd number of times (mod-2 rule,
+    so closed parts and part-to-part joins are not boundary). Returned as snapped keys.
+    """
+    counts = {}
+    for pts in parts:
+        if len(pts) < 2:
+            continue
+        for p in (pts[0], pts[-1]):
+            k = _snap(p[0], p[1], tolerance)
+            counts[k] = counts.get(k, 0) + 1
+    return {k for k, c in counts.items() if c % 2 == 1}
+
+
+def _snap(x, y, tolerance):
+    return (round(x / tolerance), round(y / tolerance))
+
+
+def _on_line_end(x, y, ends, tolerance):
+    """True if (x, y) snaps onto (or next to) one of the snapped line ends."""
+    kx, ky = _snap(x, y, tolerance)
+    return any((kx + dx, ky + dy) in ends for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+def _near(x, y, px, py, tolerance):
+    return abs(x - px) <= tolerance and abs(y - py) <= tolerance
+
+
+def segment_intersection(s, t, tolerance=0.001):
+    """
+    Intersection of two segments (ax, ay, bx, by).
+    Returns (points, overlap): [] if disjoint, one point for a crossing/touch, or the two
+    ends of the shared stretch when the segments are collinear and overlap.
+    """
+    ax, ay, bx, by = s
+    cx, cy, dx, dy = t
+    rx, ry = bx - ax, by - ay
+    sx, sy = dx - cx, dy - cy
+    len_r = math.hypot(rx, ry)
+    len_s = math.hypot(sx, sy)
+    if len_r == 0 or len_s == 0:
+        return [], False
+
+    qx, qy = cx - ax, cy - ay
+    denom = rx * sy - ry * sx
+
+    if abs(denom) <= 1e-12 * len_r * len_s:
+        # Parallel: only collinear segments can meet
+        if abs(qx * ry - qy * rx) / len_r > tolerance:
+            return [], False
+        rr = len_r * len_r
+        t0 = (qx * rx + qy * ry) / rr
+        t1 = t0 + (sx * rx + sy * ry) / rr
+        lo, hi = max(0.0, min(t0, t1)), min(1.0, max(t0, t1))
+        tol_t = tolerance / len_r
+        if lo > hi + tol_t:
+            return [], False
+        p_lo = (ax + lo * rx, ay + lo * ry)
+        if hi - lo <= tol_t:
+            return [p_lo], False
+        return [p_lo, (ax + hi * rx, ay + hi * ry)], True
+
+    t_r = (qx * sy - qy * sx) / denom
+    t_s = (qx * ry - qy * rx) / denom
+    tol_r = tolerance / len_r
+    tol_s = tolerance / len_s
+    if t_r < -tol_r or t_r > 1 + tol_r or t_s < -tol_s or t_s > 1 + tol_s:
+        return [], False
+
+    t_r = min(max(t_r, 0.0), 1.0)
+    return [(ax + t_r * rx, ay + t_r * ry)], False
+
+
+def _touches_at_end(p, s, t, tolerance):
+    """True if p is an endpoint of segment s or t (segment-level touches())."""
+    x, y = p
+    return (_near(x, y, s[0], s[1], tolerance) or _near(x, y, s[2], s[3], tolerance) or
+            _near(x, y, t[0], t[1], tolerance) or _near(x, y, t[2], t[3], tolerance))
+
+
+#############################################################################################
+# SWEEP
+#############################################################################################
+
+def sweep_pairs(boxes):
+    """
+    Yield (i, j), i < j, for every pair of boxes (xmin, ymin, xmax, ymax) that overlap.
+    Boxes are visited by xmin; the heap holds boxes whose xmax the sweep hasn't passed.
+    """
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0])
+    active = []
+    for i in order:
+        xmin, ymin, xmax, ymax = boxes[i]
+        while active and active[0][0] < xmin:
+            heapq.heappop(active)
+        for _xmax, j in active:
+            b = boxes[j]
+            if b[1] <= ymax and ymin <= b[3]:
+                yield (i, j) if i < j else (j, i)
+        heapq.heappush(active, (xmax, i))
+
+
+def _grid_cell_size(boxes, tolerance):
+    """
+    Cell size for grid_pairs(): the median envelope size, but never so small that the
+    data extent would need more than ~1024 cells on a side.
+    """
+    sizes = sorted(max(b[2] - b[0], b[3] - b[1]) for b in boxes)
+    cell = sizes[len(sizes) // 2]
+    span = max(max(b[2] for b in boxes) - min(b[0] for b in boxes),
+               max(b[3] for b in boxes) - min(b[1] for b in boxes))
+    return max(cell, span / 1024.0, tolerance, 1e-9)
+
+
+def grid_pairs(boxes, cell=None, tolerance=0.0):
+    """
+    Yield (i, j), i < j, for every pair of overlapping boxes (xmin, ymin, xmax, ymax),
+    using a uniform grid: only boxes that share a cell are compared. A pair is reported
+    once, by the cell holding the lower-left corner of the two boxes' overlap.
+    """
+    if not boxes:
+        return
+    if cell is None:
+        cell = _grid_cell_size(boxes, tolerance)
+
+    grid = {}
+    for i, (xmin, ymin, xmax, ymax) in enumerate(boxes):
+        for cx in range(math.floor(xmin / cell), math.floor(xmax / cell) + 1):
+            for cy in range(math.floor(ymin / cell), math.floor(ymax / cell) + 1):
+                grid.setdefault((cx, cy), []).append(i)
+
+    for (cx, cy), members in grid.items():
+        for a in range(len(members)):
+            i = members[a]
+            bi = boxes[i]
+            for b in range(a + 1, len(members)):
+                j = members[b]
+                bj = boxes[j]
+                if bi[0] > bj[2] or bj[0] > bi[2] or bi[1] > bj[3] or bj[1] > bi[3]:
+                    continue
+                # Report the pair only from the cell owning the overlap's min corner
+                if (math.floor(max(bi[0], bj[0]) / cell) != cx or
+                        math.floor(max(bi[1], bj[1]) / cell) != cy):
+                    continue
+                yield (i, j)  # members are appended in index order, so i < j
+
+
+def _envelope(parts, tolerance):
+    xs = [p[0] for pts in parts for p in pts]
+    ys = [p[1] for pts in parts for p in pts]
+    return (min(xs) - tolerance, min(ys) - tolerance, max(xs) + tolerance, max(ys) + tolerance)
+
+
+def _segment_boxes(segs, tolerance):
+    return [
+        (min(s[0], s[2]) - tolerance, min(s[1], s[3]) - tolerance,
+         max(s[0], s[2]) + tolerance, max(s[1], s[3]) + tolerance)
+        for s in segs
+    ]
+
+
+#############################################################################################
+# ENGINE
+#############################################################################################
+
+def _self_rows(features, ignore_touches, tolerance):
+    """SELF rows for `features`, sweeping each feature on its own."""
+    rows = []
+    for oid, parts in features:
+        segs = _feature_segments(parts)
+        hits = []
+        for a, b in sweep_pairs(_segment_boxes(segs, tolerance)):
+            if b == a + 1:
+                continue  # neighbours share a vertex
+            pts, overlap = segment_intersection(segs[a], segs[b], tolerance)
+            if not pts:
+                continue
+            if ignore_touches and not overlap and _touches_at_end(pts[0], segs[a], segs[b], tolerance):
+                continue
+            hits.append((a, b, pts))
+        hits.sort(key=lambda h: (h[0], h[1]))
+        for _a, _b, pts in hits:
+            for x, y in pts:
+                rows.append((x, y, oid, oid, SELF))
+    return rows
+
+
+def _candidate_pairs(features, tolerance):
+    """
+    Feature index pairs (fa, fb) whose envelopes overlap (grid_pairs()), plus the
+    envelopes themselves (indexed like `features`, None for empty features).
+    """
+    present = [fi for fi, (_oid, parts) in enumerate(features) if any(len(p) > 1 for p in parts)]
+    envelopes = [None] * len(features)
+    for fi in present:
+        envelopes[fi] = _envelope(features[fi][1], tolerance)
+    pairs = [(present[a], present[b]) for a, b in grid_pairs([envelopes[fi] for fi in present], tolerance=tolerance)]
+    return pairs, envelopes
+
+
+def _pair_contacts(parts_by_index, pairs, tolerance):
+    """Segment contacts for feature pairs: {(fa, fb): [(points, overlap), ...]}."""
+    feature_segs = {}
+    seg_boxes = {}
+    for fi in {f for pair in pairs for f in pair}:
+        feature_segs[fi] = _feature_segments(parts_by_index[fi])
+        seg_boxes[fi] = _segment_boxes(feature_segs[fi], tolerance)
+
+    contacts = {}
+    for fa, fb in pairs:
+        segs = feature_segs[fa] + feature_segs[fb]
+        split = len(feature_segs[fa])
+        for i, j in sweep_pairs(seg_boxes[fa] + seg_boxes[fb]):
+            if (i < split) == (j < split):
+                continue  # same feature; SELF is handled separately
+            pts, overlap = segment_intersection(segs[i], segs[j], tolerance)
+            if pts:
+                contacts.setdefault((fa, fb), []).append((pts, overlap))
+    return contacts
+
+
+def find_intersections(features, ignore_touches=True, tolerance=0.001, stats=None, workers=1):
+    """
+    SELF and CROSS intersection points of `features`.
+    Returns rows (x, y, oid1, oid2, type): SELF rows first, in feature order then
+    segment-pair order; CROSS rows after, in feature-pair order.
+    Pass a dict as `stats` to get candidate / contact / reported pair counts back.
+    workers > 1 runs the scan in a process pool (same rows).
+    """
+    pairs, envelopes = _candidate_pairs(features, tolerance)
+
+    if workers and workers > 1 and len(features) > 1:
+        self_rows, contacts = _scan_parallel(features, pairs, envelopes, ignore_touches, tolerance, workers)
+    else:
+        self_rows = _self_rows(features, ignore_touches, tolerance)
+        contacts = _pair_contacts({fi: parts for fi, (_oid, parts) in enumerate(features)}, pairs, tolerance)
+
+    cross = _cross_rows(features, contacts, ignore_touches, tolerance)
+    rows = self_rows + cross
+
+    if stats is not None:
+        stats["features"] = len(features)
+        stats["candidate_pairs"] = len(pairs)
+        stats["contact_pairs"] = len(contacts)
+        stats["cross_pairs"] = len({(r[2], r[3]) for r in cross})
+        stats["self_points"] = len(self_rows)
+        stats["cross_points"] = len(cross)
+    return rows
+
+
+#############################################################################################
+# PARALLEL
+#############################################################################################
+
+def configure_multiprocessing():
+    """
+    Inside ArcGIS Pro sys.executable is ArcGISPro.exe, which can't host pool workers;
+    point multiprocessing at the environment's pythonw.exe instead.
+    """
+    exe = os.path.basename(sys.executable).lower()
+    if exe.startswith("arcgispro"):
+        pythonw = os.path.join(sys.exec_prefix, "pythonw.exe")
+        if os.path.exists(pythonw):
+            multiprocessing.set_executable(pythonw)
+
+
+def _tile_pairs(pairs, envelopes, n_tiles):
+    """
+    Group candidate pairs into about n_tiles spatial tiles (by the lower-left corner of
+    the two envelopes' overlap). Returns the non-empty groups in tile order.
+    """
+    boxes = [envelopes[f] for pair in pairs for f in pair]
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    span = max(max(b[2] for b in boxes) - x0, max(b[3] for b in boxes) - y0, 1e-9)
+    side = max(1, math.ceil(math.sqrt(n_tiles)))
+    size = span / side
+
+    tiles = {}
+    for fa, fb in pairs:
+        ea, eb = envelopes[fa], envelopes[fb]
+        tx = min(side - 1, int((max(ea[0], eb[0]) - x0) / size))
+        ty = min(side - 1, int((max(ea[1], eb[1]) - y0) / size))
+        tiles.setdefault((tx, ty), []).append((fa, fb))
+    return [tiles[k] for k in sorted(tiles)]
+
+
+def _self_task(args):
+    features, ignore_touches, tolerance = args
+    return _self_rows(features, ignore_touches, tolerance)
+
+
+def _cross_task(args):
+    parts_by_index, pairs, tolerance = args
+    return _pair_contacts(parts_by_index, pairs, tolerance)
+
+
+def _scan_parallel(features, pairs, envelopes, ignore_touches, tolerance, workers):
+    """SELF by feature chunk and CROSS by tile in a process pool; merged in serial order."""
+    n_chunks = workers * 4  # a few chunks per worker evens out uneven features
+    size = max(1, math.ceil(len(features) / n_chunks))
+    self_jobs = [(features[i:i + size], ignore_touches, tolerance) for i in range(0, len(features), size)]
+
+    cross_jobs = []
+    if pairs:
+        for tile in _tile_pairs(pairs, envelopes, n_chunks):
+            used = {f for pair in tile for f in pair}
+            cross_jobs.append(({fi: features[fi][1] for fi in used}, tile, tolerance))
+
+    configure_multiprocessing()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        self_futures = [pool.submit(_self_task, job) for job in self_jobs]
+        cross_futures = [pool.submit(_cross_task, job) for job in cross_jobs]
+
+        self_rows = []
+        for fut in self_futures:  # chunk order == feature order
+            self_rows.extend(fut.result())
+
+        # Each pair lives in exactly one tile, so the dicts don't overlap
+        contacts = {}
+        for fut in cross_futures:
+            contacts.update(fut.result())
+
+    return self_rows, contacts
+
+
+def _cross_rows(features, contacts, ignore_touches, tolerance):
+    """Turn per-feature-pair contacts into CROSS rows (applies the touches() rule)."""
+    rows = []
+    ends_cache = {}
+
+    def ends(fi):
+        if fi not in ends_cache:
+            ends_cache[fi] = _line_ends(features[fi][1], tolerance)
+        return ends_cache[fi]
+
+    for fa, fb in sorted(contacts):
+        found = contacts[(fa, fb)]
+
+        if ignore_touches and not any(overlap for _pts, overlap in found):
+            boundary = ends(fa) | ends(fb)
+            if all(_on_line_end(x, y, boundary, tolerance) for pts, _o in found for x, y in pts):
+                continue
+
+        # One row per distinct contact point (arcpy returns a multipoint); sorting first
+        # keeps the result independent of the order the segment pairs were tested in
+        seen = set()
+        points = []
+        for x, y in sorted(p for pts, _overlap in found for p in pts):
+            k = _snap(x, y, tolerance)
+            if k not in seen:
+                seen.add(k)
+                points.append((x, y))
+
+        oid1, oid2 = features[fa][0], features[fb][0]
+        for x, y in points:
+            rows.append((x, y, oid1, oid2, CROSS))
+    return rows
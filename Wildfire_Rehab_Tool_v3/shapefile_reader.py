@@ -0,0 +1,340 @@
+import datetime
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import namedtuple
+
+"""
+Read-only shapefile reader (.shp / .shx / .dbf / .prj / .cpg), standard library only
+
+Collected data in Data/Incoming is read straight from the files, memory-mapped, with no
+arcpy session and no cursor overhead:
+
+    with ShapefileReader(r"...\\Incoming\\Layer 32.shp") as shp:
+        x, y, rec = shp.xy()                     # point layers: coordinate arrays
+        ends = shp.line_ends()                   # line layers: (first, last) per record
+        rows = shp.records(["sym_name", "Comments"])
+
+Coordinates come back as array('d') (usable as NumPy arrays without a copy). Text is
+decoded with the .cpg code page (UTF-8 if there is none, like ArcGIS Pro writes).
+
+open_for_target() decides whether a source can be matched against a target without
+arcpy: it must be a .shp path (a layer may carry a selection), and its coordinates
+must either already be in the target spatial reference or be WGS84 going to BC Albers
+(projected with albers.forward()).
+"""
+
+DbfField = namedtuple("DbfField", ["name", "type", "length", "decimals"])
+
+NULL, POINT, POLYLINE, POLYGON, MULTIPOINT = 0, 1, 3, 5, 8
+
+# Z and M variants share the XY layout of the plain types
+_BASE_TYPE = {0: NULL, 1: POINT, 3: POLYLINE, 5: POLYGON, 8: MULTIPOINT,
+              11: POINT, 13: POLYLINE, 15: POLYGON, 18: MULTIPOINT,
+              21: POINT, 23: POLYLINE, 25: POLYGON, 28: MULTIPOINT}
+
+SHAPE_TYPE_NAMES = {NULL: "Null", POINT: "Point", POLYLINE: "Polyline",
+                    POLYGON: "Polygon", MULTIPOINT: "Multipoint"}
+
+
+def _codec_from_cpg(text):
+    """'UTF-8' / '65001' / '1252' / 'ISO 88591' -> a Python codec name."""
+    text = text.strip()
+    if not text:
+        return "utf-8"
+    if text.isdigit():
+        return "utf-8" if text == "65001" else f"cp{text}"
+    name = text.lower().replace(" ", "")
+    if name.startswith("iso8859") and "-" not in name[7:]:
+        name = "iso8859-" + name[7:]
+    return name
+
+
+def _sidecar(path, ext):
+    """Sidecar file next to the .shp, matching either extension case."""
+    base = os.path.splitext(path)[0]
+    for candidate in (base + ext, base + ext.upper()):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+class ShapefileReader:
+    """Memory-mapped reader for one shapefile. Use as a context manager or call close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self._files = []
+        self._shp = self._map(path)
+        shx_path = _sidecar(path, ".shx")
+        dbf_path = _sidecar(path, ".dbf")
+        if shx_path is None or dbf_path is None:
+            raise FileNotFoundError(f"Shapefile is missing its .shx or .dbf: {path}")
+        self._shx = self._map(shx_path)
+        self._dbf = self._map(dbf_path)
+
+        file_code, = struct.unpack_from(">i", self._shp, 0)
+        if file_code != 9994:
+            raise ValueError(f"Not a shapefile: {path}")
+        raw_type, = struct.unpack_from("<i", self._shp, 32)
+        if raw_type not in _BASE_TYPE:
+            raise ValueError(f"Unsupported shape type {raw_type}: {path}")
+        self.raw_shape_type = raw_type
+        self.shape_type = _BASE_TYPE[raw_type]
+        self.bbox = struct.unpack_from("<4d", self._shp, 36)
+
+        # .shx: 100-byte header, then (offset, length) per record in 16-bit words
+        n = (len(self._shx) - 100) // 8
+        index = array("i", self._shx[100:100 + 8 * n])
+        if struct.pack("=i", 1) != struct.pack(">i", 1):
+            index.byteswap()  # big-endian on disk
+        self._offsets = [2 * index[2 * i] for i in range(n)]
+
+        prj_path = _sidecar(path, ".prj")
+        cpg_path = _sidecar(path, ".cpg")
+        self.prj = open(prj_path, "r", encoding="ascii", errors="replace").read().strip() if prj_path else None
+        self.encoding = _codec_from_cpg(open(cpg_path, "r", encoding="ascii").read()) if cpg_path else "utf-8"
+
+        self._read_dbf_header()
+
+    def _map(self, path):
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for m in (self._shp, self._shx, self._dbf):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def shape_type_name(self):
+        return SHAPE_TYPE_NAMES[self.shape_type]
+
+    # -----------------------------
+    # Spatial reference
+    # -----------------------------
+    def is_geographic(self):
+        return bool(self.prj) and self.prj.upper().startswith("GEOGCS")
+
+    def coordinate_system_name(self):
+        """Name of the outermost PROJCS / GEOGCS in the .prj, or None."""
+        m = re.match(r'\s*(?:PROJCS|GEOGCS)\["([^"]+)"', self.prj or "")
+        return m.group(1) if m else None
+
+    # -----------------------------
+    # Geometry
+    # -----------------------------
+    def _record_type(self, off):
+        t, = struct.unpack_from("<i", self._shp, off + 8)
+        return _BASE_TYPE.get(t, NULL)
+
+    def shape(self, i):
+        """
+        Geometry of record i: None (null shape), (x, y) for points, or a list of parts
+        ([(x, y), ...] each) for polylines / polygons / multipoints.
+        """
+        off = self._offsets[i]
+        t = self._record_type(off)
+        if t == NULL:
+            return None
+        if t == POINT:
+            return struct.unpack_from("<2d", self._shp, off + 12)
+        if t == MULTIPOINT:
+            n, = struct.unpack_from("<i", self._shp, off + 44)
+            xy = struct.unpack_from(f"<{2 * n}d", self._shp, off + 48)
+            return [list(zip(xy[0::2], xy[1::2]))]
+        n_parts, n_points = struct.unpack_from("<2i", self._shp, off + 44)
+        starts = struct.unpack_from(f"<{n_parts}i", self._shp, off + 52)
+        xy = struct.unpack_from(f"<{2 * n_points}d", self._shp, off + 52 + 4 * n_parts)
+        pts = list(zip(xy[0::2], xy[1::2]))
+        bounds = list(starts) + [n_points]
+        return [pts[bounds[k]:bounds[k + 1]] for k in range(n_parts)]
+
+    def xy(self):
+        """
+        Point layers: (x, y, record) arrays for every non-null point; record[i] is the
+        record number of point i (to line up with records()).
+        """
+        if self.shape_type != POINT:
+            raise ValueError(f"xy() needs a point shapefile, not {self.shape_type_name}: {self.path}")
+        xs, ys, rec = array("d"), array("d"), array("l")
+        unpack = struct.Struct("<i2d").unpack_from
+        for i, off in enumerate(self._offsets):
+            t, x, y = unpack(self._shp, off + 8) if off + 28 <= len(self._shp) else (0, 0.0, 0.0)
+            if _BASE_TYPE.get(t, NULL) != POINT:
+                continue
+            xs.append(x)
+            ys.append(y)
+            rec.append(i)
+        return xs, ys, rec
+
+    def line_ends(self):
+        """
+        Line layers: [(first (x, y), last (x, y)) or None] per record - the first vertex of
+        the first part and the last vertex of the last part, like arcpy firstPoint / lastPoint.
+        """
+        if self.shape_type != POLYLINE:
+            raise ValueError(f"line_ends() needs a polyline shapefile, not {self.shape_type_name}: {self.path}")
+        out = []
+        head = struct.Struct("<2i").unpack_from
+        pt = struct.Struct("<2d").unpack_from
+        for off in self._offsets:
+            if self._record_type(off) == NULL:
+                out.append(None)
+                continue
+            n_parts, n_points = head(self._shp, off + 44)
+            if n_points == 0:
+                out.append(None)
+                continue
+            base = off + 52 + 4 * n_parts
+            out.append((pt(self._shp, base), pt(self._shp, base + 16 * (n_points - 1))))
+        return out
+
+    def line_end_arrays(self):
+        """
+        line_ends() as arrays for non-null lines: (first_x, first_y, last_x, last_y, record).
+        """
+        fx, fy, lx, ly, rec = array("d"), array("d"), array("d"), array("d"), array("l")
+        for i, ends in enumerate(self.line_ends()):
+            if ends is None:
+                continue
+            (ax, ay), (bx, by) = ends
+            fx.append(ax)
+            fy.append(ay)
+            lx.append(bx)
+            ly.append(by)
+            rec.append(i)
+        return fx, fy, lx, ly, rec
+
+    # -----------------------------
+    # Attributes
+    # -----------------------------
+    def _read_dbf_header(self):
+        dbf = self._dbf
+        self._n_dbf, self._dbf_header_len, self._dbf_record_len = struct.unpack_from("<IHH", dbf, 4)
+        fields = []
+        pos = 32
+        offset = 1  # byte 0 of each record is the deletion flag
+        self._field_offsets = {}
+        while pos < self._dbf_header_len - 1 and dbf[pos] != 0x0D:
+            name = bytes(dbf[pos:pos + 11]).split(b"\0", 1)[0].decode("ascii", "replace")
+            ftype = chr(dbf[pos + 11])
+            length, decimals = dbf[pos + 16], dbf[pos + 17]
+            fields.append(DbfField(name, ftype, length, decimals))
+            self._field_offsets[name.lower()] = (offset, len(fields) - 1)
+            offset += length
+            pos += 32
+        self.fields = fields
+
+    @property
+    def field_names(self):
+        return [f.name for f in self.fields]
+
+    def _decoder(self, field):
+        enc = self.encoding
+        if field.type in ("C", "M"):
+            return lambda b: b.decode(enc, "replace").rstrip(" \0")  # shapefiles have no text nulls
+        if field.type in ("N", "F"):
+            as_int = field.type == "N" and field.decimals == 0
+
+            def number(b):
+                s = b.strip(b" \0*")
+                if not s:
+                    return None
+                try:
+                    return int(s) if as_int else float(s)
+                except ValueError:
+                    return float(s) if as_int else None
+            return number
+        if field.type == "D":
+            def date(b):
+                s = b.strip()
+                if len(s) != 8 or not s.isdigit():
+                    return None
+                return datetime.datetime(int(s[:4]), int(s[4:6]), int(s[6:8]))
+            return date
+        if field.type == "L":
+            return lambda b: True if b in (b"T", b"t", b"Y", b"y") else (False if b in (b"F", b"f", b"N", b"n") else None)
+        return lambda b: b
+
+    def _slices(self, field_names):
+        names = self.field_names if field_names is None else field_names
+        out = []
+        for name in names:
+            hit = self._field_offsets.get(name.lower())
+            if hit is None:
+                raise KeyError(f"Field '{name}' not in {os.path.basename(self.path)}")
+            start, k = hit
+            field = self.fields[k]
+            out.append((start, start + field.length, self._decoder(field)))
+        return out
+
+    def records(self, field_names=None, rows=None):
+        """
+        Yield attribute tuples (in `field_names` order, all fields by default) for every
+        record, or only for the record numbers in `rows`.
+        """
+        slices = self._slices(field_names)
+        dbf = self._dbf
+        base, size = self._dbf_header_len, self._dbf_record_len
+        for i in (range(self._n_dbf) if rows is None else rows):
+            rec = dbf[base + i * size: base + (i + 1) * size]
+            yield tuple(decode(rec[a:b]) for a, b, decode in slices)
+
+    def columns(self, field_names=None):
+        """{field name: [value per record]} for the requested fields."""
+        names = self.field_names if field_names is None else list(field_names)
+        cols = {n: [] for n in names}
+        lists = [cols[n] for n in names]
+        for row in self.records(names):
+            for values, v in zip(lists, row):
+                values.append(v)
+        return cols
+
+
+#############################################################################################
+# MATCHING SOURCES
+#############################################################################################
+
+def is_shapefile_path(source):
+    return isinstance(source, str) and source.lower().endswith(".shp") and os.path.isfile(source)
+
+
+def open_for_target(source, target_sr):
+    """
+    (reader, transform) if `source` can be read natively into target_sr, else None.
+    transform is None (already in target_sr) or a (x_seq, y_seq) -> (x, y) function.
+    target_sr only needs .factoryCode and .name (an arcpy SpatialReference works).
+    """
+    if not is_shapefile_path(source):
+        return None
+    reader = ShapefileReader(source)
+    target_code = getattr(target_sr, "factoryCode", None)
+    target_name = getattr(target_sr, "name", None)
+
+    gcs = (reader.coordinate_system_name() or "").upper()
+    if reader.is_geographic() and target_code == 3005 and ("WGS" in gcs or "NORTH_AMERICAN_1983" in gcs):
+        import albers  # NumPy; only needed for this case
+        return reader, albers.forward
+    if reader.prj and target_name and reader.coordinate_system_name() == target_name:
+        return reader, None
+
+    reader.close()
+    return None
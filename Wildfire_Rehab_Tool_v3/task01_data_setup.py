@@ -1,7 +1,12 @@
-import arcpy
 import os
 import re
 
+from backends import arcpy
+import albers
+import gdb_backup
+import instrument
+import schema_cache
+
 """
 Workflow
 1.1 Creates a backup of the Rehab geodatabase for a given fire number and year.
@@ -67,11 +72,47 @@ def _get_rehab_gdb_paths(fire_year, fire_number, fire_district, fire_code):
     return input_gdb, output_gdb, gdb_path
 
 
+def _metrics_folder(fire_year, fire_number):
+    """Reports folder of the fire (for the step metrics), or None if the fire number is invalid."""
+    try:
+        fire_code, _, fire_district = _get_fire_context(fire_year, fire_number, "Step 1.1")
+    except ValueError:
+        return None
+    return instrument.reports_folder_for(_get_rehab_gdb_paths(fire_year, fire_number, fire_district, fire_code)[2])
+
+
+def _rehab_feature_classes(gdb_path, step_label):
+    """
+    (points fc, lines fc) in the wildfireBC_Rehab dataset of a rehab GDB: the lowercase
+    names first, then the 2025-style names. (None, None) after an AddError if missing.
+    """
+    feature_dataset = "wildfireBC_Rehab"
+
+    # Try lowercase version first
+    fc_points = os.path.join(gdb_path, feature_dataset, "wildfireBC_rehabPoint")
+    fc_lines = os.path.join(gdb_path, feature_dataset, "wildfireBC_rehabLine")
+    if arcpy.Exists(fc_points) and arcpy.Exists(fc_lines):
+        return fc_points, fc_lines
+
+    # If not found, try 2025-style naming
+    fc_points_alt = os.path.join(gdb_path, feature_dataset, "wildfireBC_Rehab_Point")
+    fc_lines_alt = os.path.join(gdb_path, feature_dataset, "wildfireBC_Rehab_Line")
+    if arcpy.Exists(fc_points_alt) and arcpy.Exists(fc_lines_alt):
+        return fc_points_alt, fc_lines_alt
+
+    if not arcpy.Exists(fc_points) and not arcpy.Exists(fc_points_alt):
+        arcpy.AddError(f"{step_label} Neither 'wildfireBC_rehabPoint' nor 'wildfireBC_Rehab_Point' exist in: {gdb_path}")
+    if not arcpy.Exists(fc_lines) and not arcpy.Exists(fc_lines_alt):
+        arcpy.AddError(f"{step_label} Neither 'wildfireBC_rehabLine' nor 'wildfireBC_Rehab_Line' exist in: {gdb_path}")
+    return None, None
+
+
 #############################################################################################
 # 1.1 CREATE A BACKUP
 #############################################################################################
 # --> fire_year & fire_code are temporarily inactive because of the test run
-def backup_gdb(fire_year, fire_number):
+@instrument.step("1.1")
+def backup_gdb(fire_year, fire_number, incremental=False, use_store=False, copy_workers=8):
     # Check if GDB has a fire_number
     if "FIRENUMBER" in fire_number.upper():
         msg = "Step 1.1 Please update the geodatabase name, as it is currently set to FIRENUMBER_Rehab.gdb and the fire number has not been specified."
@@ -82,18 +123,91 @@ def backup_gdb(fire_year, fire_number):
     fire_code, district_code, fire_district = _get_fire_context(fire_year, fire_number, "Step 1.1")
     input_gdb, output_gdb, _ = _get_rehab_gdb_paths(fire_year, fire_number, fire_district, fire_code)
 
-    # Perform the copy operation
-    arcpy.Copy_management(input_gdb, output_gdb)
+    if use_store:
+        _store_backup(input_gdb, output_gdb, fire_number)
+        return
+
+    if incremental:
+        _incremental_backup(input_gdb, output_gdb)
+        return
+
+    # Perform the copy operation: threaded file copy with checksums, unless the GDB is
+    # locked by an open session (then only arcpy can copy it consistently)
+    if copy_workers and not gdb_backup.has_lock_files(input_gdb):
+        result = gdb_backup.parallel_copy(input_gdb, output_gdb, workers=copy_workers)
+        arcpy.AddMessage(f"Step 1.1 Copied {result['files']} file(s), {result['bytes'] / 1048576:.1f} MB "
+                         f"in {result['seconds']:.1f}s (manifest: {result['manifest']})")
+    else:
+        if copy_workers:
+            arcpy.AddMessage("Step 1.1 Geodatabase is locked - using arcpy Copy.")
+        arcpy.Copy_management(input_gdb, output_gdb)
 
     print("Step 1.1 Backup completed successfully.")
 
 
+def _snapshots_dir(output_gdb):
+    """Outgoing\\{fire_number}_Rehab_Backup.gdb -> Outgoing\\{fire_number}_Rehab_Backup_Snapshots"""
+    return os.path.splitext(output_gdb)[0] + "_Snapshots"
+
+
+def _incremental_backup(input_gdb, output_gdb):
+    """Delta snapshot: copy only the GDB files that changed since the last snapshot."""
+    snapshots_dir = _snapshots_dir(output_gdb)
+    result = gdb_backup.delta_backup(input_gdb, snapshots_dir)
+
+    msg = (f"Step 1.1 Incremental backup {result['snapshot_id']}: copied {result['copied_files']} of "
+           f"{result['files']} file(s), {result['copied_bytes'] / 1048576:.1f} of "
+           f"{result['total_bytes'] / 1048576:.1f} MB -> {snapshots_dir}")
+    arcpy.AddMessage(msg)
+    print(msg)
+
+
+def _store_root(output_gdb):
+    """Outgoing\\{fire_number}_Rehab_Backup.gdb -> Outgoing\\Rehab_Backup_Store"""
+    return os.path.join(os.path.dirname(output_gdb), "Rehab_Backup_Store")
+
+
+def _store_backup(input_gdb, output_gdb, fire_number):
+    """Snapshot into the compressed content-addressed store (one manifest per snapshot)."""
+    store_root = _store_root(output_gdb)
+    result = gdb_backup.store_backup(input_gdb, store_root, fire_number)
+
+    msg = (f"Step 1.1 Backup snapshot {result['snapshot_id']}: {result['new_blobs']} new of "
+           f"{result['files']} file(s), {result['new_bytes'] / 1048576:.1f} MB stored for "
+           f"{result['total_bytes'] / 1048576:.1f} MB of GDB -> {store_root}")
+    arcpy.AddMessage(msg)
+    print(msg)
+
+
+def restore_gdb(fire_year, fire_number, snapshot_id, out_gdb=None):
+    """
+    Rebuild {fire_number}_Rehab.gdb as it was at snapshot_id from the backup store.
+    Default target: Outgoing\\{fire_number}_Rehab_Restore_{snapshot_id}.gdb
+    """
+    fire_code, _, fire_district = _get_fire_context(fire_year, fire_number, "Step 1.1")
+    _, output_gdb, _ = _get_rehab_gdb_paths(fire_year, fire_number, fire_district, fire_code)
+    store_root = _store_root(output_gdb)
+
+    available = gdb_backup.list_store_snapshots(store_root, fire_number)
+    if snapshot_id not in available:
+        raise ValueError(f"Step 1.1 Snapshot '{snapshot_id}' not found for {fire_number}. "
+                         f"Available: {', '.join(available) or 'none'}")
+
+    if not out_gdb:
+        out_gdb = os.path.join(os.path.dirname(output_gdb), f"{fire_number}_Rehab_Restore_{snapshot_id}.gdb")
+
+    gdb_backup.restore(fire_number, snapshot_id, store_root, out_gdb)
+    arcpy.AddMessage(f"Step 1.1 Restored snapshot {snapshot_id} -> {out_gdb}")
+    return out_gdb
+
+
 
 
 
 #############################################################################################
 # 1.2 ADD EXISTING POINTS AND LINES FROM REHAB GDB
 #############################################################################################
+@instrument.step("1.2")
 def add_layers_to_group(fire_year, fire_number):
     # Set the Project and Map
     aprx = arcpy.mp.ArcGISProject("CURRENT")
@@ -107,30 +221,15 @@ def add_layers_to_group(fire_year, fire_number):
     # TEST locations
     #gdb_path = fr"\\spatialfiles.bcgov\work\srm\wml\Workarea\ofedyshy\Rehab\TEST_for_script\C59999\Data\{fire_number}_Rehab.gdb"
     #gdb_path = fr"\\spatialfiles.bcgov\work\srm\wml\Workarea\ofedyshy\Scripts\Rehab\Wildfire_Rehab_GitHub\Wildfire_Rehab_ProcessSuite\FireSeasonWork_Test\{fire_year}\{fire_district}\{fire_code}\{fire_number}\Data\{fire_number}_Rehab.gdb"
-    feature_dataset = "wildfireBC_Rehab"
 
     # Check if the GeoDatabase exists
     if not arcpy.Exists(gdb_path):
         arcpy.AddError(f"Step 1.2 The GeoDatabase '{gdb_path}' does not exist.")
         return
 
-    # Try lowercase version first
-    fc_points = os.path.join(gdb_path, feature_dataset, "wildfireBC_rehabPoint")
-    fc_lines = os.path.join(gdb_path, feature_dataset, "wildfireBC_rehabLine")
-
-    # If not found, try 2025-style naming
-    if not arcpy.Exists(fc_points) or not arcpy.Exists(fc_lines):
-        fc_points_alt = os.path.join(gdb_path, feature_dataset, "wildfireBC_Rehab_Point")
-        fc_lines_alt = os.path.join(gdb_path, feature_dataset, "wildfireBC_Rehab_Line")
-
-        if arcpy.Exists(fc_points_alt) and arcpy.Exists(fc_lines_alt):
-            fc_points, fc_lines = fc_points_alt, fc_lines_alt
-        else:
-            if not arcpy.Exists(fc_points) and not arcpy.Exists(fc_points_alt):
-                arcpy.AddError(f"Step 1.2 Neither 'wildfireBC_rehabPoint' nor 'wildfireBC_Rehab_Point' exist in: {gdb_path}")
-            if not arcpy.Exists(fc_lines) and not arcpy.Exists(fc_lines_alt):
-                arcpy.AddError(f"Step 1.2 Neither 'wildfireBC_rehabLine' nor 'wildfireBC_Rehab_Line' exist in: {gdb_path}")
-            return
+    fc_points, fc_lines = _rehab_feature_classes(gdb_path, "Step 1.2")
+    if fc_points is None:
+        return
 
     group_layer_name = f"{fire_number}_Master"
     group_layer = next((lyr for lyr in map_obj.listLayers() if lyr.isGroupLayer and lyr.name == group_layer_name), None)
@@ -173,12 +272,26 @@ def ensure_group(map_obj, group_layer_name):
         grp = map_obj.createGroupLayer(group_layer_name)
     return grp
 
-def reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_to_group=True):
-    aprx = arcpy.mp.ArcGISProject("CURRENT")
-    map_obj = aprx.activeMap
+@instrument.step("1.3")
+def reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_to_group=True, use_builtin_albers=False,
+                               out_gdb=None):
+    """
+    use_builtin_albers: project with the in-memory NumPy transform (albers.py) into
+    {name}_BC feature classes instead of one BatchProject GP call.
+    out_gdb: write into this GDB instead of the project's default GDB. No CURRENT project
+    is opened (headless / batch runs), so nothing is added to a map.
+    Returns the projected feature classes.
+    """
+    if out_gdb:
+        aprx = map_obj = None
+        default_gdb = out_gdb
+        add_outputs_to_group = False
+    else:
+        aprx = arcpy.mp.ArcGISProject("CURRENT")
+        map_obj = aprx.activeMap
 
-    # use project's default GDB
-    default_gdb = aprx.defaultGeodatabase
+        # use project's default GDB
+        default_gdb = aprx.defaultGeodatabase
     arcpy.env.workspace = default_gdb
 
     bc_albers = arcpy.SpatialReference(3005)
@@ -210,30 +323,62 @@ def reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_t
 
     if not shp_paths:
         arcpy.AddWarning("Step 1.3 No WGS84 shapefiles found.")
-        return
+        return []
+
+    # Build list of actual/expected outputs from inputs (dedup)
+    expected_out_fcs = []
+    seen = set()
+
+    for shp in shp_paths:
+        base = os.path.splitext(os.path.basename(shp))[0]
+
+        # BatchProject usually keeps the base name
+        name1 = arcpy.ValidateTableName(base, default_gdb)
+        fc1 = os.path.join(default_gdb, name1)
+
+        # Your preferred naming (base_BC) - fallback
+        name2 = arcpy.ValidateTableName(f"{sanitize_name(base)}_BC", default_gdb)
+        fc2 = os.path.join(default_gdb, name2)
 
-    # Remove existing outputs to avoid collisions
-    for out_name in out_names:
-        out_fc = os.path.join(default_gdb, out_name)
+        for fc in (fc1, fc2):
+            if fc not in seen:
+                expected_out_fcs.append(fc)
+                seen.add(fc)
+
+    # Remove existing outputs (either naming) to avoid collisions and stale copies
+    for out_fc in expected_out_fcs:
         if arcpy.Exists(out_fc):
             arcpy.Delete_management(out_fc)
+            schema_cache.invalidate(out_fc)
 
-    # 🚀 One GP call instead of many
-    arcpy.AddMessage(
-        f"Step 1.3 BatchProject: {len(shp_paths)} shapefiles → {os.path.basename(default_gdb)}"
-    )
-
-    try:
-        # Most robust across ArcGIS Pro versions
-        arcpy.management.BatchProject(shp_paths, default_gdb, bc_albers)
-    except TypeError:
-        # Fallback: some installs use different keyword names
-        arcpy.management.BatchProject(
-            shp_paths,
-            default_gdb,
-            bc_albers
+    if use_builtin_albers:
+        # Array projection, no GP tool call
+        arcpy.AddMessage(
+            f"Step 1.3 Built-in Albers: {len(shp_paths)} shapefiles → {os.path.basename(default_gdb)}"
+        )
+        for shp, out_name in zip(shp_paths, out_names):
+            try:
+                n = albers.project_features(shp, os.path.join(default_gdb, out_name))
+                arcpy.AddMessage(f"Step 1.3 Projected {n} feature(s): {os.path.basename(shp)} → {out_name}")
+            except Exception as e:
+                arcpy.AddWarning(f"Step 1.3 Failed to project {os.path.basename(shp)}: {e}")
+    else:
+        # 🚀 One GP call instead of many
+        arcpy.AddMessage(
+            f"Step 1.3 BatchProject: {len(shp_paths)} shapefiles → {os.path.basename(default_gdb)}"
         )
 
+        try:
+            # Most robust across ArcGIS Pro versions
+            arcpy.management.BatchProject(shp_paths, default_gdb, bc_albers)
+        except TypeError:
+            # Fallback: some installs use different keyword names
+            arcpy.management.BatchProject(
+                shp_paths,
+                default_gdb,
+                bc_albers
+            )
+
     # Optional: add outputs to map/group
     if add_outputs_to_group:
         group_layer_name = f"{fire_number}_Input"
@@ -242,26 +387,6 @@ def reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_t
             None
         ) or map_obj.createGroupLayer(group_layer_name)
 
-        # Build list of actual/expected outputs from inputs (dedup)
-        expected_out_fcs = []
-        seen = set()
-
-        for shp in shp_paths:
-            base = os.path.splitext(os.path.basename(shp))[0]
-
-            # BatchProject usually keeps the base name
-            name1 = arcpy.ValidateTableName(base, default_gdb)
-            fc1 = os.path.join(default_gdb, name1)
-
-            # Your preferred naming (base_BC) - fallback
-            name2 = arcpy.ValidateTableName(f"{sanitize_name(base)}_BC", default_gdb)
-            fc2 = os.path.join(default_gdb, name2)
-
-            for fc in (fc1, fc2):
-                if fc not in seen:
-                    expected_out_fcs.append(fc)
-                    seen.add(fc)
-
         # Existing layer sources in group (avoid duplicates)
         existing_sources = set()
         for lyr in group_layer.listLayers():
@@ -296,8 +421,10 @@ def reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_t
 
 
 
-    aprx.save()
+    if aprx is not None:
+        aprx.save()
     arcpy.AddMessage("Step 1.3 Reprojection complete.")
+    return [fc for fc in expected_out_fcs if arcpy.Exists(fc)]
 
     
 
@@ -313,14 +440,24 @@ if __name__ == "__main__":
     fire_number = arcpy.GetParameterAsText(1)
     collected_data_folder = arcpy.GetParameterAsText(2)
     create_backup = arcpy.GetParameter(3)
-
-    # Call the backup function
-    if create_backup:
-        backup_gdb(fire_year, fire_number)
-    else:
-        arcpy.AddMessage("Step 1.1 Backup skipped.")
-    add_layers_to_group(fire_year, fire_number)
-    reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_to_group=True)
+    # Optional: project with the built-in NumPy Albers transform instead of BatchProject
+    use_builtin_albers = arcpy.GetArgumentCount() > 4 and bool(arcpy.GetParameter(4))
+    # Optional: incremental (delta) snapshot instead of a full GDB copy
+    incremental_backup = arcpy.GetArgumentCount() > 5 and bool(arcpy.GetParameter(5))
+    # Optional: snapshot into the compressed content-addressed backup store
+    use_backup_store = arcpy.GetArgumentCount() > 6 and bool(arcpy.GetParameter(6))
+
+    instrument.start_run("task01_data_setup")
+    try:
+        # Call the backup function
+        if create_backup:
+            backup_gdb(fire_year, fire_number, incremental=incremental_backup, use_store=use_backup_store)
+        else:
+            arcpy.AddMessage("Step 1.1 Backup skipped.")
+        add_layers_to_group(fire_year, fire_number)
+        reproject_shapefiles_batch(fire_number, collected_data_folder, add_outputs_to_group=True, use_builtin_albers=use_builtin_albers)
+    finally:
+        instrument.finish_run(_metrics_folder(fire_year, fire_number))
 
 
 
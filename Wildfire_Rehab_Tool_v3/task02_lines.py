@@ -1,8 +1,20 @@
-import arcpy
 import os
 import re
+import time
 from datetime import datetime
 
+from backends import arcpy
+from line_matcher import LineMatcher, summarize_distances
+import copy_journal
+import domain_cache
+import domain_registry
+import geometry_index
+import instrument
+import schema_cache
+import shapefile_reader
+from domain_registry import LINE_DOMAIN_MAPPING_RAW
+from schema_cache import get_schema
+
 
 """
 Workflow
@@ -10,6 +22,7 @@ Workflow
 2.2 Copies attribute values from input lines
 2.3 Copies domain values from input lines
 2.4 Updates basic fields
+2.5 (optional) Runs 2.1 - 2.4 as one single-pass pipeline
 
 """
 
@@ -41,26 +54,79 @@ def _ds_path(dataset_or_layer) -> str:
     return dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer)
 
 def _shape_type(dataset_path: str) -> str:
-    return arcpy.Describe(dataset_path).shapeType
-
-def _norm(s: str) -> str:
-    return re.sub(r'[^a-zA-Z0-9]', '', str(s)).lower().strip()
+    return schema_cache.shape_type(dataset_path)
 
 def _line_key(geom, decimals=3):
     """
-    Produce a stable key for a polyline based on its endpoints.
-    IMPORTANT: direction matters (A->B != B->A). If you want directionless matching,
-    we can sort the endpoints.
+    Produce a stable key for a polyline based on its endpoints (used in messages).
+    Matching itself goes through LineMatcher (see line_matcher.py).
     """
     fp = (round(geom.firstPoint.X, decimals), round(geom.firstPoint.Y, decimals))
     lp = (round(geom.lastPoint.X, decimals), round(geom.lastPoint.Y, decimals))
     return (fp, lp)
 
+def _source_line_ends(src, read_fields, tgt_sr):
+    """
+    Yield (first, last, row) per source line, endpoints in tgt_sr; row follows read_fields
+    (the "SHAPE@" slot is None). Shapefile paths are read directly with shapefile_reader
+    when possible; anything else goes through a SearchCursor + projectAs.
+    """
+    native = shapefile_reader.open_for_target(src, tgt_sr)
+    if native is None:
+        g = read_fields.index("SHAPE@")
+        with arcpy.da.SearchCursor(src, read_fields) as cur:
+            for row in cur:
+                if row[g] is None:
+                    continue
+                geom = row[g].projectAs(tgt_sr)
+                fp, lp = geom.firstPoint, geom.lastPoint
+                yield (fp.X, fp.Y), (lp.X, lp.Y), row
+        return
+
+    reader, transform = native
+    with reader:
+        fx, fy, lx, ly, rec = reader.line_end_arrays()
+        if transform is not None:
+            fx, fy = (a.tolist() for a in transform(fx, fy))
+            lx, ly = (a.tolist() for a in transform(lx, ly))
+        attr_fields = [f for f in read_fields if f != "SHAPE@"]
+        for i, values in enumerate(reader.records(attr_fields, rows=rec)):
+            it = iter(values)
+            row = tuple(None if f == "SHAPE@" else next(it) for f in read_fields)
+            yield (fx[i], fy[i]), (lx[i], ly[i]), row
+
+def _source_lines(src, read_fields, tgt_sr):
+    """
+    One read of the source for 2.5: yield (first, last, geom, row) per source row, with geom
+    projected into tgt_sr and the endpoints computed as _source_line_ends would (through the
+    shapefile_reader transform when it reads the source natively, else from geom). Null
+    shapes yield (None, None, None, row). row follows read_fields.
+    """
+    native = shapefile_reader.open_for_target(src, tgt_sr)
+    if native is not None:
+        native[0].close()
+    g = read_fields.index("SHAPE@")
+    with arcpy.da.SearchCursor(src, read_fields) as cur:
+        for row in cur:
+            raw = row[g]
+            if raw is None:
+                yield None, None, None, row
+                continue
+            geom = raw.projectAs(tgt_sr)
+            if native is None:
+                fp, lp = geom.firstPoint, geom.lastPoint
+                yield (fp.X, fp.Y), (lp.X, lp.Y), geom, row
+                continue
+            fp, lp = raw.firstPoint, raw.lastPoint
+            if native[1] is None:
+                yield (fp.X, fp.Y), (lp.X, lp.Y), geom, row
+            else:
+                x, y = native[1]([fp.X, lp.X], [fp.Y, lp.Y])
+                yield (float(x[0]), float(y[0])), (float(x[1]), float(y[1])), geom, row
+
+
 def _get_field_length(table, field_name) -> int | None:
-    for f in arcpy.ListFields(table, field_name):
-        if f.name.lower() == field_name.lower():
-            return f.length
-    return None
+    return schema_cache.get_schema(table).length(field_name)
 
 def _safe_set(row, idx, value, target_table, target_field_name, skipped_rows, key_for_msg):
     """
@@ -85,9 +151,12 @@ def _safe_set(row, idx, value, target_table, target_field_name, skipped_rows, ke
 # 2.1 COPY SPATIAL DATA - LINES
 #############################################################################################
 
-def copy_lines(lines_to_copy, lines_to_update):
+@instrument.step("2.1")
+def copy_lines(lines_to_copy, lines_to_update, skip_duplicates=True, duplicate_tolerance=None):
     """
     Copy geometries from source into target. Inserts blank Fire_Num ('') like your original.
+    skip_duplicates: skip source features whose geometry is already in the target (resent
+    exports), checked against the target's geometry_index (grid: duplicate_tolerance).
     """
     src = _ds_path(lines_to_copy)
     tgt = _ds_path(lines_to_update)
@@ -97,46 +166,33 @@ def copy_lines(lines_to_copy, lines_to_update):
 
     workspace = _workspace_from_dataset(lines_to_update)
 
-    count = 0
-    with arcpy.da.Editor(workspace):
-        with arcpy.da.SearchCursor(src, ["SHAPE@"]) as s_cur:
-            # Keep your Fire_Num behavior; if field doesn't exist, just insert geometry
-            tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
-            if "Fire_Num" in tgt_fields:
-                with arcpy.da.InsertCursor(tgt, ["SHAPE@", "Fire_Num"]) as i_cur:
-                    for (geom,) in s_cur:
-                        i_cur.insertRow((geom, ""))
-                        count += 1
-            else:
-                with arcpy.da.InsertCursor(tgt, ["SHAPE@"]) as i_cur:
-                    for (geom,) in s_cur:
-                        i_cur.insertRow((geom,))
-                        count += 1
+    index = geometry_index.for_target(tgt, duplicate_tolerance) if skip_duplicates else None
+
+    # Inserted in journaled batches: an interrupted copy resumes without duplicates
+    if "Fire_Num" in get_schema(tgt):
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "2.1", ["SHAPE@", "Fire_Num"],
+                                                                [""], index=index)
+    else:
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "2.1", ["SHAPE@"], index=index)
 
     arcpy.AddMessage(f"2.1 Copied {count} line(s) from source into target.")
-    return count
+    if skip_duplicates:
+        arcpy.AddMessage(f"2.1 Skipped {duplicates} duplicate line(s) already in the target.")
+    return count + resumed
 
 
 #############################################################################################
 # 2.2 COPY ATTRIBUTES BASED ON LOCATION - LINES
 #############################################################################################
 
-def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update):
+def _attribute_field_mapping(src_fields, tgt_fields) -> dict:
     """
-    Copies attribute values by matching line endpoint keys.
-    Matches endpoints after projecting source geometry into target spatial reference.
+    Build mapping target_field -> source_field (dynamic based on source fields).
     """
-    src = lines_to_copy  #_ds_path(lines_to_copy)
-    tgt = _ds_path(lines_to_update)
-
-    arcpy.AddMessage("2.2 Starting attribute copy process...")
-
-    # Build mapping from target_field -> source_field (dynamic based on source fields)
-    src_fields = [f.name for f in arcpy.ListFields(src)]
     field_mapping = {}
 
     # CaptureDate mapping (target may have CaptureDate)
-    if "CaptureDate" in [f.name for f in arcpy.ListFields(tgt)]:
+    if "CaptureDate" in tgt_fields:
         if "TimeStamp" in src_fields:
             field_mapping["CaptureDate"] = "TimeStamp"
         elif "TimeWhen" in src_fields:
@@ -144,8 +200,6 @@ def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update):
 
     # Comments mapping (target can be Comments OR Description)
 
-    tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
-
     # Determine which target field to use
     target_comment_field = None
     if "Comments" in tgt_fields:
@@ -162,7 +216,7 @@ def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update):
                 break
 
     # Label mapping
-    if "Label" in [f.name for f in arcpy.ListFields(tgt)]:
+    if "Label" in tgt_fields:
         if "name" in src_fields:
             field_mapping["Label"] = "name"
         elif "Name" in src_fields:
@@ -170,9 +224,56 @@ def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update):
 
     # Same-name fields if present in BOTH
     for f in ["CritWork", "ProtValue"]:
-        if f in src_fields and f in [x.name for x in arcpy.ListFields(tgt)]:
+        if f in src_fields and f in tgt_fields:
             field_mapping[f] = f
 
+    return field_mapping
+
+def _apply_attribute_values(row, offset, tgt_fields, values, target_table, skipped_rows, key_for_msg) -> bool:
+    """
+    Write matched source attribute values into row[offset:], in tgt_fields order.
+    Returns True if anything was assigned.
+    """
+    changed = False
+    for i, val in enumerate(values):
+        tgt_field = tgt_fields[i]
+
+        # --- FIX for CaptureDate ---
+        if tgt_field == "CaptureDate" and val:
+            try:
+                # If it's a string like '2025-10-02 09:32:27'
+                if isinstance(val, str):
+                    val = datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
+
+                # If it's already datetime, just strip time
+                val = val.date()
+
+            except Exception:
+                arcpy.AddWarning(f"Failed to parse CaptureDate value: {val}")
+                continue
+
+        if _safe_set(row, offset + i, val, target_table, tgt_field, skipped_rows, key_for_msg):
+            changed = True
+    return changed
+
+
+@instrument.step("2.2")
+def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update, tolerance=0.01, ignore_direction=False):
+    """
+    Copies attribute values by matching line endpoints.
+    Matches endpoints after projecting source geometry into target spatial reference;
+    endpoints only need to agree within `tolerance` (target map units).
+    """
+    src = lines_to_copy  #_ds_path(lines_to_copy)
+    tgt = _ds_path(lines_to_update)
+
+    arcpy.AddMessage("2.2 Starting attribute copy process...")
+
+    # Build mapping from target_field -> source_field (dynamic based on source fields)
+    src_fields = get_schema(src)
+    tgt_fields = get_schema(tgt)
+    field_mapping = _attribute_field_mapping(src_fields, tgt_fields)
+
     if not field_mapping:
         arcpy.AddWarning("2.2 No matching attribute fields found to copy. Skipping 2.2.")
         return 0, 0
@@ -180,63 +281,45 @@ def copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update):
     arcpy.AddMessage(f"2.2 Field mapping: {field_mapping}")
 
     # Spatial ref of target
-    tgt_sr = arcpy.Describe(tgt).spatialReference
+    tgt_sr = schema_cache.spatial_reference(tgt)
 
     # Build source index
     fields_to_copy = ["SHAPE@"] + list(field_mapping.values())
-    source_index = {}
+    source_index = LineMatcher(tolerance, ignore_direction)
 
-    with arcpy.da.SearchCursor(src, fields_to_copy) as cur:
-        for row in cur:
-            geom = row[0].projectAs(tgt_sr)
-            key = _line_key(geom, decimals=3)
-            source_index[key] = row[1:]  # attribute values in source-field order
+    for first, last, row in _source_line_ends(src, fields_to_copy, tgt_sr):
+        source_index.add(first, last, row[1:])  # attribute values in source-field order
 
-    arcpy.AddMessage(f"2.2 Indexed {len(source_index)} source feature(s) by endpoints.")
+    arcpy.AddMessage(f"2.2 Indexed {len(source_index)} source feature(s) by endpoints (tolerance {tolerance}).")
 
     # Update target
     workspace = _workspace_from_dataset(lines_to_update)
     fields_to_update = ["SHAPE@"] + list(field_mapping.keys())
 
     skipped_rows = []
+    distances = []
     updated_count = 0
     unmatched_count = 0
 
-    with arcpy.da.Editor(workspace):
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
         with arcpy.da.UpdateCursor(tgt, fields_to_update) as cur:
             for row in cur:
-                key = _line_key(row[0], decimals=3)
-                if key not in source_index:
+                hit = source_index.match_geometry(row[0])
+                if hit is None:
                     unmatched_count += 1
                     continue
 
-                values = source_index[key]
-                changed = False
-                for i, val in enumerate(values):
-                    tgt_field = fields_to_update[i + 1]
-
-                    # --- FIX for CaptureDate ---
-                    if tgt_field == "CaptureDate" and val:
-                        try:
-                            # If it's a string like '2025-10-02 09:32:27'
-                            if isinstance(val, str):
-                                val = datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
-                            
-                            # If it's already datetime, just strip time
-                            val = val.date()
-
-                        except Exception:
-                            arcpy.AddWarning(f"Failed to parse CaptureDate value: {val}")
-                            continue
-
-                    if _safe_set(row, i + 1, val, tgt, tgt_field, skipped_rows, key):
-                        changed = True
+                values, dist = hit
+                distances.append(dist)
+                key = _line_key(row[0], decimals=3)
+                changed = _apply_attribute_values(row, 1, fields_to_update[1:], values, tgt, skipped_rows, key)
 
                 if changed:
                     cur.updateRow(row)
                     updated_count += 1
 
     arcpy.AddMessage(f"2.2 Updated {updated_count} feature(s). Unmatched: {unmatched_count}.")
+    arcpy.AddMessage(f"2.2 Endpoint distances: {summarize_distances(distances)}.")
     if skipped_rows:
         arcpy.AddWarning(f"2.2 Skipped {len(skipped_rows)} field assignment(s) due to length constraints.")
     return updated_count, unmatched_count
@@ -275,203 +358,141 @@ def _normalize_linewidth(label: str) -> str | None:
 # 2.3 COPY DOMAIN VALUES BASED ON LOCATION - LINES
 #############################################################################################
 
-def copy_domain_values_based_on_location_lines(lines_to_copy, lines_to_update):
+# Domain labels -> codes: the target GDB's domains (domain_cache) over domain_registry.LINES
+# (LINE_DOMAIN_MAPPING_RAW kept here for callers)
+# Source fields read for 2.3 if present; sym_name is used as fallback label
+LINE_DOMAIN_SOURCE_FIELDS = ["RLType", "RLType2", "RLType_2", "RLType3", "RLType_3", "FLType", "FLType2", "LineWidth", "AvgSlope", "sym_name"]
+
+def _domain_labels(row, idx) -> dict:
+    """
+    Collect the source labels for each target domain field from a source row.
+    idx maps source field name -> row index.
+    """
+    sym = row[idx["sym_name"]] if "sym_name" in idx else None
+
+    def get_label(field):
+        if field in idx:
+            v = row[idx[field]]
+            if v is not None and str(v).strip():
+                return str(v).strip()
+        return sym  # fallback
+
+    return {
+        "RLType": get_label("RLType"),
+        "RLType2": get_label("RLType2") or get_label("RLType_2"),
+        "RLType3": get_label("RLType3") or get_label("RLType_3"),
+        "FLType": get_label("FLType"),
+        "FLType2": get_label("FLType2"),
+        "LineWidth": get_label("LineWidth"),
+        "AvgSlope": get_label("AvgSlope"),
+    }
+
+def _domain_target_fields(tgt_all) -> list:
+    """Choose target field names (handle _2 / _3 variants)."""
+    preferred = [
+        "RLType",
+        "RLType2" if "RLType2" in tgt_all else "RLType_2",
+        "RLType3" if "RLType3" in tgt_all else "RLType_3",
+        "FLType",
+        "FLType2",
+        "LineWidth",
+        "AvgSlope"
+    ]
+    return [f for f in preferred if f in tgt_all]
+
+def _domain_tables(tgt, fields) -> list:
+    """Label -> code table per target field: its GDB domain over domain_registry.LINES."""
+    tables = [domain_cache.label_table(tgt, f, domain_registry.LINES) for f in fields]
+    domain_registry.reset_usage(tables)
+    return tables
+
+def _apply_domain_labels(row, offset, fields, labels, tables):
+    """
+    Write mapped domain codes into row[offset:], in fields order (tables[i] maps fields[i]).
+    Returns (changed, number of labels with no code).
+    """
+    changed = False
+    skipped = 0
+    for i, field in enumerate(fields):
+        label = labels.get(field)
+        if not label:
+            continue
+
+        # Special handling for LineWidth
+        if field == "LineWidth":
+            label = _normalize_linewidth(label)
+
+        mapped = tables[i].code(label)
+        if mapped is None:
+            skipped += 1
+            continue
+
+        row[offset + i] = mapped
+        changed = True
+    return changed, skipped
+
+@instrument.step("2.3")
+def copy_domain_values_based_on_location_lines(lines_to_copy, lines_to_update, tolerance=0.01, ignore_direction=False):
     """
     Copies coded domain values (RLType/FLType/etc) by mapping the source label -> code,
-    matched by endpoint key. Uses 'sym_name' fallback logic similar to your original.
+    matched by endpoints (within `tolerance`). Uses 'sym_name' fallback logic similar to your original.
     """
     src = lines_to_copy  #_ds_path(lines_to_copy)
     tgt = _ds_path(lines_to_update)
 
     arcpy.AddMessage("2.3 Starting domain copy process...")
 
-    # ---- Domain mapping (same as your original, just normalized) ----
-    domain_mapping_raw = {
-        # RLType
-        'Clean Ditch (CD)': '1',
-        'Dry Seed (DS)': '2',
-        'Fence - Damaged (FD)': '3',
-        'Fence - Undamaged (FND)': '4',
-        'Danger Tree Treatment Required (DTA)': '14',
-        'Grade Road (GR)': '5',
-        'Pull Back (PB)': '6',
-        'Recontour (RC)': '7',
-        'Steep Slopes >35% (SS)': '10',
-        'No Treatment - Line (NA)': '11',
-        'Hazard (H)': '13',
-        'Unassigned': '99',
-        'Fuel Hazard Treatment Required (FHT)': '15',
-        'Division Break': '89',
-        'Other Rehab Treatment Type': '16',
-        'Road Damage - Requires Repair (RR)': '9',
-        'Ditch Clean Repair DCR': '1',
-        'Dry Seed DS': '2',
-        'Fire Hazard Treatment FHT': '13',
-        'Grade Road GR': '5',
-        'Infrastructure No Treatment INT': '21',
-        'Infrastructure Repair IR': '20',
-        'No Treatment NT': '11',
-        'No Work Zone NWZ': '22',
-        'Other Rehab Treatment Type ORT': '16',
-        'Pull Back PB': '6',
-        'Recontour RC': '7',
-        'Steep Slopes SS': '10',
-
-        # FLType
-        'Unknown': '0',
-        'Active Burnout': '1',
-        'Aerial Foam Drop': '2',
-        'Aerial Hazard': '3',
-        'Aerial Ignition': '4',
-        'Aerial Retardant Drop': '5',
-        'Aerial Water Drop': '6',
-        'Branch Break': '7',
-        'Completed Burnout': '8',
-        'Completed Machine Line': '9',
-        'Completed Handline': '10',
-        'Completed Line': '11',
-        'Division Break': '12',
-        'Danger Tree Assessed': '13',
-        'Danger Tree Assessed/Felled': '14',
-        'Escape Route': '15',
-        'Fire Break Planned or Incomplete': '16',
-        'Fire Spread Prediction': '17',
-        'Highlighted Geographic Feature': '18',
-        'Highlighted Manmade Feature': '19',
-        'Line Break Complete': '20',
-        'Planned Fire Line': '21',
-        'Planned Secondary Line': '22',
-        'Proposed Burnout': '23',
-        'Proposed Machine Line': '24',
-        'Trigger Point': '25',
-        'Uncontrolled Fire Edge': '26',
-        'Other': '27',
-        'Contingency Line': '28',
-        'No Work Zone': '29',
-        'Completed Fuel Free Line': '30',
-        'Road - Modified Existing': '32',
-        'Trail': '34',
-        'Road': '31',
-        'Road - Heavily Used': '33',
-        'Pipeline': '35',
-        'Completed Hoselay': '36',
-        'Containment / Control Line': '37',
-        'Containment Control Line': '37',
-        'Completed Fuel Free Line FF': '30',
-        'Completed Handline HL': '10',
-        'Completed Machine Line MG': '9',
-        'Road Heavily Used RHU': '33',
-        'Road Modified Existing REM': '32',
-        'Trail TR': '34',
-
-        # LineWidth
-        '1m': '0',
-        '5m': '1',
-        '10m': '2',
-        '15m': '3',
-        '20m and wider': '4',
-
-        # AvgSlope
-        '0 to 15': '0',
-        '16 to 25': '1',
-        '26 to 35': '2',
-        'above 35': '3'
-    }
-    domain_mapping = {_norm(k): v for k, v in domain_mapping_raw.items()}
-
-    tgt_sr = arcpy.Describe(tgt).spatialReference
+    tgt_sr = schema_cache.spatial_reference(tgt)
 
     # Determine available fields
-    src_all = [f.name for f in arcpy.ListFields(src)]
-    tgt_all = [f.name for f in arcpy.ListFields(tgt)]
+    src_all = get_schema(src)
+    tgt_all = get_schema(tgt)
 
     # We will read these if present; sym_name is used as fallback label
-    optional_fields = ["RLType", "RLType2", "RLType_2", "RLType3", "RLType_3", "FLType", "FLType2", "LineWidth", "AvgSlope", "sym_name"]
-    read_fields = ["SHAPE@"] + [f for f in optional_fields if f in src_all]
+    read_fields = ["SHAPE@"] + [f for f in LINE_DOMAIN_SOURCE_FIELDS if f in src_all]
     if "sym_name" not in read_fields:
         arcpy.AddWarning("2.3 Source does not have 'sym_name'. Fallbacks may be less accurate.")
 
-    # Build source_data dict
+    # Build source index (endpoint grid)
     idx = {f: i for i, f in enumerate(read_fields)}
-    source_data = {}
+    source_data = LineMatcher(tolerance, ignore_direction)
 
-    with arcpy.da.SearchCursor(src, read_fields) as cur:
-        for row in cur:
-            geom = row[idx["SHAPE@"]].projectAs(tgt_sr)
-            key = _line_key(geom, decimals=3)
-
-            sym = row[idx["sym_name"]] if "sym_name" in idx else None
-
-            def get_label(field):
-                if field in idx:
-                    v = row[idx[field]]
-                    if v is not None and str(v).strip():
-                        return str(v).strip()
-                return sym  # fallback
-
-            source_data[key] = {
-                "RLType": get_label("RLType"),
-                "RLType2": get_label("RLType2") or get_label("RLType_2"),
-                "RLType3": get_label("RLType3") or get_label("RLType_3"),
-                "FLType": get_label("FLType"),
-                "FLType2": get_label("FLType2"),
-                "LineWidth": get_label("LineWidth"),
-                "AvgSlope": get_label("AvgSlope"),
-            }
+    for first, last, row in _source_line_ends(src, read_fields, tgt_sr):
+        source_data.add(first, last, _domain_labels(row, idx))
 
     arcpy.AddMessage(f"2.3 Indexed {len(source_data)} source feature(s) for domain mapping.")
 
     # Choose target field names (handle _2 / _3 variants)
-    preferred = [
-        "RLType",
-        "RLType2" if "RLType2" in tgt_all else "RLType_2",
-        "RLType3" if "RLType3" in tgt_all else "RLType_3",
-        "FLType",
-        "FLType2",
-        "LineWidth",
-        "AvgSlope"
-    ]
-    fields_to_update = [f for f in preferred if f in tgt_all]
+    fields_to_update = _domain_target_fields(tgt_all)
     if not fields_to_update:
         arcpy.AddWarning("2.3 Target has none of the expected domain fields. Skipping 2.3.")
         return 0, 0
+    domain_tables = _domain_tables(tgt, fields_to_update)
 
     workspace = _workspace_from_dataset(lines_to_update)
 
     updated = 0
     skipped = 0
 
-    with arcpy.da.Editor(workspace):
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
         with arcpy.da.UpdateCursor(tgt, ["SHAPE@"] + fields_to_update) as cur:
             for row in cur:
-                key = _line_key(row[0], decimals=3)
-                if key not in source_data:
+                hit = source_data.match_geometry(row[0])
+                if hit is None:
                     skipped += 1
                     continue
 
-                changed = False
-                for i, field in enumerate(fields_to_update):
-                    label = source_data[key].get(field)
-                    if not label:
-                        continue
-
-                    # Special handling for LineWidth
-                    if field == "LineWidth":
-                        label = _normalize_linewidth(label)
-
-                    mapped = domain_mapping.get(_norm(label))
-                    if mapped is None:
-                        skipped += 1
-                        continue
-
-                    row[i + 1] = mapped
-                    changed = True
+                labels, _dist = hit
+                changed, n_skipped = _apply_domain_labels(row, 1, fields_to_update, labels, domain_tables)
+                skipped += n_skipped
 
                 if changed:
                     cur.updateRow(row)
                     updated += 1
 
     arcpy.AddMessage(f"2.3 Updated {updated} feature(s). Skipped/unmatched: {skipped}.")
+    for line in domain_registry.fuzzy_summary(domain_tables):
+        arcpy.AddMessage(f"2.3 {line}")
     return updated, skipped
 
 
@@ -479,6 +500,30 @@ def copy_domain_values_based_on_location_lines(lines_to_copy, lines_to_update):
 # 2.4 UPDATE BASIC FIELDS - LINES
 #############################################################################################
 
+BASIC_FIELDS = ["Fire_Num", "Fire_Name", "Status"]
+
+def _fill_basic_fields(row, offset, fire_number, fire_name, status) -> bool:
+    """
+    Fill blank Fire_Num / Fire_Name / Status at row[offset:offset + 3].
+    Returns True if anything was assigned.
+    """
+    changed = False
+
+    if row[offset] is None or row[offset] == "":
+        row[offset] = str(fire_number)
+        changed = True
+
+    if row[offset + 1] is None or row[offset + 1] == "":
+        row[offset + 1] = str(fire_name)
+        changed = True
+
+    if row[offset + 2] is None or row[offset + 2] == "" or row[offset + 2] == "RehabRequiresFieldVerification":
+        row[offset + 2] = str(status)
+        changed = True
+
+    return changed
+
+@instrument.step("2.4")
 def update_basic_fields_lines(lines_to_update, fire_number, fire_name, status):
     """
     Update Fire_Num / Fire_Name / Status on target lines.
@@ -487,30 +532,17 @@ def update_basic_fields_lines(lines_to_update, fire_number, fire_name, status):
     tgt = _ds_path(lines_to_update)
     workspace = _workspace_from_dataset(lines_to_update)
 
-    tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
-    required = ["Fire_Num", "Fire_Name", "Status"]
-    missing = [f for f in required if f not in tgt_fields]
+    tgt_fields = get_schema(tgt)
+    missing = [f for f in BASIC_FIELDS if f not in tgt_fields]
     if missing:
         arcpy.AddWarning(f"2.4 Target missing fields {missing}. Skipping 2.4.")
         return 0
 
     updated = 0
-    with arcpy.da.Editor(workspace):
-        with arcpy.da.UpdateCursor(tgt, ["Fire_Num", "Fire_Name", "Status"]) as cur:
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
+        with arcpy.da.UpdateCursor(tgt, BASIC_FIELDS) as cur:
             for row in cur:
-                changed = False
-
-                if row[0] is None or row[0] == "":
-                    row[0] = str(fire_number)
-                    changed = True
-
-                if row[1] is None or row[1] == "":
-                    row[1] = str(fire_name)
-                    changed = True
-
-                if row[2] is None or row[2] == "" or row[2] == "RehabRequiresFieldVerification":
-                    row[2] = str(status)
-                    changed = True
+                changed = _fill_basic_fields(row, 0, fire_number, fire_name, status)
 
                 if changed:
                     cur.updateRow(row)
@@ -520,21 +552,195 @@ def update_basic_fields_lines(lines_to_update, fire_number, fire_name, status):
     return updated
 
 
+#############################################################################################
+# 2.5 LINES PIPELINE (2.1 - 2.4 IN ONE PASS)
+#############################################################################################
+
+def _visible_oids(dataset_or_layer):
+    """
+    OIDs a layer exposes through its selection / definition query, or None when every
+    feature of the data source is visible (plain path, or unfiltered layer).
+    """
+    if not hasattr(dataset_or_layer, "dataSource"):
+        return None
+    try:
+        selection = dataset_or_layer.getSelectionSet()
+    except Exception:
+        selection = None
+    if selection:
+        return set(selection)
+    if getattr(dataset_or_layer, "definitionQuery", ""):
+        with arcpy.da.SearchCursor(dataset_or_layer, ["OID@"]) as cur:
+            return {oid for (oid,) in cur}
+    return None
+
+@instrument.step("2.5")
+def run_lines_pipeline(lines_to_copy, lines_to_update, fire_number, fire_name, status, tolerance=0.01, ignore_direction=False,
+                       skip_duplicates=True, duplicate_tolerance=None):
+    """
+    Same result as 2.1 -> 2.2 -> 2.3 -> 2.4, with the source read and projected once: each
+    projected row is inserted (journaled and duplicate-checked like copy_lines) and, if the
+    layer shows it, added to the endpoint index shared by the attribute values and domain
+    labels. Rows in play are those of the stepwise path: 2.1 copies every feature of the
+    data source, 2.2 / 2.3 match against the layer's selection / definition query.
+    Two edit-session phases remain: the inserts commit in journaled batches (one edit
+    session each, so an interrupted copy resumes), then every target row is written by a
+    single UpdateCursor pass inside one edit session.
+    """
+    t_start = time.perf_counter()
+    t_phase = t_start
+
+    def phase_done(label):
+        nonlocal t_phase
+        now = time.perf_counter()
+        arcpy.AddMessage(f"2.5 {label} in {now - t_phase:.2f}s.")
+        t_phase = now
+
+    src = _ds_path(lines_to_copy)
+    tgt = _ds_path(lines_to_update)
+
+    if _shape_type(src) != "Polyline" or _shape_type(tgt) != "Polyline":
+        raise ValueError("2.1 Both inputs must be Polyline feature classes/layers.")
+
+    src_fields = get_schema(src)
+    tgt_fields = get_schema(tgt)
+    tgt_sr = schema_cache.spatial_reference(tgt)
+
+    # What 2.2 / 2.3 / 2.4 would each write
+    field_mapping = _attribute_field_mapping(src_fields, tgt_fields)
+    if field_mapping:
+        arcpy.AddMessage(f"2.2 Field mapping: {field_mapping}")
+    else:
+        arcpy.AddWarning("2.2 No matching attribute fields found to copy. Skipping 2.2.")
+    attr_fields = list(field_mapping.keys())
+
+    label_fields = [f for f in LINE_DOMAIN_SOURCE_FIELDS if f in src_fields]
+    if "sym_name" not in label_fields:
+        arcpy.AddWarning("2.3 Source does not have 'sym_name'. Fallbacks may be less accurate.")
+    domain_fields = _domain_target_fields(tgt_fields)
+    if not domain_fields:
+        arcpy.AddWarning("2.3 Target has none of the expected domain fields. Skipping 2.3.")
+    domain_tables = _domain_tables(tgt, domain_fields)
+
+    missing = [f for f in BASIC_FIELDS if f not in tgt_fields]
+    if missing:
+        arcpy.AddWarning(f"2.4 Target missing fields {missing}. Skipping 2.4.")
+    basic_fields = [] if missing else BASIC_FIELDS
+
+    # ---- Read + project the source once: insert rows and endpoint index ----
+    read_fields = ["OID@", "SHAPE@"]
+    for f in list(field_mapping.values()) + label_fields:
+        if f not in read_fields:
+            read_fields.append(f)
+    idx = {f: i for i, f in enumerate(read_fields)}
+    attr_idx = [idx[f] for f in field_mapping.values()]
+
+    visible = _visible_oids(lines_to_copy)
+    source_index = LineMatcher(tolerance, ignore_direction)
+
+    def source_rows():
+        for first, last, geom, row in _source_lines(src, read_fields, tgt_sr):
+            if geom is not None and (visible is None or row[0] in visible):
+                values = tuple(row[i] for i in attr_idx)
+                source_index.add(first, last, (values, _domain_labels(row, idx)))
+            yield row[0], geom
+
+    workspace = _workspace_from_dataset(lines_to_update)
+    match_needed = bool(attr_fields or domain_fields)
+    update_fields = ["SHAPE@"] + attr_fields + domain_fields + basic_fields
+    domain_off = 1 + len(attr_fields)
+    basic_off = domain_off + len(domain_fields)
+
+    skipped_rows = []
+    distances = []
+    updated = 0
+    unmatched = 0
+    domain_skipped = 0
+
+    # ---- 2.1 Insert geometries (same journaled, duplicate-checked copy as copy_lines) ----
+    index = geometry_index.for_target(tgt, duplicate_tolerance) if skip_duplicates else None
+    if "Fire_Num" in tgt_fields:
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "2.1", ["SHAPE@", "Fire_Num"],
+                                                                [""], index=index, rows=source_rows())
+    else:
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "2.1", ["SHAPE@"], index=index,
+                                                                rows=source_rows())
+    arcpy.AddMessage(f"2.1 Copied {count} line(s) from source into target.")
+    if skip_duplicates:
+        arcpy.AddMessage(f"2.1 Skipped {duplicates} duplicate line(s) already in the target.")
+    arcpy.AddMessage(f"2.5 Indexed {len(source_index)} source line(s) by endpoints.")
+    phase_done("Read + projected source, inserted geometries")
+
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
+        # ---- 2.2 - 2.4 in one UpdateCursor pass ----
+        if len(update_fields) > 1:
+            with arcpy.da.UpdateCursor(tgt, update_fields) as cur:
+                for row in cur:
+                    changed = False
+
+                    if match_needed:
+                        hit = source_index.match_geometry(row[0])
+                        if hit is None:
+                            unmatched += 1
+                        else:
+                            (values, labels), dist = hit
+                            distances.append(dist)
+                            if attr_fields:
+                                key = _line_key(row[0], decimals=3)
+                                changed |= _apply_attribute_values(row, 1, attr_fields, values, tgt, skipped_rows, key)
+                            if domain_fields:
+                                domain_changed, n_skipped = _apply_domain_labels(row, domain_off, domain_fields, labels, domain_tables)
+                                changed |= domain_changed
+                                domain_skipped += n_skipped
+
+                    if basic_fields:
+                        changed |= _fill_basic_fields(row, basic_off, fire_number, fire_name, status)
+
+                    if changed:
+                        cur.updateRow(row)
+                        updated += 1
+
+        phase_done("Updated attributes, domains and basic fields")
+
+    arcpy.AddMessage(f"2.5 Updated {updated} feature(s). Unmatched: {unmatched}. Unmapped domain labels: {domain_skipped}.")
+    arcpy.AddMessage(f"2.5 Endpoint distances: {summarize_distances(distances)}.")
+    for line in domain_registry.fuzzy_summary(domain_tables):
+        arcpy.AddMessage(f"2.5 {line}")
+    if skipped_rows:
+        arcpy.AddWarning(f"2.2 Skipped {len(skipped_rows)} field assignment(s) due to length constraints.")
+    arcpy.AddMessage(f"2.5 Lines pipeline finished in {time.perf_counter() - t_start:.2f}s.")
+    return count + resumed, updated, unmatched
+
+
 #############################################################################################
 # EXECUTION
 #############################################################################################
 
 if __name__ == "__main__":
     # Required inputs (simplified)
+    schema_cache.invalidate()  # fresh schemas for each tool run
+
     lines_to_copy = arcpy.GetParameter(0)      
     lines_to_update = arcpy.GetParameter(1)    
     # Basic fields (optional, but provided as parameters for the tool)
     fire_number = arcpy.GetParameterAsText(2)
     fire_name = arcpy.GetParameterAsText(3)
     status = arcpy.GetParameterAsText(4)
+    # Optional: run 2.1 - 2.4 as one single-pass pipeline
+    single_pass = arcpy.GetArgumentCount() > 5 and bool(arcpy.GetParameter(5))
+    # Optional: insert every source line, even if the same geometry is already in the target (2.1 / 2.5)
+    allow_duplicates = arcpy.GetArgumentCount() > 6 and bool(arcpy.GetParameter(6))
 
-    copy_lines(lines_to_copy, lines_to_update)
-    copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update)
-    copy_domain_values_based_on_location_lines(lines_to_copy, lines_to_update)
-    update_basic_fields_lines(lines_to_update, fire_number, fire_name, status)
+    instrument.start_run("task02_lines")
+    try:
+        if single_pass:
+            run_lines_pipeline(lines_to_copy, lines_to_update, fire_number, fire_name, status,
+                               skip_duplicates=not allow_duplicates)
+        else:
+            copy_lines(lines_to_copy, lines_to_update, skip_duplicates=not allow_duplicates)
+            copy_attributes_based_on_location_lines(lines_to_copy, lines_to_update)
+            copy_domain_values_based_on_location_lines(lines_to_copy, lines_to_update)
+            update_basic_fields_lines(lines_to_update, fire_number, fire_name, status)
+    finally:
+        instrument.finish_run(instrument.reports_folder_for(_ds_path(lines_to_update)))
 
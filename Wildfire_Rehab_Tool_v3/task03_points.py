@@ -1,6 +1,16 @@
-import arcpy
+import numpy as np
 import os
-import re
+
+from backends import arcpy
+import copy_journal
+import domain_cache
+import domain_registry
+import geometry_index
+import instrument
+import schema_cache
+import shapefile_reader
+from domain_registry import POINT_DOMAIN_MAPPING_RAW
+from schema_cache import get_schema
 
 """
 Workflow
@@ -35,21 +45,75 @@ def _ds_path(dataset_or_layer) -> str:
     return dataset_or_layer.dataSource if hasattr(dataset_or_layer, "dataSource") else str(dataset_or_layer)
 
 def _shape_type(dataset_path: str) -> str:
-    return arcpy.Describe(dataset_path).shapeType
+    return schema_cache.shape_type(dataset_path)
+
+def _xy_keys(x, y, decimals=3):
+    """
+    Stable keys for point arrays: XY rounded to `decimals`, stored as integer pairs
+    so they compare/sort exactly.
+    """
+    scale = 10.0 ** decimals
+    keys = np.empty(len(x), dtype=[("x", "i8"), ("y", "i8")])
+    keys["x"] = np.rint(np.asarray(x, dtype="f8") * scale)
+    keys["y"] = np.rint(np.asarray(y, dtype="f8") * scale)
+    return keys
+
+def _read_source_xy(src, fields, tgt_sr):
+    """
+    Bulk-read source points already projected into tgt_sr (the cursor projects; shapefile
+    paths are read directly with shapefile_reader when possible).
+    Returns (x, y, rows) where rows[i] holds the `fields` values of point i.
+    """
+    native = shapefile_reader.open_for_target(src, tgt_sr)
+    if native is not None:
+        reader, transform = native
+        with reader:
+            x, y, rec = reader.xy()
+            rows = list(reader.records(fields, rows=rec))
+        x, y = np.asarray(x, dtype="f8"), np.asarray(y, dtype="f8")
+        if transform is not None:
+            x, y = transform(x, y)
+        return x, y, rows
+
+    xs, ys, rows = [], [], []
+    with arcpy.da.SearchCursor(src, ["SHAPE@XY"] + fields, spatial_reference=tgt_sr) as cur:
+        for row in cur:
+            x, y = row[0]
+            if x is None or y is None:
+                continue
+            xs.append(x)
+            ys.append(y)
+            rows.append(row[1:])
+    return np.array(xs, dtype="f8"), np.array(ys, dtype="f8"), rows
+
+def _read_target_xy(tgt):
+    """Bulk-read target OIDs + XY as arrays."""
+    arr = arcpy.da.FeatureClassToNumPyArray(tgt, ["OID@", "SHAPE@X", "SHAPE@Y"], skip_nulls=True)
+    return arr["OID@"], arr["SHAPE@X"], arr["SHAPE@Y"]
+
+def _match_xy(src_x, src_y, tgt_oids, tgt_x, tgt_y, decimals=3) -> dict:
+    """
+    Join target points to source points on rounded XY, as array operations.
+    Returns {target OID: source row index} for matched targets only. When several
+    source points share a key the last one wins (same as the old dict index).
+    """
+    if len(src_x) == 0 or len(tgt_oids) == 0:
+        return {}
+
+    src_keys = _xy_keys(src_x, src_y, decimals)
+    tgt_keys = _xy_keys(tgt_x, tgt_y, decimals)
 
-def _norm(s: str) -> str:
-    return re.sub(r"[^a-zA-Z0-9]", "", str(s)).lower().strip()
+    # Unique source keys, remembering the LAST occurrence of each
+    uniq, first_in_reversed = np.unique(src_keys[::-1], return_index=True)
+    src_pos = len(src_keys) - 1 - first_in_reversed
 
-def _pt_key(geom, decimals=3):
-    """Stable key for a point by centroid."""
-    c = geom.centroid
-    return (round(c.X, decimals), round(c.Y, decimals))
+    pos = np.minimum(np.searchsorted(uniq, tgt_keys), len(uniq) - 1)
+    hit = uniq[pos] == tgt_keys
+
+    return dict(zip(tgt_oids[hit].tolist(), src_pos[pos[hit]].tolist()))
 
 def _get_field_length(table, field_name):
-    for f in arcpy.ListFields(table, field_name):
-        if f.name.lower() == field_name.lower():
-            return f.length
-    return None
+    return schema_cache.get_schema(table).length(field_name)
 
 def _safe_set_text(row, idx, value, target_table, target_field_name, skipped, key_for_msg):
     """
@@ -59,8 +123,7 @@ def _safe_set_text(row, idx, value, target_table, target_field_name, skipped, ke
         return False
 
     # Find target field def
-    fld = next((f for f in arcpy.ListFields(target_table, target_field_name)
-                if f.name.lower() == target_field_name.lower()), None)
+    fld = schema_cache.get_schema(target_table).get(target_field_name)
 
     if fld and fld.type == "String" and isinstance(value, str):
         max_len = fld.length
@@ -78,9 +141,12 @@ def _safe_set_text(row, idx, value, target_table, target_field_name, skipped, ke
 # 3.1 COPY SPATIAL DATA - POINTS
 #############################################################################################
 
-def copy_points(points_to_copy, points_to_update):
+@instrument.step("3.1")
+def copy_points(points_to_copy, points_to_update, skip_duplicates=True, duplicate_tolerance=None):
     """
     Copy geometries from source into target. Inserts blank Fire_Num ('') if field exists.
+    skip_duplicates: skip source features whose geometry is already in the target (resent
+    exports), checked against the target's geometry_index (grid: duplicate_tolerance).
     """
     src = _ds_path(points_to_copy)
     tgt = _ds_path(points_to_update)
@@ -90,29 +156,26 @@ def copy_points(points_to_copy, points_to_update):
 
     workspace = _workspace_from_dataset(points_to_update)
 
-    count = 0
-    with arcpy.da.Editor(workspace):
-        with arcpy.da.SearchCursor(src, ["SHAPE@"]) as s_cur:
-            tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
-            if "Fire_Num" in tgt_fields:
-                with arcpy.da.InsertCursor(tgt, ["SHAPE@", "Fire_Num"]) as i_cur:
-                    for (geom,) in s_cur:
-                        i_cur.insertRow((geom, ""))
-                        count += 1
-            else:
-                with arcpy.da.InsertCursor(tgt, ["SHAPE@"]) as i_cur:
-                    for (geom,) in s_cur:
-                        i_cur.insertRow((geom,))
-                        count += 1
+    index = geometry_index.for_target(tgt, duplicate_tolerance) if skip_duplicates else None
+
+    # Inserted in journaled batches: an interrupted copy resumes without duplicates
+    if "Fire_Num" in get_schema(tgt):
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "3.1", ["SHAPE@", "Fire_Num"],
+                                                                [""], index=index)
+    else:
+        count, resumed, duplicates = copy_journal.copy_features(src, tgt, workspace, "3.1", ["SHAPE@"], index=index)
 
     arcpy.AddMessage(f"3.1 Copied {count} point(s) from source into target.")
-    return count
+    if skip_duplicates:
+        arcpy.AddMessage(f"3.1 Skipped {duplicates} duplicate point(s) already in the target.")
+    return count + resumed
 
 
 #############################################################################################
 # 3.2 COPY ATTRIBUTES BASED ON LOCATION - POINTS
 #############################################################################################
 
+@instrument.step("3.2")
 def copy_attributes_based_on_location_points(points_to_copy, points_to_update):
     """
     Copies NON-DOMAIN attributes by matching centroid XY.
@@ -123,8 +186,8 @@ def copy_attributes_based_on_location_points(points_to_copy, points_to_update):
 
     arcpy.AddMessage("3.2 Starting attribute copy process...")
 
-    src_fields = [f.name for f in arcpy.ListFields(src)]
-    tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
+    src_fields = get_schema(src)
+    tgt_fields = get_schema(tgt)
 
     field_mapping = {}
 
@@ -137,7 +200,7 @@ def copy_attributes_based_on_location_points(points_to_copy, points_to_update):
 
     # Comments mapping (target can be Comments OR Description)
 
-    tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
+    tgt_fields = get_schema(tgt)
 
     # Determine which target field to use
     target_comment_field = None
@@ -172,37 +235,32 @@ def copy_attributes_based_on_location_points(points_to_copy, points_to_update):
 
     arcpy.AddMessage(f"3.2 Field mapping: {field_mapping}")
 
-    tgt_sr = arcpy.Describe(tgt).spatialReference
+    tgt_sr = schema_cache.spatial_reference(tgt)
 
-    # Build source index
-    fields_to_copy = ["SHAPE@"] + list(field_mapping.values())
-    source_index = {}
+    # Build source index (bulk XY arrays) and join target XY to it
+    src_x, src_y, src_rows = _read_source_xy(src, list(field_mapping.values()), tgt_sr)
+    tgt_oids, tgt_x, tgt_y = _read_target_xy(tgt)
+    matches = _match_xy(src_x, src_y, tgt_oids, tgt_x, tgt_y, decimals=3)
 
-    with arcpy.da.SearchCursor(src, fields_to_copy) as cur:
-        for row in cur:
-            geom = row[0].projectAs(tgt_sr)
-            key = _pt_key(geom, decimals=3)
-            source_index[key] = row[1:]
-
-    arcpy.AddMessage(f"3.2 Indexed {len(source_index)} source feature(s) by centroid XY.")
+    arcpy.AddMessage(f"3.2 Indexed {len(src_rows)} source feature(s) by XY; {len(matches)} target match(es).")
 
-    # Update target
+    # Update target (matched OIDs only)
     workspace = _workspace_from_dataset(points_to_update)
-    fields_to_update = ["SHAPE@"] + list(field_mapping.keys())
+    fields_to_update = ["OID@"] + list(field_mapping.keys())
 
     skipped = []
     updated_count = 0
-    unmatched_count = 0
+    unmatched_count = len(tgt_oids) - len(matches)
 
-    with arcpy.da.Editor(workspace):
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
         with arcpy.da.UpdateCursor(tgt, fields_to_update) as cur:
             for row in cur:
-                key = _pt_key(row[0], decimals=3)
-                if key not in source_index:
-                    unmatched_count += 1
+                src_i = matches.get(row[0])
+                if src_i is None:
                     continue
 
-                values = source_index[key]
+                values = src_rows[src_i]
+                key = f"OID {row[0]}"
                 changed = False
                 for i, val in enumerate(values):
                     tgt_field = fields_to_update[i + 1]
@@ -223,6 +281,7 @@ def copy_attributes_based_on_location_points(points_to_copy, points_to_update):
 # 3.3 COPY DOMAIN VALUES BASED ON LOCATION - POINTS
 #############################################################################################
 
+@instrument.step("3.3")
 def copy_domain_values_based_on_location_points(points_to_copy, points_to_update):
     """
     Copies coded domain values (RPtType/RPtType2/RPtType3) by mapping source label -> code,
@@ -233,105 +292,10 @@ def copy_domain_values_based_on_location_points(points_to_copy, points_to_update
 
     arcpy.AddMessage("3.3 Starting domain copy process...")
 
-    # Your domain mapping (normalized)
-    domain_mapping_raw = {
-        'Berm Breach BB': '2',
-        'Berm High BH': '43',
-        'Cleared Area CA': '42',
-        'Cross Ditch Culvert Backup CDB': '50',
-        'Cross Ditch Install CDI': '6',
-        'Cross Ditch Repair CDR': '7',
-        'Culvert Clean Repair CC': '8',
-        'Culvert Insert CI': '9',
-        'Culvert No Damage CND': '51',
-        'Culvert Remove and Dispose CRD': '52',
-        'Ditch Clean Repair DCR': '14',
-        'Ditch Install DI': '15',
-        'Domestic Water Supply W': '18',
-        'Dry Seed DS': '19',
-        'Existing Deactivation ED': '20',
-        'Hazard H': '27',
-        'Infrastructure No Treatment INT': '53',
-        'Infrastructure Repair IR': '54',
-        'Lowbed Turnaround LBT': '55',
-        'No Treatment Point NT': '41',
-        'No Work Zone NWZ': '56',
-        'Other Rehab Treatment Type ORT': '46',
-        'Point of Commencement Termination PCT': '49',
-        'Pull Back PB': '30',
-        'Recontour RC': '31',
-        'Restore Draw RD': '32',
-        'Seepage SG': '48',
-        'Steep Slope SS': '36',
-        'Stream Crossing Classified SCC': '60',
-        'Stream Crossing Non Classified SCN': '37',
-        'Sump SP': '38',
-        'Unassigned UN': '99',
-        'Unique Point UP': '40',
-        'Water Bar WB': '39',
-        'Wood Bunched BW': '47',
-        'Wood Burn Pile BPW': '34',
-        'Wood Decked DW': '13',
-
-        # 2024 gdb variants
-        'Steep Slope gt 35% (SS)': '36',
-        'Breach Berm (BB)': '2',
-        'Cattle Guard Damage (CGD)': '3',
-        'Cattle Guard No Damage (CGND)': '4',
-        'Cleared Area (CA)': '42',
-        'Cross Ditch - Install (CDI)': '6',
-        'Cross Ditch - Repair (CDR)': '7',
-        'Culvert - Clean/Repair Culvert (CC)': '8',
-        'Culvert - Insert Metal (MC)': '9',
-        'Culvert - Insert Wood (WC)': '10',
-        'Culvert - Remove and Dispose (RC)': '11',
-        'Culvert - Rock Ford / Squamish (SO)': '12',
-        'Decked Wood (DW)': '13',
-        'Ditch - Clean/Repair (CD)': '14',
-        'Ditch - Install (ID)': '15',
-        'Ditch - Install French Drain (FD)': '16',
-        'Ditch - Install Rock Check Dam (ID)': '17',
-        'Domestic Water Supply (W)': '18',
-        'Dry Seed (DS)': '19',
-        'Existing Deactivation (ED)': '20',
-        'Fence Damage - Point (FD)': '21',
-        'Fence No Damaged - Point (FND)': '22',
-        'Ford - Install (FI)': '23',
-        'Ford - Removal (FR)': '24',
-        'Gate Damage (GD)': '25',
-        'Gate No Damage (GND)': '26',
-        'Hazard (H)': '27',
-        'High Berm (HB)': '43',
-        'Point of Commencement (POC)': '28',
-        'Point of Termination (POT)': '29',
-        'Pull Back (PB)': '30',
-        'Recontour (RC)': '31',
-        'Restore Draw (RD)': '32',
-        'Safety Zone (SZ)': '33',
-        'Slash / Burn Pile / Hazard (SBP)': '34',
-        'Staging Area (SA)': '35',
-        'Steep Slope >35% (SS)': '36',
-        'Stream Crossing (SC)': '37',
-        'Sump (SP)': '38',
-        'Water Bar (WB)': '39',
-        'Unique Point (UP)': '40',
-        'No Treatment - Point (NA)': '41',
-        'Unassigned': '99',
-        'Division Label': '98',
-        'Straw Bales (SB)': '44',
-        'Danger Tree Treatment Required (DTA)': '45',
-        'Armouring / Coco Matting / Rip Rap (ACR)': '1',
-        'Other Rehab Treatment Type': '46',
-        'Bunched Wood (BW)': '47',
-        'Seepage (SG)': '48',
-        'Point of Commencement / Termination (PTC)': '49'
-    }
-    domain_mapping = {_norm(k): v for k, v in domain_mapping_raw.items()}
-
-    tgt_sr = arcpy.Describe(tgt).spatialReference
-
-    src_all = [f.name for f in arcpy.ListFields(src)]
-    tgt_all = [f.name for f in arcpy.ListFields(tgt)]
+    tgt_sr = schema_cache.spatial_reference(tgt)
+
+    src_all = get_schema(src)
+    tgt_all = get_schema(tgt)
 
 
     # Determine primary label field (sym_name OR RPtType)
@@ -346,7 +310,7 @@ def copy_domain_values_based_on_location_points(points_to_copy, points_to_update
 
     # Build read fields
     read_candidates = ["RPtType2", "RPtType3"]
-    read_fields = ["SHAPE@"]
+    read_fields = []
 
     if primary_label_field:
         read_fields.append(primary_label_field)
@@ -361,52 +325,54 @@ def copy_domain_values_based_on_location_points(points_to_copy, points_to_update
         arcpy.AddWarning("3.3 Target has none of RPtType/RPtType2/RPtType3. Skipping 3.3.")
         return 0, 0
 
-    # Build source index by XY
-    idx = {f: i for i, f in enumerate(read_fields)}
-    source_data = {}
+    # Label -> code per target field: its GDB domain over domain_registry.POINTS
+    domain_tables = [domain_cache.label_table(tgt, f, domain_registry.POINTS) for f in update_fields]
+    domain_registry.reset_usage(domain_tables)
 
-    with arcpy.da.SearchCursor(src, read_fields) as cur:
-        for row in cur:
-            geom = row[idx["SHAPE@"]].projectAs(tgt_sr)
-            key = _pt_key(geom, decimals=3)
+    # Build source index by XY (bulk arrays) and join target XY to it
+    idx = {f: i for i, f in enumerate(read_fields)}
+    src_x, src_y, src_rows = _read_source_xy(src, read_fields, tgt_sr)
+    tgt_oids, tgt_x, tgt_y = _read_target_xy(tgt)
+    matches = _match_xy(src_x, src_y, tgt_oids, tgt_x, tgt_y, decimals=3)
 
-            sym = row[idx[primary_label_field]] if primary_label_field in idx else None
+    source_data = []
+    for row in src_rows:
+        sym = row[idx[primary_label_field]] if primary_label_field in idx else None
 
-            def get_label(field):
-                if field in idx:
-                    v = row[idx[field]]
-                    if v is not None and str(v).strip():
-                        return str(v).strip()
-                return sym  # fallback
+        def get_label(field):
+            if field in idx:
+                v = row[idx[field]]
+                if v is not None and str(v).strip():
+                    return str(v).strip()
+            return sym  # fallback
 
-            source_data[key] = {
-                "RPtType": sym,
-                "RPtType2": get_label("RPtType2"),
-                "RPtType3": get_label("RPtType3"),
-            }
+        source_data.append({
+            "RPtType": sym,
+            "RPtType2": get_label("RPtType2"),
+            "RPtType3": get_label("RPtType3"),
+        })
 
-    arcpy.AddMessage(f"3.3 Indexed {len(source_data)} source feature(s) for domain mapping.")
+    arcpy.AddMessage(f"3.3 Indexed {len(source_data)} source feature(s) for domain mapping; {len(matches)} target match(es).")
 
     workspace = _workspace_from_dataset(points_to_update)
 
     updated = 0
-    skipped = 0
+    skipped = len(tgt_oids) - len(matches)
 
-    with arcpy.da.Editor(workspace):
-        with arcpy.da.UpdateCursor(tgt, ["SHAPE@"] + update_fields) as cur:
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
+        with arcpy.da.UpdateCursor(tgt, ["OID@"] + update_fields) as cur:
             for row in cur:
-                key = _pt_key(row[0], decimals=3)
-                if key not in source_data:
-                    skipped += 1
+                src_i = matches.get(row[0])
+                if src_i is None:
                     continue
 
                 changed = False
                 for i, field in enumerate(update_fields):
-                    label = source_data[key].get(field)
+                    label = source_data[src_i].get(field)
                     if not label:
                         continue
 
-                    mapped = domain_mapping.get(_norm(label))
+                    mapped = domain_tables[i].code(label)
                     if mapped is None:
                         skipped += 1
                         continue
@@ -419,6 +385,8 @@ def copy_domain_values_based_on_location_points(points_to_copy, points_to_update
                     updated += 1
 
     arcpy.AddMessage(f"3.3 Updated {updated} feature(s). Skipped/unmatched: {skipped}.")
+    for line in domain_registry.fuzzy_summary(domain_tables):
+        arcpy.AddMessage(f"3.3 {line}")
     return updated, skipped
 
 
@@ -426,6 +394,7 @@ def copy_domain_values_based_on_location_points(points_to_copy, points_to_update
 # 3.4 UPDATE BASIC FIELDS - POINTS
 #############################################################################################
 
+@instrument.step("3.4")
 def update_basic_fields_points(points_to_update, fire_number, fire_name, status):
     """
     Update Fire_Num / Fire_Name / Status on target points.
@@ -434,7 +403,7 @@ def update_basic_fields_points(points_to_update, fire_number, fire_name, status)
     tgt = _ds_path(points_to_update)
     workspace = _workspace_from_dataset(points_to_update)
 
-    tgt_fields = [f.name for f in arcpy.ListFields(tgt)]
+    tgt_fields = get_schema(tgt)
     required = ["Fire_Num", "Fire_Name", "Status"]
     missing = [f for f in required if f not in tgt_fields]
     if missing:
@@ -442,7 +411,7 @@ def update_basic_fields_points(points_to_update, fire_number, fire_name, status)
         return 0
 
     updated = 0
-    with arcpy.da.Editor(workspace):
+    with geometry_index.attribute_edits(tgt), arcpy.da.Editor(workspace):
         with arcpy.da.UpdateCursor(tgt, ["Fire_Num", "Fire_Name", "Status"]) as cur:
             for row in cur:
                 changed = False
@@ -473,13 +442,21 @@ def update_basic_fields_points(points_to_update, fire_number, fire_name, status)
 
 if __name__ == "__main__":
     # Required inputs (simplified)
+    schema_cache.invalidate()  # fresh schemas for each tool run
+
     points_to_copy = arcpy.GetParameter(0)       
     points_to_update = arcpy.GetParameter(1)      
     fire_number = arcpy.GetParameterAsText(2)
     fire_name = arcpy.GetParameterAsText(3)
     status = arcpy.GetParameterAsText(4)
+    # Optional: insert every source point, even if the same geometry is already in the target
+    allow_duplicates = arcpy.GetArgumentCount() > 5 and bool(arcpy.GetParameter(5))
 
-    copy_points(points_to_copy, points_to_update)
-    copy_attributes_based_on_location_points(points_to_copy, points_to_update)
-    copy_domain_values_based_on_location_points(points_to_copy, points_to_update)
-    update_basic_fields_points(points_to_update, fire_number, fire_name, status)
+    instrument.start_run("task03_points")
+    try:
+        copy_points(points_to_copy, points_to_update, skip_duplicates=not allow_duplicates)
+        copy_attributes_based_on_location_points(points_to_copy, points_to_update)
+        copy_domain_values_based_on_location_points(points_to_copy, points_to_update)
+        update_basic_fields_points(points_to_update, fire_number, fire_name, status)
+    finally:
+        instrument.finish_run(instrument.reports_folder_for(_ds_path(points_to_update)))
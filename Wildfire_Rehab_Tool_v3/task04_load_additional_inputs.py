@@ -1,7 +1,10 @@
-import arcpy
 import os
 import re
 
+from backends import arcpy
+import albers
+import instrument
+
 """
 Workflow
 4.1 Re-projects and imports additional shapefiles from a specified folder into the
@@ -12,6 +15,8 @@ Rules
 - If an output name already exists in the default GDB, create a new name by suffixing _1, _2, ...
 - Do NOT leave standalone layers outside the Input group (remove them after adding to group).
 - Supports inputs in EPSG:4326 (WGS84) and EPSG:3005 (BC Albers).
+- use_builtin_albers=True projects 4326 inputs with the NumPy transform in albers.py
+  instead of the Project GP tool.
 """
 
 #############################################################################################
@@ -78,7 +83,8 @@ def add_fc_to_group(map_obj, group_layer, fc_path, existing_sources):
 # 4.1 MAIN
 #############################################################################################
 
-def add_additional_shapefiles(fire_number, input_folder):
+@instrument.step("4.1")
+def add_additional_shapefiles(fire_number, input_folder, use_builtin_albers=False):
     aprx = arcpy.mp.ArcGISProject("CURRENT")
     map_obj = aprx.activeMap
     if not map_obj:
@@ -125,7 +131,12 @@ def add_additional_shapefiles(fire_number, input_folder):
         out_fc = os.path.join(default_gdb, out_name)
 
         try:
-            if code == 4326:
+            if code == 4326 and use_builtin_albers:
+                # Project WGS84 -> BC Albers in memory (no GP call)
+                arcpy.AddMessage(f"Step 4.1 Projecting (4326→3005, built-in): {fn} → {out_name}")
+                albers.project_features(shp, out_fc)
+
+            elif code == 4326:
                 # Project WGS84 -> BC Albers
                 arcpy.AddMessage(f"Step 4.1 Projecting (4326→3005): {fn} → {out_name}")
                 arcpy.management.Project(shp, out_fc, bc_albers)
@@ -165,5 +176,11 @@ def add_additional_shapefiles(fire_number, input_folder):
 if __name__ == "__main__":
     fire_number = arcpy.GetParameterAsText(0)  
     input_folder = arcpy.GetParameterAsText(1) 
+    # Optional: project with the built-in NumPy Albers transform instead of Project
+    use_builtin_albers = arcpy.GetArgumentCount() > 2 and bool(arcpy.GetParameter(2))
 
-    add_additional_shapefiles(fire_number, input_folder)
+    instrument.start_run("task04_load_additional_inputs")
+    try:
+        add_additional_shapefiles(fire_number, input_folder, use_builtin_albers=use_builtin_albers)
+    finally:
+        instrument.finish_run(instrument.reports_folder_for(arcpy.mp.ArcGISProject("CURRENT").defaultGeodatabase))
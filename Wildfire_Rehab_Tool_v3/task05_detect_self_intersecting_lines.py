@@ -1,15 +1,14 @@
-import arcpy
 import os
 
+from backends import arcpy
+import instrument
+import schema_cache
+from segment_intersections import find_intersections, grid_pairs
+
 def _get_default_gdb():
     aprx = arcpy.mp.ArcGISProject("CURRENT")
     return aprx.defaultGeodatabase
 
-def _overlap(ext1, ext2):
-    """Quick bbox overlap test."""
-    return not (ext1.XMax < ext2.XMin or ext1.XMin > ext2.XMax or
-                ext1.YMax < ext2.YMin or ext1.YMin > ext2.YMax)
-
 def _iter_points(geom):
     """
     Yield arcpy.Point objects from an intersection result that may be:
@@ -78,24 +77,63 @@ def _unique_fc_name(out_gdb, base_name):
             return candidate, cand_fc
         i += 1
 
-def detect_line_intersections(input_fc, out_name="Self_Intersection_Points", ignore_touches=True):
-    # Use default GDB
-    out_gdb = _get_default_gdb()
-    arcpy.env.workspace = out_gdb
+def _read_line_coords(input_fc):
+    """[(oid, [[(x, y), ...] per part])] for every non-null line, read in one pass."""
+    features = []
+    with arcpy.da.SearchCursor(input_fc, ["OID@", "SHAPE@"]) as cur:
+        for oid, geom in cur:
+            if geom is None:
+                continue
+            parts = [[(p.X, p.Y) for p in part if p] for part in geom]
+            features.append((oid, parts))
+    return features
 
-    sr = arcpy.Describe(input_fc).spatialReference
 
-    # Make output name unique (and valid)
-    out_name_unique, out_fc = _unique_fc_name(out_gdb, out_name)
+def _xy_tolerance(sr, default=0.001):
+    """XY tolerance of a spatial reference (map units), or `default` if it has none."""
+    tol = getattr(sr, "XYTolerance", None)
+    try:
+        tol = float(tol)
+    except (TypeError, ValueError):
+        return default
+    return tol if tol > 0 else default
+
+
+def _report_pair_stats(candidates, contacts, reported):
+    """Log how well the envelope grid filtered feature pairs."""
+    hit_rate = (100.0 * contacts / candidates) if candidates else 0.0
+    arcpy.AddMessage(
+        f"Envelope grid: {candidates} candidate pair(s), {contacts} intersecting "
+        f"({hit_rate:.1f}%), {reported} reported after touches filter."
+    )
 
-    # Create output FC
-    arcpy.management.CreateFeatureclass(out_gdb, out_name_unique, "POINT", spatial_reference=sr)
-    arcpy.management.AddField(out_fc, "Line1_OID", "LONG")
-    arcpy.management.AddField(out_fc, "Line2_OID", "LONG")
-    arcpy.management.AddField(out_fc, "Type", "TEXT", field_length=20)
 
-    arcpy.AddMessage(f"Output: {out_fc}")
+def _scan_sweep(input_fc, sr, icur, ignore_touches, workers=1):
+    """Self / cross intersections through the plane sweep in segment_intersections.py."""
+    features = _read_line_coords(input_fc)
+    arcpy.AddMessage(f"Loaded {len(features)} line feature(s).")
+
+    if workers > 1:
+        arcpy.AddMessage(f"Sweeping line segments for intersections ({workers} worker processes)...")
+    else:
+        arcpy.AddMessage("Sweeping line segments for intersections...")
+    stats = {}
+    rows = find_intersections(features, ignore_touches=ignore_touches, tolerance=_xy_tolerance(sr),
+                              stats=stats, workers=workers)
+
+    inserted = 0
+    for x, y, oid1, oid2, kind in rows:
+        icur.insertRow([arcpy.PointGeometry(arcpy.Point(x, y), sr), oid1, oid2, kind])
+        inserted += 1
+
+    n_self = sum(1 for r in rows if r[4] == "SELF")
+    arcpy.AddMessage(f"Sweep done: {n_self} SELF, {len(rows) - n_self} CROSS point(s).")
+    _report_pair_stats(stats["candidate_pairs"], stats["contact_pairs"], stats["cross_pairs"])
+    return inserted
+
 
+def _scan_arcpy(input_fc, sr, icur, ignore_touches, workers=1):
+    """Original geometry-by-geometry scan with arcpy intersect()/touches()."""
     # Read all lines once
     lines = []
     with arcpy.da.SearchCursor(input_fc, ["OID@", "SHAPE@"]) as cur:
@@ -108,65 +146,103 @@ def detect_line_intersections(input_fc, out_name="Self_Intersection_Points", ign
 
     inserted = 0
 
-    with arcpy.da.InsertCursor(out_fc, ["SHAPE@", "Line1_OID", "Line2_OID", "Type"]) as icur:
-
-        # -----------------------------
-        # Self-intersections (per feature)
-        # -----------------------------
-        arcpy.AddMessage("Scanning self-intersections...")
-        for oid, line, _ext in lines:
-            # Build segments for each part
-            segments = []
-            for part in line:
-                pts = [p for p in part if p]
-                for i in range(len(pts) - 1):
-                    seg = arcpy.Polyline(arcpy.Array([pts[i], pts[i + 1]]), sr)
-                    segments.append(seg)
-
-            # Check only non-adjacent pairs, and only once (j > i)
-            for i in range(len(segments)):
-                for j in range(i + 1, len(segments)):
-                    # Skip neighbors (share endpoints) to reduce “touch” noise
-                    if j == i + 1:
-                        continue
-
-                    inter = segments[i].intersect(segments[j], 1)  # points
-                    if not inter:
-                        continue
-
-                    if ignore_touches and segments[i].touches(segments[j]):
-                        continue
-
-                    for pt in _iter_points(inter):
-                        icur.insertRow([arcpy.PointGeometry(pt, sr), oid, oid, "SELF"])
-                        inserted += 1
-
-        arcpy.AddMessage("Self-intersection scan done.")
-
-        # -----------------------------
-        # Intersections between different features
-        # -----------------------------
-        arcpy.AddMessage("Scanning intersections between different lines...")
-        for idx1 in range(len(lines)):
-            oid1, g1, e1 = lines[idx1]
-            for idx2 in range(idx1 + 1, len(lines)):
-                oid2, g2, e2 = lines[idx2]
-
-                # Fast bbox reject
-                if not _overlap(e1, e2):
+    # -----------------------------
+    # Self-intersections (per feature)
+    # -----------------------------
+    arcpy.AddMessage("Scanning self-intersections...")
+    for oid, line, _ext in lines:
+        # Build segments for each part
+        segments = []
+        for part in line:
+            pts = [p for p in part if p]
+            for i in range(len(pts) - 1):
+                seg = arcpy.Polyline(arcpy.Array([pts[i], pts[i + 1]]), sr)
+                segments.append(seg)
+
+        # Check only non-adjacent pairs, and only once (j > i)
+        for i in range(len(segments)):
+            for j in range(i + 1, len(segments)):
+                # Skip neighbors (share endpoints) to reduce “touch” noise
+                if j == i + 1:
                     continue
 
-                inter = g1.intersect(g2, 1)  # point output
+                inter = segments[i].intersect(segments[j], 1)  # points
                 if not inter:
                     continue
 
-                if ignore_touches and g1.touches(g2):
+                if ignore_touches and segments[i].touches(segments[j]):
                     continue
 
                 for pt in _iter_points(inter):
-                    icur.insertRow([arcpy.PointGeometry(pt, sr), oid1, oid2, "CROSS"])
+                    icur.insertRow([arcpy.PointGeometry(pt, sr), oid, oid, "SELF"])
                     inserted += 1
 
+    arcpy.AddMessage("Self-intersection scan done.")
+
+    # -----------------------------
+    # Intersections between different features
+    # -----------------------------
+    arcpy.AddMessage("Scanning intersections between different lines...")
+
+    # Only pairs whose extents share a grid cell (and overlap) are tested; sorted so the
+    # rows come out in the same order as the full idx1 / idx2 double loop
+    boxes = [(e.XMin, e.YMin, e.XMax, e.YMax) for _oid, _g, e in lines]
+    pairs = sorted(grid_pairs(boxes, tolerance=_xy_tolerance(sr)))
+
+    contacts = 0
+    reported = 0
+    for idx1, idx2 in pairs:
+        oid1, g1, _e1 = lines[idx1]
+        oid2, g2, _e2 = lines[idx2]
+
+        inter = g1.intersect(g2, 1)  # point output
+        if not inter:
+            continue
+        contacts += 1
+
+        if ignore_touches and g1.touches(g2):
+            continue
+        reported += 1
+
+        for pt in _iter_points(inter):
+            icur.insertRow([arcpy.PointGeometry(pt, sr), oid1, oid2, "CROSS"])
+            inserted += 1
+
+    _report_pair_stats(len(pairs), contacts, reported)
+    return inserted
+
+
+@instrument.step("5")
+def detect_line_intersections(input_fc, out_name="Self_Intersection_Points", ignore_touches=True, method="sweep",
+                              workers=1):
+    """
+    method: "sweep" (default) runs the coordinate plane sweep; "arcpy" runs the
+    original intersect()/touches() scan (kept for cross-checking results).
+    workers: processes for the sweep (1 = in this process; ignored by "arcpy").
+    """
+    # Use default GDB
+    out_gdb = _get_default_gdb()
+    arcpy.env.workspace = out_gdb
+
+    sr = schema_cache.spatial_reference(input_fc)
+
+    # Make output name unique (and valid)
+    out_name_unique, out_fc = _unique_fc_name(out_gdb, out_name)
+
+    # Create output FC
+    arcpy.management.CreateFeatureclass(out_gdb, out_name_unique, "POINT", spatial_reference=sr)
+    schema_cache.invalidate(out_fc)
+    schema_cache.add_field(out_fc, "Line1_OID", "LONG")
+    schema_cache.add_field(out_fc, "Line2_OID", "LONG")
+    schema_cache.add_field(out_fc, "Type", "TEXT", field_length=20)
+
+    arcpy.AddMessage(f"Output: {out_fc}")
+
+    scan = _scan_arcpy if method == "arcpy" else _scan_sweep
+    with arcpy.da.InsertCursor(out_fc, ["SHAPE@", "Line1_OID", "Line2_OID", "Type"]) as icur:
+        inserted = scan(input_fc, sr, icur, ignore_touches, workers=max(1, int(workers or 1)))
+    schema_cache.touched(out_fc)
+
     arcpy.AddMessage(f"Inserted {inserted} intersection point(s).")
 
     # Add to map
@@ -183,9 +259,25 @@ def detect_line_intersections(input_fc, out_name="Self_Intersection_Points", ign
 # -----------------------------
 if __name__ == "__main__":
     input_feature_class = arcpy.GetParameterAsText(0)
-    out_fc = detect_line_intersections(
-        input_feature_class,
-        out_name="Self_Intersection_Points",
-        ignore_touches=True
-    )
-    arcpy.AddMessage(f"Done: {out_fc}")
+
+    # Optional: use the original arcpy scan instead of the sweep
+    use_arcpy_scan = arcpy.GetArgumentCount() > 1 and bool(arcpy.GetParameter(1))
+
+    # Optional: worker processes for the sweep (blank / 0 = single process)
+    workers = 1
+    if arcpy.GetArgumentCount() > 2 and arcpy.GetParameter(2):
+        workers = min(int(arcpy.GetParameter(2)), os.cpu_count() or 1)
+
+    schema_cache.invalidate()  # fresh schemas for each tool run
+    instrument.start_run("task05_detect_self_intersecting_lines")
+    try:
+        out_fc = detect_line_intersections(
+            input_feature_class,
+            out_name="Self_Intersection_Points",
+            ignore_touches=True,
+            method="arcpy" if use_arcpy_scan else "sweep",
+            workers=workers
+        )
+        arcpy.AddMessage(f"Done: {out_fc}")
+    finally:
+        instrument.finish_run(instrument.reports_folder_for(input_feature_class))
@@ -1,4 +1,5 @@
-import arcpy
+from backends import arcpy
+import instrument
 
 """
 Workflow
@@ -6,6 +7,7 @@ Workflow
 
 """
 
+@instrument.step("5.1")
 def update_status(fc, new_status):
     # Check if there is a selection
     fidset = arcpy.Describe(fc).FIDSet
@@ -20,19 +22,24 @@ def update_status(fc, new_status):
             cursor.updateRow(row)
     arcpy.AddMessage(f"Step 5.  All selected features updated to Status = '{new_status}'.")
 
-# Get user inputs from tool
-fc = arcpy.GetParameterAsText(0)  
-new_status = arcpy.GetParameterAsText(1) 
+if __name__ == "__main__":
+    # Get user inputs from tool
+    fc = arcpy.GetParameterAsText(0)
+    new_status = arcpy.GetParameterAsText(1)
 
-'''
-Current
-RehabCompleted
-RehabFieldVerified
-RehabObligationsTransferred
-RehabPFR/ArchCompleted
-RehabRequiresFieldVerification
-Retired
-'''
+    '''
+    Current
+    RehabCompleted
+    RehabFieldVerified
+    RehabObligationsTransferred
+    RehabPFR/ArchCompleted
+    RehabRequiresFieldVerification
+    Retired
+    '''
 
-# Run the update
-update_status(fc, new_status)
+    # Run the update
+    instrument.start_run("task06_update_status")
+    try:
+        update_status(fc, new_status)
+    finally:
+        instrument.finish_run(instrument.reports_folder_for(fc))
@@ -1,9 +1,25 @@
 # -*- coding: utf-8 -*-
 import os
+import sys
 import csv
-import arcpy
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import backends
+from backends import arcpy
+import domain_cache
+import domain_registry
+import filegdb_reader
+import instrument
+import schema_cache
+
+# Read feature classes with filegdb_reader instead of arcpy.da (set by --native; the
+# default when there is no data backend, i.e. arcpy is not installed)
+USE_NATIVE_READER = backends.active() is None
+
 
 # ---------------------------------------------------------------------
 # Core helpers
@@ -15,6 +31,26 @@ FIELD_SYNONYMS = {
 }
 
 
+def _message(msg: str) -> None:
+    if backends.active() is not None:
+        arcpy.AddMessage(msg)
+    else:
+        print(msg)
+
+
+def _warning(msg: str) -> None:
+    if backends.active() is not None:
+        arcpy.AddWarning(msg)
+    else:
+        print(f"WARNING: {msg}", file=sys.stderr)
+
+
+def _search_cursor(fc: str, fields: list):
+    if USE_NATIVE_READER:
+        return instrument.count_cursor(filegdb_reader.SearchCursor(fc, fields))
+    return arcpy.da.SearchCursor(fc, fields)
+
+
 def get_bool_param(i: int, default: bool = False) -> bool:
     v = arcpy.GetParameterAsText(i)
     if v is None or str(v).strip() == "":
@@ -28,7 +64,7 @@ def resolve_field_map(fc: str, canonical_fields: list, synonyms: dict) -> dict:
     synonyms example:
       {"RLType": ["RLType1"], "Comments": ["Description"]}
     """
-    existing = {f.name for f in arcpy.ListFields(fc)}
+    existing = set(schema_cache.field_names(fc))
     out = {}
 
     for canon in canonical_fields:
@@ -74,7 +110,7 @@ def ensure_folder(path: str) -> None:
 
 
 def list_fields(fc: str) -> set:
-    return {f.name for f in arcpy.ListFields(fc)}
+    return set(schema_cache.field_names(fc))
 
 
 def invert_domain_map_label_to_code(domain_mapping_raw: dict) -> dict:
@@ -130,391 +166,429 @@ def extract_width_from_comments(comments):
 
 
 # ---------------------------------------------------------------------
-# Domain dictionaries (as provided)
+# Domain dictionaries (compiled once in domain_registry)
 # ---------------------------------------------------------------------
 def get_points_rpttype_domain_raw() -> dict:
-    return {
-        'Berm Breach BB': '2',
-        'Berm High BH': '43',
-        'Cleared Area CA': '42',
-        'Cross Ditch Culvert Backup CDB': '50',
-        'Cross Ditch Install CDI': '6',
-        'Cross Ditch Repair CDR': '7',
-        'Culvert Clean Repair CC': '8',
-        'Culvert Insert CI': '9',
-        'Culvert No Damage CND': '51',
-        'Culvert Remove and Dispose CRD': '52',
-        'Ditch Clean Repair DCR': '14',
-        'Ditch Install DI': '15',
-        'Domestic Water Supply W': '18',
-        'Dry Seed DS': '19',
-        'Existing Deactivation ED': '20',
-        'Hazard H': '27',
-        'Infrastructure No Treatment INT': '53',
-        'Infrastructure Repair IR': '54',
-        'Lowbed Turnaround LBT': '55',
-        'No Treatment Point NT': '41',
-        'No Work Zone NWZ': '56',
-        'Other Rehab Treatment Type ORT': '46',
-        'Point of Commencement Termination PCT': '49',
-        'Pull Back PB': '30',
-        'Recontour RC': '31',
-        'Restore Draw RD': '32',
-        'Seepage SG': '48',
-        'Steep Slope SS': '36',
-        'Stream Crossing Classified SCC': '60',
-        'Stream Crossing Non Classified SCN': '37',
-        'Sump SP': '38',
-        'Unassigned UN': '99',
-        'Unique Point UP': '40',
-        'Water Bar WB': '39',
-        'Wood Bunched BW': '47',
-        'Wood Burn Pile BPW': '34',
-        'Wood Decked DW': '13',
-
-        # 2024 gdb
-        'Steep Slope gt 35% (SS)': '36',
-        'Breach Berm (BB)': '2',
-        'Cattle Guard Damage (CGD)': '3',
-        'Cattle Guard No Damage (CGND)': '4',
-        'Cleared Area (CA)': '42',
-        'Cross Ditch - Install (CDI)': '6',
-        'Cross Ditch - Repair (CDR)': '7',
-        'Culvert - Clean/Repair Culvert (CC)': '8',
-        'Culvert - Insert Metal (MC)': '9',
-        'Culvert - Insert Wood (WC)': '10',
-        'Culvert - Remove and Dispose (RC)': '11',
-        'Culvert - Rock Ford / Squamish (SO)': '12',
-        'Decked Wood (DW)': '13',
-        'Ditch - Clean/Repair (CD)': '14',
-        'Ditch - Install (ID)': '15',
-        'Ditch - Install French Drain (FD)': '16',
-        'Ditch - Install Rock Check Dam (ID)': '17',
-        'Domestic Water Supply (W)': '18',
-        'Dry Seed (DS)': '19',
-        'Existing Deactivation (ED)': '20',
-        'Fence Damage - Point (FD)': '21',
-        'Fence No Damaged - Point (FND)': '22',
-        'Ford - Install (FI)': '23',
-        'Ford - Removal (FR)': '24',
-        'Gate Damage (GD)': '25',
-        'Gate No Damage (GND)': '26',
-        'Hazard (H)': '27',
-        'High Berm (HB)': '43',
-        'Point of Commencement (POC)': '28',
-        'Point of Termination (POT)': '29',
-        'Pull Back (PB)': '30',
-        'Recontour (RC)': '31',
-        'Restore Draw (RD)': '32',
-        'Safety Zone (SZ)': '33',
-        'Slash / Burn Pile / Hazard (SBP)': '34',
-        'Staging Area (SA)': '35',
-        'Steep Slope >35% (SS)': '36',
-        'Stream Crossing (SC)': '37',
-        'Sump (SP)': '38',
-        'Water Bar (WB)': '39',
-        'Unique Point (UP)': '40',
-        'No Treatment - Point (NA)': '41',
-        'Unassigned': '99',
-        'Division Label': '98',
-        'Straw Bales (SB)': '44',
-        'Danger Tree Treatment Required (DTA)': '45',
-        'Armouring / Coco Matting / Rip Rap (ACR)': '1',
-        'Other Rehab Treatment Type': '46',
-        'Bunched Wood (BW)': '47',
-        'Seepage (SG)': '48',
-        'Point of Commencement / Termination (PTC)': '49'
-    }
+    return dict(domain_registry.POINT_DOMAIN_MAPPING_RAW)
 
 
 def get_lines_rltype_domain_raw() -> dict:
-    return {
-        'Clean Ditch (CD)': '1',
-        'Dry Seed (DS)': '2',
-        'Fence - Damaged (FD)': '3',
-        'Fence - Undamaged (FND)': '4',
-        'Danger Tree Treatment Required (DTA)': '14',
-        'Grade Road (GR)': '5',
-        'Pull Back (PB)': '6',
-        'Recontour (RC)': '7',
-        'Steep Slopes >35% (SS)': '10',
-        'No Treatment - Line (NA)': '11',
-        'Hazard (H)': '13',
-        'Unassigned': '99',
-        'Fuel Hazard Treatment Required (FHT)': '15',
-        'Division Break': '89',
-        'Other Rehab Treatment Type': '16',
-        'Road Damage - Requires Repair (RR)': '9',
-
-        'Ditch Clean Repair DCR': '1',
-        'Dry Seed DS': '2',
-        'Fire Hazard Treatment FHT': '13',
-        'Grade Road GR': '5',
-        'Infrastructure No Treatment INT': '21',
-        'Infrastructure Repair IR': '20',
-        'No Treatment NT': '11',
-        'No Work Zone NWZ': '22',
-        'Other Rehab Treatment Type ORT': '16',
-        'Pull Back PB': '6',
-        'Recontour RC': '7',
-        'Steep Slopes SS': '10'
-    }
+    return dict(domain_registry.RLTYPE_DOMAIN_RAW)
 
 
 def get_lines_fltype_domain_raw() -> dict:
-    return {
-        'Unknown': '0',
-        'Active Burnout': '1',
-        'Aerial Foam Drop': '2',
-        'Aerial Hazard': '3',
-        'Aerial Ignition': '4',
-        'Aerial Retardant Drop': '5',
-        'Aerial Water Drop': '6',
-        'Branch Break': '7',
-        'Completed Burnout': '8',
-        'Completed Machine Line': '9',
-        'Completed Handline': '10',
-        'Completed Line': '11',
-        'Division Break': '12',
-        'Danger Tree Assessed': '13',
-        'Danger Tree Assessed/Felled': '14',
-        'Escape Route': '15',
-        'Fire Break Planned or Incomplete': '16',
-        'Fire Spread Prediction': '17',
-        'Highlighted Geographic Feature': '18',
-        'Highlighted Manmade Feature': '19',
-        'Line Break Complete': '20',
-        'Planned Fire Line': '21',
-        'Planned Secondary Line': '22',
-        'Proposed Burnout': '23',
-        'Proposed Machine Line': '24',
-        'Trigger Point': '25',
-        'Uncontrolled Fire Edge': '26',
-        'Other': '27',
-        'Contingency Line': '28',
-        'No Work Zone': '29',
-        'Completed Fuel Free Line': '30',
-        'Road - Modified Existing': '32',
-        'Trail': '34',
-        'Road': '31',
-        'Road - Heavily Used': '33',
-        'Pipeline': '35',
-        'Completed Hoselay': '36',
-        'Containment / Control Line': '37',
-
-        # duplicates / alt labels
-        'Containment Control Line': '37',
-        'Completed Fuel Free Line FF': '30',
-        'Completed Handline HL': '10',
-        'Completed Machine Line MG': '9',
-        'Road Heavily Used RHU': '33',
-        'Road Modified Existing REM': '32',
-        'Trail TR': '34'
-    }
+    return dict(domain_registry.FLTYPE_DOMAIN_RAW)
 
 
 # ---------------------------------------------------------------------
 # Reports
+#
+# Each report is a small collector: it names the fields it needs and is
+# fed cursor rows. The report engine (below) reads each feature class once
+# and hands every row to all collectors of that feature class.
+# Summary reports aggregate and yield their rows from rows() at the end;
+# per-feature reports (_CsvStream) write each row to their open CSV as it
+# comes in, so no feature class is ever held in memory.
 # ---------------------------------------------------------------------
-def export_point_stats(points_fc: str, out_csv: str, scratch_gdb: str, fire_number: str):
-    case_field = "RPtType"
-    stats_table = os.path.join(scratch_gdb, f"{fire_number}_Point_Stats")
-    statistics_fields = [["OBJECTID", "COUNT"]]
+def _case_sort_key(key):
+    """Sort key for case-field tuples; nulls sort first like Statistics_analysis."""
+    return tuple((v is not None, v if v is not None else 0) for v in key)
 
-    domain_code_to_label = invert_domain_map_label_to_code(get_points_rpttype_domain_raw())
 
-    arcpy.Statistics_analysis(points_fc, stats_table, statistics_fields, case_field)
+class _PointStats:
+    """Count of points per RPtType (what Statistics_analysis COUNT OBJECTID gave)."""
+    header = ["RPtType", "COUNT_OBJECTID"]
 
-    def rows():
-        with arcpy.da.SearchCursor(stats_table, [case_field, "COUNT_OBJECTID"]) as cur:
-            for code_val, cnt in cur:
-                key = safe_int(code_val)
-                label = domain_code_to_label.get(key, f"Unknown ({code_val})")
-                yield [label, cnt]
+    def __init__(self, points_fc: str):
+        self.fields = ["RPtType"]
+        self.counts = {}
+        self.domain_code_to_label = domain_cache.code_labels(points_fc, "RPtType", domain_registry.POINTS)
 
-    write_csv(out_csv, ["RPtType", "COUNT_OBJECTID"], rows())
+    def add(self, row):
+        self.counts[row[0]] = self.counts.get(row[0], 0) + 1
 
+    def rows(self):
+        for (code_val,) in sorted(((k,) for k in self.counts), key=_case_sort_key):
+            key = safe_int(code_val)
+            label = self.domain_code_to_label.get(key, f"Unknown ({code_val})")
+            yield [label, self.counts[code_val]]
 
-def export_line_stats(lines_fc: str, out_csv: str, scratch_gdb: str, fire_number: str):
+
+class _LineStats:
     """
-    Line stats grouped by RLType + FLType (no Label).
+    Line stats grouped by RLType + FLType (no Label): count, sum of Shape_Length
+    and mean width from Comments, accumulated row by row (no scratch table).
     Also supports alternate field names:
       RLType1 -> RLType
       FLType1 -> FLType
       Description -> Comments (for width extraction)
     """
+    header = ["RLType", "FLType", "COUNT_OBJECTID", "SUM_Shape_Length", "Width"]
 
-    # Canonical fields we need for this report
-    canonical_needed = ["RLType", "FLType", "Comments"]
-
-    # Resolve canonical -> actual field name present in FC (or None)
-    field_map = resolve_field_map(lines_fc, canonical_needed, FIELD_SYNONYMS)
-
-    rl_field = field_map.get("RLType")      # could be "RLType" or "RLType1"
-    fl_field = field_map.get("FLType")      # could be "FLType" or "FLType1"
-    cmt_field = field_map.get("Comments")   # could be "Comments" or "Description"
-
-    if rl_field is None or fl_field is None:
-        raise RuntimeError(
-            "Line stats: could not find required grouping fields. "
-            f"Resolved RLType -> {rl_field}, FLType -> {fl_field}"
-        )
-
-    stats_table = os.path.join(scratch_gdb, f"{fire_number}_Line_Stats")
-
-    # Run statistics grouped by the ACTUAL fields (rl_field/fl_field)
-    statistics_fields = [["OBJECTID", "COUNT"], ["Shape_Length", "SUM"]]
-    case_fields_actual = [rl_field, fl_field]
-    arcpy.Statistics_analysis(lines_fc, stats_table, statistics_fields, case_fields_actual)
-
-    # Domain decode dicts (code -> label)
-    rl_code_to_label = invert_domain_map_label_to_code(get_lines_rltype_domain_raw())
-    fl_code_to_label = invert_domain_map_label_to_code(get_lines_fltype_domain_raw())
-
-    # Average width grouped by (RLType, FLType) using Comments/Description if available
-    avg_width = {}
-    if cmt_field is not None:
-        width_vals = {}
-        with arcpy.da.SearchCursor(lines_fc, [rl_field, fl_field, cmt_field]) as cur:
-            for rl, fl, comments in cur:
-                w = extract_width_from_comments(comments)
-                if w is None:
-                    continue
-                key = (rl, fl)
-                width_vals.setdefault(key, []).append(w)
-        avg_width = {k: (sum(v) / len(v)) for k, v in width_vals.items()}
-    else:
-        arcpy.AddWarning("Line stats: no Comments/Description field found; Width column will be empty.")
+    def __init__(self, lines_fc: str):
+        # Resolve canonical -> actual field name present in FC (or None)
+        field_map = resolve_field_map(lines_fc, ["RLType", "FLType", "Comments"], FIELD_SYNONYMS)
 
-    # Write CSV using CANONICAL headers
-    header = ["RLType", "FLType", "COUNT_OBJECTID", "SUM_Shape_Length", "Width"]
+        rl_field = field_map.get("RLType")      # could be "RLType" or "RLType1"
+        fl_field = field_map.get("FLType")      # could be "FLType" or "FLType1"
+        cmt_field = field_map.get("Comments")   # could be "Comments" or "Description"
 
-    def rows():
-        # stats table fields are the ACTUAL grouping fields
-        fields = case_fields_actual + ["COUNT_OBJECTID", "SUM_Shape_Length"]
-        with arcpy.da.SearchCursor(stats_table, fields) as cur:
-            for rl, fl, cnt, sum_len in cur:
-                rl_txt = rl_code_to_label.get(safe_int(rl), f"Unknown ({rl})")
-                fl_txt = fl_code_to_label.get(safe_int(fl), f"Unknown ({fl})")
+        if rl_field is None or fl_field is None:
+            raise RuntimeError(
+                "Line stats: could not find required grouping fields. "
+                f"Resolved RLType -> {rl_field}, FLType -> {fl_field}"
+            )
 
-                w = avg_width.get((rl, fl), None)
-                if w is not None:
-                    w = round(w, 1)
+        if cmt_field is None:
+            _warning("Line stats: no Comments/Description field found; Width column will be empty.")
 
-                yield [rl_txt, fl_txt, cnt, sum_len, w]
+        self.has_comments = cmt_field is not None
+        self.fields = [rl_field, fl_field, "Shape_Length"] + ([cmt_field] if cmt_field else [])
 
-    write_csv(out_csv, header, rows())
+        # (rl, fl) -> [count, sum Shape_Length (None if all null), width sum, width count]
+        self.groups = {}
 
+        # Domain decode dicts (code -> label)
+        self.rl_code_to_label = domain_cache.code_labels(lines_fc, "RLType", domain_registry.RLTYPE)
+        self.fl_code_to_label = domain_cache.code_labels(lines_fc, "FLType", domain_registry.FLTYPE)
 
+    def add(self, row):
+        g = self.groups.get((row[0], row[1]))
+        if g is None:
+            g = self.groups[(row[0], row[1])] = [0, None, 0.0, 0]
+        g[0] += 1
+        if row[2] is not None:
+            g[1] = row[2] if g[1] is None else g[1] + row[2]
+        if self.has_comments:
+            w = extract_width_from_comments(row[3])
+            if w is not None:
+                g[2] += w
+                g[3] += 1
 
+    def rows(self):
+        # Statistics_analysis output was sorted by the case fields
+        for rl, fl in sorted(self.groups, key=_case_sort_key):
+            cnt, sum_len, w_sum, w_cnt = self.groups[(rl, fl)]
+            rl_txt = self.rl_code_to_label.get(safe_int(rl), f"Unknown ({rl})")
+            fl_txt = self.fl_code_to_label.get(safe_int(fl), f"Unknown ({fl})")
 
-def export_point_feature_report(points_fc: str, out_csv: str):
-    fields_to_export = ["Label", "CaptureDate", "RPtType", "Comments", "Status"]
-    existing = list_fields(points_fc)
+            w = round(w_sum / w_cnt, 1) if w_cnt else None
 
-    export_fields = [f for f in fields_to_export if f in existing]
-    missing = [f for f in fields_to_export if f not in existing]
-    if missing:
-        arcpy.AddWarning(f"Points report: skipping missing fields: {', '.join(missing)}")
+            yield [rl_txt, fl_txt, cnt, sum_len, w]
 
-    if not export_fields:
-        raise RuntimeError("Points report: no fields available to export.")
 
-    domain_code_to_label = invert_domain_map_label_to_code(get_points_rpttype_domain_raw())
+class _CsvStream:
+    """Per-feature report: open() the CSV before feeding, rows are written by add(), then close()."""
+    streams = True
 
-    rpt_idx = export_fields.index("RPtType") if "RPtType" in export_fields else None
-    label_idx = export_fields.index("Label") if "Label" in export_fields else None
+    def open(self, path: str) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writerow = csv.writer(self._file).writerow
+        self._writerow(self.header)
 
-    def rows():
-        with arcpy.da.SearchCursor(points_fc, export_fields) as cur:
-            for row in cur:
-                row = list(row)
+    def close(self) -> None:
+        self._file.close()
 
-                # decode domain
-                if rpt_idx is not None:
-                    v = row[rpt_idx]
-                    if v is None:
-                        row[rpt_idx] = ""
-                    else:
-                        row[rpt_idx] = domain_code_to_label.get(safe_int(v), f"Unknown ({v})")
 
-                # Excel-safe label (force text)
-                if label_idx is not None and row[label_idx] is not None:
-                    row[label_idx] = "'" + str(row[label_idx])
+class _PointFeatureReport(_CsvStream):
+    """One CSV row per point with RPtType decoded."""
 
-                yield row
+    def __init__(self, points_fc: str):
+        fields_to_export = ["Label", "CaptureDate", "RPtType", "Comments", "Status"]
+        existing = list_fields(points_fc)
 
-    write_csv(out_csv, export_fields, rows())
+        self.fields = [f for f in fields_to_export if f in existing]
+        missing = [f for f in fields_to_export if f not in existing]
+        if missing:
+            _warning(f"Points report: skipping missing fields: {', '.join(missing)}")
 
+        if not self.fields:
+            raise RuntimeError("Points report: no fields available to export.")
+
+        self.header = list(self.fields)
+        self.domain_code_to_label = domain_cache.code_labels(points_fc, "RPtType", domain_registry.POINTS)
+        self.rpt_idx = self.fields.index("RPtType") if "RPtType" in self.fields else None
+        self.label_idx = self.fields.index("Label") if "Label" in self.fields else None
+
+    def add(self, row):
+        row = list(row)
+
+        # decode domain
+        if self.rpt_idx is not None:
+            v = row[self.rpt_idx]
+            if v is None:
+                row[self.rpt_idx] = ""
+            else:
+                row[self.rpt_idx] = self.domain_code_to_label.get(safe_int(v), f"Unknown ({v})")
+
+        # Excel-safe label (force text)
+        if self.label_idx is not None and row[self.label_idx] is not None:
+            row[self.label_idx] = "'" + str(row[self.label_idx])
+
+        self._writerow(row)
+
+
+class _LineFeatureReport(_CsvStream):
+    """One CSV row per line, canonical columns, RLType / FLType fields decoded."""
 
-def export_line_feature_report(lines_fc: str, out_csv: str):
     # Canonical fields we WANT in output (always)
-    canonical_fields = [
+    header = [
         "Label", "CaptureDate",
         "RLType", "FLType",
         "FLType2", "RLType_2", "RLType_3",
         "LineWidth", "Comments", "Status"
     ]
 
-    # Resolve canonical -> actual field in this FC (may be synonyms like RLType1)
-    field_map = resolve_field_map(lines_fc, canonical_fields, FIELD_SYNONYMS)
+    # Domain-decoded fields (canonical names)
+    rl_fields = {"RLType", "RLType_2", "RLType_3"}
+    fl_fields = {"FLType", "FLType2"}
+
+    def __init__(self, lines_fc: str):
+        # Resolve canonical -> actual field in this FC (may be synonyms like RLType1)
+        self.field_map = resolve_field_map(lines_fc, self.header, FIELD_SYNONYMS)
 
-    # Build list of fields we can actually read in a cursor
-    cursor_fields = [actual for actual in field_map.values() if actual is not None]
+        # Fields we can actually read in a cursor
+        self.fields = [actual for actual in self.field_map.values() if actual is not None]
 
-    missing = [k for k, v in field_map.items() if v is None]
-    if missing:
-        arcpy.AddWarning(
-            f"Lines report: these fields not found (will be empty in CSV): {', '.join(missing)}"
-        )
+        missing = [k for k, v in self.field_map.items() if v is None]
+        if missing:
+            _warning(
+                f"Lines report: these fields not found (will be empty in CSV): {', '.join(missing)}"
+            )
 
-    rl_code_to_label = invert_domain_map_label_to_code(get_lines_rltype_domain_raw())
-    fl_code_to_label = invert_domain_map_label_to_code(get_lines_fltype_domain_raw())
+        self.rl_code_to_label = domain_cache.code_labels(lines_fc, "RLType", domain_registry.RLTYPE)
+        self.fl_code_to_label = domain_cache.code_labels(lines_fc, "FLType", domain_registry.FLTYPE)
 
-    # Domain-decoded fields (canonical names)
-    rl_fields = {"RLType", "RLType_2", "RLType_3"}
-    fl_fields = {"FLType", "FLType2"}
+        # canonical column -> index in the incoming row (None = missing, written empty)
+        idx = {f: i for i, f in enumerate(self.fields)}
+        self.columns = [
+            (canon, idx[actual] if actual is not None else None)
+            for canon, actual in self.field_map.items()
+        ]
 
-    def decode(canon_field, val):
+    def decode(self, canon_field, val):
         if val is None:
             return ""
         key = safe_int(val)
-        if canon_field in rl_fields:
-            return rl_code_to_label.get(key, f"Unknown ({val})")
-        if canon_field in fl_fields:
-            return fl_code_to_label.get(key, f"Unknown ({val})")
+        if canon_field in self.rl_fields:
+            return self.rl_code_to_label.get(key, f"Unknown ({val})")
+        if canon_field in self.fl_fields:
+            return self.fl_code_to_label.get(key, f"Unknown ({val})")
         return val
 
-    # Build quick lookup: actual_field -> index in cursor row
-    idx = {f: i for i, f in enumerate(cursor_fields)}
+    def add(self, row):
+        self._writerow([
+            "" if i is None else self.decode(canon, row[i])
+            for canon, i in self.columns
+        ])
+
+
+# report name -> (input: "points" / "lines", collector class); order = generation order
+REPORTS = {
+    "Point_Stats": ("points", _PointStats),
+    "Line_Stats": ("lines", _LineStats),
+    "Point_Feature_Report": ("points", _PointFeatureReport),
+    "Line_Feature_Report": ("lines", _LineFeatureReport),
+}
 
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(canonical_fields)  # ✅ always canonical header
 
-        with arcpy.da.SearchCursor(lines_fc, cursor_fields) as cur:
-            for row in cur:
-                out_row = []
-                for canon in canonical_fields:
-                    actual = field_map.get(canon)
-                    if actual is None:
-                        out_row.append("")  # field missing entirely
-                    else:
-                        out_row.append(decode(canon, row[idx[actual]]))
-                w.writerow(out_row)
+# rows read from the cursor per batch; each collector is timed once per batch
+FEED_BATCH_ROWS = 50000
 
 
+def _feed(fc: str, collectors: list) -> None:
+    """
+    Read fc once with the union of the collectors' fields and hand each collector
+    its own slice of every row. Rows are handed over in batches of FEED_BATCH_ROWS,
+    one collector at a time, so the per-collector time (added to collector.seconds)
+    is measured once per batch - once per feature class for a normal fire.
+    """
+    fields = []
+    for c in collectors:
+        for f in c.fields:
+            if f not in fields:
+                fields.append(f)
+    slices = [(c, [fields.index(f) for f in c.fields]) for c in collectors]
+
+    with _search_cursor(fc, fields) as cur:
+        rows = iter(cur)
+        while True:
+            batch = list(itertools.islice(rows, FEED_BATCH_ROWS))
+            if not batch:
+                break
+            for c, idx in slices:
+                t0 = time.perf_counter()
+                add = c.add
+                for row in batch:
+                    add(tuple(row[i] for i in idx))
+                c.seconds += time.perf_counter() - t0
+
+
+def _open_streams(collectors: list, paths: dict) -> None:
+    """Open the CSV of every streaming collector (timed into its seconds)."""
+    for c in collectors:
+        if getattr(c, "streams", False):
+            t0 = time.perf_counter()
+            c.open(paths[c.name])
+            c.seconds += time.perf_counter() - t0
+
+
+def _close_streams(collectors: list) -> None:
+    for c in collectors:
+        if getattr(c, "streams", False) and getattr(c, "_file", None) is not None:
+            t0 = time.perf_counter()
+            c.close()
+            c.seconds += time.perf_counter() - t0
+
+
+def _write_report(path: str, collector) -> float:
+    t0 = time.perf_counter()
+    write_csv(path, collector.header, collector.rows())
+    return time.perf_counter() - t0
+
+
+def parse_report_names(text) -> list:
+    """
+    'Point_Stats;Line_Stats' / 'Point_Stats,Line_Stats' / list -> validated report names
+    (all reports if empty).
+    """
+    if not text:
+        return list(REPORTS)
+    names = text if isinstance(text, (list, tuple)) else str(text).replace(",", ";").split(";")
+    names = [n.strip().strip("'\"") for n in names if n and n.strip()]
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        raise ValueError(f"Unknown report(s): {', '.join(unknown)}. Choose from: {', '.join(REPORTS)}")
+    return [n for n in REPORTS if n in names]
+
+
+@instrument.step("7")
+def generate_reports(points_fc: str, lines_fc: str, out_folder: str, fire_number: str,
+                     reports=None, max_writers: int = 4) -> dict:
+    """
+    Build the requested reports (all by default) reading the points and the lines
+    feature class once each. Feature reports are written row by row while their feature
+    class is read; summary CSVs are written by a thread pool, so the points files go
+    out to the (slow) share while the lines are still being read.
+    Returns {report name: (csv path, seconds)}.
+    """
+    names = parse_report_names(reports)
+    inputs = {"points": points_fc, "lines": lines_fc}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_writers) as pool:
+        writes = []
+        for kind in ("points", "lines"):
+            wanted = [n for n in names if REPORTS[n][0] == kind]
+            if not wanted:
+                continue
+
+            collectors = []
+            for n in wanted:
+                c = REPORTS[n][1](inputs[kind])
+                c.name = n
+                c.seconds = 0.0
+                collectors.append(c)
+            paths = {c.name: os.path.join(out_folder, f"{fire_number}_{c.name}.csv") for c in collectors}
+
+            t0 = time.perf_counter()
+            try:
+                _open_streams(collectors, paths)
+                _feed(inputs[kind], collectors)
+            finally:
+                _close_streams(collectors)
+            _message(f"Read {kind} once for {len(collectors)} report(s) "
+                             f"in {time.perf_counter() - t0:.2f}s")
+
+            for c in collectors:
+                fut = None if getattr(c, "streams", False) else pool.submit(_write_report, paths[c.name], c)
+                writes.append((c, paths[c.name], fut))
+
+        for c, path, fut in writes:
+            seconds = c.seconds + (fut.result() if fut is not None else 0.0)
+            results[c.name] = (path, seconds)
+            _message(f"✅ {c.name}: {path} ({seconds:.2f}s)")
+
+    return results
+
+
+# ---------------------------------------------------------------------
+# Single-report entry points (same CSVs as the engine)
+# ---------------------------------------------------------------------
+def _export_single(collector_cls, fc: str, out_csv: str):
+    c = collector_cls(fc)
+    c.name = "single"
+    c.seconds = 0.0
+    try:
+        _open_streams([c], {c.name: out_csv})
+        _feed(fc, [c])
+    finally:
+        _close_streams([c])
+    if not getattr(c, "streams", False):
+        write_csv(out_csv, c.header, c.rows())
+
+
+def export_point_stats(points_fc: str, out_csv: str, scratch_gdb: str = None, fire_number: str = None):
+    """Point counts per RPtType (scratch_gdb / fire_number kept for existing callers)."""
+    _export_single(_PointStats, points_fc, out_csv)
+
+
+def export_line_stats(lines_fc: str, out_csv: str, scratch_gdb: str = None, fire_number: str = None):
+    """Line stats per RLType + FLType (scratch_gdb / fire_number kept for existing callers)."""
+    _export_single(_LineStats, lines_fc, out_csv)
+
+
+def export_point_feature_report(points_fc: str, out_csv: str):
+    _export_single(_PointFeatureReport, points_fc, out_csv)
+
+
+def export_line_feature_report(lines_fc: str, out_csv: str):
+    _export_single(_LineFeatureReport, lines_fc, out_csv)
+
 
 # ---------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------
-def main():
-    fire_year = arcpy.GetParameterAsText(0)
-    fire_number = arcpy.GetParameterAsText(1)
-    points_fc = arcpy.GetParameterAsText(2)
-    lines_fc = arcpy.GetParameterAsText(3)
-    out_folder = arcpy.GetParameterAsText(4)
-    overwrite = get_bool_param(5, True)
+def _cli_args(argv):
+    """Command-line parameters for running the reports outside a script tool."""
+    parser = argparse.ArgumentParser(description="Generate the rehab CSV reports.")
+    parser.add_argument("--fire-year", required=True)
+    parser.add_argument("--fire-number", required=True)
+    parser.add_argument("--points", required=True, help="Points feature class")
+    parser.add_argument("--lines", required=True, help="Lines feature class")
+    parser.add_argument("--out-folder", default="")
+    parser.add_argument("--reports", default="",
+                        help=f"Comma-separated subset of: {', '.join(REPORTS)} (default: all)")
+    parser.add_argument("--native", action="store_true",
+                        help="Read the GDB with filegdb_reader instead of arcpy (no ArcGIS needed)")
+    a = parser.parse_args(argv)
+    if a.native:
+        global USE_NATIVE_READER
+        USE_NATIVE_READER = True
+    return a.fire_year, a.fire_number, a.points, a.lines, a.out_folder, True, a.reports
+
+
+def _tool_args():
+    reports = arcpy.GetParameterAsText(6) if arcpy.GetArgumentCount() > 6 else ""
+    return (
+        arcpy.GetParameterAsText(0),
+        arcpy.GetParameterAsText(1),
+        arcpy.GetParameterAsText(2),
+        arcpy.GetParameterAsText(3),
+        arcpy.GetParameterAsText(4),
+        get_bool_param(5, True),
+        reports,  # Optional: multi-value list of reports to (re)generate
+    )
+
+
+def main(argv=None):
+    schema_cache.invalidate()  # fresh schemas for each tool run
+
+    argv = sys.argv[1:] if argv is None else argv
+    if any(a.startswith("--") for a in argv):
+        fire_year, fire_number, points_fc, lines_fc, out_folder, overwrite, reports = _cli_args(argv)
+    else:
+        fire_year, fire_number, points_fc, lines_fc, out_folder, overwrite, reports = _tool_args()
 
     if not fire_year or not fire_number or not points_fc or not lines_fc:
         raise ValueError("Fire Year, Fire Number, Points FC, and Lines FC are required.")
@@ -524,35 +598,21 @@ def main():
 
     ensure_folder(out_folder)
 
-    arcpy.env.overwriteOutput = overwrite
-
-    # Use Scratch GDB for temp stats tables
-    scratch_gdb = arcpy.env.scratchGDB
-    if not scratch_gdb or not arcpy.Exists(scratch_gdb):
-        raise RuntimeError("scratchGDB is not available. Check ArcGIS Pro environment settings.")
+    if backends.active() is not None:
+        arcpy.env.overwriteOutput = overwrite
 
-    # Output paths
-    out_point_stats = os.path.join(out_folder, f"{fire_number}_Point_Stats.csv")
-    out_line_stats = os.path.join(out_folder, f"{fire_number}_Line_Stats.csv")
-    out_point_report = os.path.join(out_folder, f"{fire_number}_Point_Feature_Report.csv")
-    out_line_report = os.path.join(out_folder, f"{fire_number}_Line_Feature_Report.csv")
+    names = parse_report_names(reports)
 
-    arcpy.AddMessage(f"Reports folder: {out_folder}")
-    arcpy.AddMessage("Generating 4 CSV reports...")
+    _message(f"Reports folder: {out_folder}")
+    _message(f"Generating {len(names)} CSV report(s)...")
 
-    export_point_stats(points_fc, out_point_stats, scratch_gdb, fire_number)
-    arcpy.AddMessage(f"✅ Points stats: {out_point_stats}")
-
-    export_line_stats(lines_fc, out_line_stats, scratch_gdb, fire_number)
-    arcpy.AddMessage(f"✅ Lines stats: {out_line_stats}")
-
-    export_point_feature_report(points_fc, out_point_report)
-    arcpy.AddMessage(f"✅ Points feature report: {out_point_report}")
-
-    export_line_feature_report(lines_fc, out_line_report)
-    arcpy.AddMessage(f"✅ Lines feature report: {out_line_report}")
+    instrument.start_run("task07_reports")
+    try:
+        generate_reports(points_fc, lines_fc, out_folder, fire_number, names)
+    finally:
+        instrument.finish_run(out_folder)
 
-    arcpy.AddMessage("✅ All reports created successfully.")
+    _message("✅ All reports created successfully.")
 
 
 if __name__ == "__main__":